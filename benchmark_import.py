@@ -0,0 +1,80 @@
+import os
+import sys
+import subprocess
+from statistics import median
+
+HEAVY_MODULES = ['cv2', 'PIL', 'zendriver', 'bs4', 'curl_cffi', 'asyncio'] # The libraries that should only be imported when they are used
+
+def measure_import(runs=5):
+    '''
+    Measures the cold start of importing main (each run is a new interpreter)
+
+    Parameters:
+        runs (int): Number of the imports to measure
+
+    Returns:
+        times (list): The time of each import in seconds
+        loaded (list): The heavy libraries that were imported with main
+    '''
+
+    folder = os.path.dirname(os.path.abspath(__file__)) # main.py is next to this file
+
+    code = ("import sys, time; start = time.perf_counter(); import main; "
+            "print(time.perf_counter() - start); "
+            f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))")
+
+    times = []
+    loaded = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', code], cwd=folder, capture_output=True, text=True, check=True)
+
+        lines = result.stdout.split('\n')
+        times.append(float(lines[0])) # The time of the import
+        loaded = [name for name in lines[1].split(',') if name != '']
+
+    return times, loaded
+
+def top_imports(count=10):
+    '''
+    Gets the modules imported by main that take the most time (using python -X importtime)
+
+    Parameters:
+        count (int): Number of the modules to return
+
+    Returns:
+        modules (list): The (cumulative time in microseconds, module) of the slowest imports of main
+    '''
+
+    folder = os.path.dirname(os.path.abspath(__file__)) # main.py is next to this file
+
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'], cwd=folder, capture_output=True, text=True, check=True)
+
+    modules = []
+    children = [] # The imports of the next top-level module (they are printed before it)
+    for line in result.stderr.split('\n'):
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue # Not a module line
+
+        _, cumulative, name = line[len('import time:'):].split('|')
+
+        depth = (len(name) - len(name.lstrip()) - 1) // 2 # Each level is indented by two spaces
+
+        if depth == 1:
+            children.append((int(cumulative), name.strip()))
+
+        elif depth == 0:
+            if name.strip() == 'main':
+                modules = children # The imports of main
+
+            children = []
+
+    return sorted(modules, reverse=True)[:count]
+
+if __name__ == '__main__':
+    times, loaded = measure_import()
+
+    print(f"import main: {median(times) * 1000:.1f} ms (median of {len(times)} runs)")
+    print(f"Heavy libraries loaded on import: {', '.join(loaded) if loaded else 'none'}")
+
+    for cumulative, name in top_imports():
+        print(f"{cumulative / 1000:8.1f} ms  {name}")
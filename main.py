@@ -1,16 +1,26 @@
 import sqlite3
-from PIL import Image, ImageDraw, ImageFilter
-from cv2 import VideoCapture, cvtColor, COLOR_BGR2RGB
 import os
 import shutil
 import glob
+import threading
+import atexit
+from functools import partial
+from queue import LifoQueue, Queue, Full, Empty
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
 from time import sleep, time
 from mimetypes import guess_extension, guess_type
-from curl_cffi import requests
-import zendriver as zd
-from bs4 import BeautifulSoup
-from urllib.parse import unquote
+import mimetypes
+from urllib.parse import quote, unquote, urlparse
+from email.utils import parsedate_to_datetime
+from types import GeneratorType
 import json
+import hashlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING: # The heavy libraries are imported by the functions that use them
+    import zendriver as zd
 
 INVALID_CHARACTERS = ['/', '\\', ':', '*', '?', '"', '<', '>', '|'] # Invalid characters for file names
 
@@ -20,8 +30,125 @@ HEADERS = { # Headers for the requests
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
 }
 
-profile_data = None # Global variable for profile data
+STEALTHGRAM_API = "https://stealthgram.com/api/apiData" # Base stealthgram API link
+
+PK_INFO_HEADERS = { # Headers for getting the profile's information by it's pk
+    'User-Agent': 'Instagram 85.0.0.21.100 Android (23/6.0.1; 538dpi; 1440x2560; LGE; LG-E425f; vee3e; en_US)',
+}
+
+DATABASE_PRAGMAS = [ # The settings of each connection to the database
+    "PRAGMA foreign_keys = ON", # Enabling foreign key constraints
+    "PRAGMA journal_mode = WAL", # The readers don't block the writer and a commit doesn't rewrite the database
+    "PRAGMA synchronous = NORMAL", # Only the checkpoints wait for the disk (safe with WAL)
+    "PRAGMA cache_size = -32768", # 32 MB of page cache
+    "PRAGMA mmap_size = 268435456", # Read the database through 256 MB of memory map
+    "PRAGMA temp_store = MEMORY", # Keep the temporary tables and indexes in memory
+]
+MIGRATIONS = [ # The changes of the schema, the database's user_version is the number of the applied changes
+    [ # 1: Indexes for the lookups of the entry points, the pending posts, the stories and the highlights
+        "CREATE INDEX IF NOT EXISTS ProfileUsername ON Profile(username)",
+        "CREATE INDEX IF NOT EXISTS PostPending ON Post(pk, is_tag) WHERE number_of_items IS NULL",
+        "CREATE INDEX IF NOT EXISTS PostCode ON Post(post_code, is_tag)",
+        "CREATE INDEX IF NOT EXISTS StoryHighlight ON Story(pk, highlight_id)",
+        "CREATE INDEX IF NOT EXISTS HighlightProfile ON Highlight(pk)",
+    ],
+    [ # 2: The index of the saved files (the address is relative to the storage folder and without the extension)
+        "CREATE TABLE IF NOT EXISTS Media(address PRIMARY KEY, owner, extension, size, mime, thumbnail)",
+    ],
+    [ # 3: The queue of the unfinished work (the finished jobs are removed, so it's small)
+        """CREATE TABLE IF NOT EXISTS Job(job_id INTEGER PRIMARY KEY, kind, job_key, payload, state, priority,
+        attempts, last_error, owner, lease_expiry, UNIQUE(kind, job_key))""",
+    ],
+]
+HOT_QUERIES = [ # The queries that run on every sync (they must use an index, not scan the whole table)
+    ("SELECT pk, is_private FROM Profile WHERE username = ?", ('username',)),
+    ("SELECT post_code FROM Post WHERE pk = ? AND is_tag = ? AND number_of_items IS NULL", (1, 0)),
+    ("UPDATE Post SET number_of_items = ?, caption = ?, timestamp = ? WHERE pk = ? AND post_code = ? AND is_tag = ?", (1, None, 0, 1, 'code', 0)),
+    ("SELECT * FROM Story WHERE pk = ? AND story_pk IN (?, ?)", (1, 1, 2)),
+    ("SELECT COUNT(*) FROM Story WHERE pk = ? AND highlight_id = ?", (1, 1)),
+    ("SELECT * FROM Highlight WHERE pk = ?", (1,)),
+    ("SELECT extension, thumbnail FROM Media WHERE address = ?", ('address',)),
+]
+DATABASE_STATEMENTS = 256 # Number of the parsed statements that each connection keeps for reusing
+DATABASE_COMMIT_ROWS = 500 # Number of the changed rows after which the database writer commits the waiting jobs
+DATABASE_COMMIT_INTERVAL = 0.05 # Number of the seconds after which the database writer commits the waiting jobs
+DOWNLOAD_WORKERS = 8 # Number of the workers that download the media at the same time
+HOST_CONCURRENCY = 4 # Maximum number of the downloads at the same time from a single host
+POST_WORKERS = 4 # Number of the posts that are fetched at the same time
+POST_CODE_LOOKAHEAD = 2 # Number of the sets of posts codes that are fetched before they are needed
+PK_INFO_FIELDS = ('pk', 'username', 'full_name', 'biography', 'is_private', 'media_count',
+                  'follower_count', 'following_count', 'hd_profile_pic_url_info') # The fields that the HTTP API must have for the profile's data
+STORIES_QUERY_SIZE = 500 # Number of the story_pks that are checked in a single query
+MEDIA_QUERY_SIZE = 500 # Number of the addresses that are looked up in the media index in a single query
+JOB_PRIORITIES = {'story': 2, 'post': 1, 'highlight': 0} # The jobs with higher priority are resumed first (the links of the stories expire sooner)
+JOB_MAX_ATTEMPTS = 3 # Number of the failed tries after which a job isn't resumed anymore
+JOB_LEASE = 30 * 60 # Number of the seconds after which a running job of this program is taken by resume (as if it's stuck)
+JOB_BATCH_SIZE = 50 # Number of the jobs that resume takes at once
+STORIES_BATCH_SIZE = 25 # Number of the highlights that their stories are asked for in a single request
+CIRCUIT_FAILURES = 3 # Number of the failures in a row that stops using a provider for a while
+CIRCUIT_COOLDOWN = 120 # Number of the seconds a failing provider isn't used before trying it again
+RESPONSE_CACHE_ENABLED = True # Should the pages be saved and reused (set to False to always send the requests)
+RESPONSE_CACHE_SIZE = 200 * 1024 * 1024 # Maximum size of the saved pages (the least recently used ones are removed)
+RESPONSE_CACHE_KEEP = 0.9 # The part of RESPONSE_CACHE_SIZE that is kept when the old pages are removed (so they aren't removed on every save)
+RESPONSE_CACHE_TTLS = { # Number of the seconds that each type of page can be reused
+    'post_page': 6 * 3600, # The page of a post
+    'posts_page': 10 * 60, # The first page of the (tagged/normal) posts (has the newest posts)
+    'posts_cursor': 3600, # The next sets of the (tagged/normal) posts
+}
+SESSION_POOL_SIZE = 8 # Maximum number of the kept-alive sessions for each host
+DOWNLOAD_CHUNK_SIZE = 256 * 1024 # Size of the chunks that are written to the file while downloading
+ASYNC_CONNECTIONS = 64 # Maximum number of the requests at the same time in the async functions
+CPU_WORKERS = os.cpu_count() or 4 # Number of the workers that parse the pages in the async functions
+THUMBNAIL_WORKERS = os.cpu_count() or 4 # Number of the processes that make the thumbnails
+THUMBNAIL_QUEUE_SIZE = 32 # Maximum number of the thumbnails waiting for the processes (adding more waits for a free place)
+BROWSER_TABS = 2 # Number of the browser tabs that are kept open on the search page
+BROWSER_MAX_LOOKUPS = 50 # Number of the lookups after which a tab is closed and a new one is opened
+BROWSER_ARGS = ["--headless=new", '--disable-gpu'] # Arguments for starting the browser
+ANONYIG_URL = 'https://anonyig.com/en/' # The search page for the profile data
+RATE_LIMIT_START = 5.0 # Number of the requests per second that each host starts with
+RATE_LIMIT_MIN = 0.05 # Minimum number of the requests per second for each host
+RATE_LIMIT_MAX = 20.0 # Maximum number of the requests per second for each host
+RATE_LIMIT_INCREASE = 0.1 # Added to the rate of the host after each successful request
+RATE_LIMIT_DECREASE = 0.5 # The rate of the host is multiplied by this after each "Too many requests"
+
 stealthgram_tokens = None # Global variable for stealthgram tokens
+download_executor = None # Global variable for the download workers pool
+host_semaphores = {} # Global variable for the download limits of each host
+download_lock = threading.Lock() # Lock for making the download workers pool and the host limits
+session_pools = {} # Global variable for the kept-alive sessions of each host
+session_lock = threading.Lock() # Lock for making the sessions pools
+rate_limits = {} # Global variable for the rate limit of each host
+rate_limit_lock = threading.Lock() # Lock for the rate limits
+cache_lock = threading.Lock() # Lock for the size of the saved pages and removing the old ones
+cache_sizes = {} # Global variable for the total size of the saved pages of each cache folder (counted once, then kept up to date)
+providers = {} # Global variable for the providers of each interface (profile_info, highlights, stories, post_list, post_page)
+circuit_breakers = {} # Global variable for the failures of each provider
+circuit_lock = threading.Lock() # Lock for the circuit breakers
+request_failures = ContextVar('request_failures', default=None) # The record of the connection failures of the running provider call
+async_providers = {} # Global variable for the async version of each (interface, provider)
+async_states = {} # Global variable for the async session and limits of each event loop
+async_lock = threading.Lock() # Lock for making the async sessions and limits
+cpu_executor = None # Global variable for the parsing workers pool of the async functions
+thumbnail_executor = None # Global variable for the thumbnail processes pool
+thumbnail_slots = None # Global variable for the places of the thumbnails waiting for the processes
+thumbnail_lock = threading.Lock() # Lock for making the thumbnail processes pool
+thumbnail_processes = True # If the thumbnails are made on the processes (False after the processes pool is broken)
+thumbnail_threads = None # Global variable for the thumbnail threads pool (used after the processes pool is broken)
+db_writer = None # Global variable for the database writer thread (the only connection that writes to the database)
+db_jobs = None # Global variable for the queue of the database writer's jobs
+db_local = threading.local() # The connection of each thread to the database
+db_lock = threading.Lock() # Lock for making the workers pools of the async functions
+browser_loop = None # Global variable for the event loop of the browser thread
+browser_pool = None # Global variable for the browser and it's warm tabs (only used on browser_loop)
+browser_lock = threading.Lock() # Lock for starting the browser thread
+connection = None # Global variable for the connection to the database of the opened store
+dbCursor = None # Global variable for the cursor of the database of the opened store
+store_lock = threading.RLock() # Lock for opening the store
+folder_names = {} # Global variable for the folder name of each profile (by it's pk) in the opened store
+folder_lock = threading.Lock() # Lock for the folder names
+job_owner = f"{os.getpid()}-{time()}" # The owner of the jobs that are running by this program
+profile_sources = {} # Number of the profiles' data that are got from each provider (and "api" for the HTTP API)
+profile_source_lock = threading.Lock() # Lock for the profile sources
 
 def make_tables(dbCursor):
     '''
@@ -51,6 +178,60 @@ def make_tables(dbCursor):
     dbCursor.execute("""CREATE TABLE CoverHistory(highlight_id, cover_id, PRIMARY KEY(highlight_id, cover_id),
                      FOREIGN KEY(highlight_id) REFERENCES Highlight(highlight_id))""")
 
+def migrate(connection):
+    '''
+    Brings the schema of the database up to date (the changes that are already applied are skipped)
+
+    Parameters:
+        connection (sqlite3.Connection): The connection to the database
+    '''
+
+    version = connection.execute("PRAGMA user_version").fetchone()[0] # Number of the applied changes
+
+    for number in range(version, len(MIGRATIONS)):
+        try:
+            connection.execute("BEGIN") # Each change is applied completely or not at all
+
+            for statement in MIGRATIONS[number]:
+                connection.execute(statement)
+            
+            connection.execute(f"PRAGMA user_version = {number + 1}")
+            connection.commit()
+        
+        except:
+            connection.rollback()
+            raise
+
+def check_query_plans():
+    '''
+    Checks that the hot queries use the indexes (using EXPLAIN QUERY PLAN)
+
+    Returns:
+        scans (dict): The plan of each hot query that scans a whole table (empty if all of them use an index)
+    '''
+
+    database, _ = get_database()
+
+    scans = {}
+    for query, parameters in HOT_QUERIES:
+        plan = [row[3] for row in database.execute(f"EXPLAIN QUERY PLAN {query}", parameters)] # The detail of each step
+
+        if any(step.startswith('SCAN') for step in plan):
+            scans[query] = plan
+    
+    return scans
+
+def set_pragmas(dbCursor):
+    '''
+    Sets the settings of the connection to the database
+
+    Parameters:
+        dbCursor (sqlite3.Cursor): The cursor for the database
+    '''
+
+    for pragma in DATABASE_PRAGMAS:
+        dbCursor.execute(pragma)
+
 def initialize():
     '''
     Initializes the basic stuff for the program
@@ -68,10 +249,10 @@ def initialize():
         if not os.path.exists(os.path.join(path, "data.db")):
             initializeTables = True
 
-        connection = sqlite3.connect(os.path.join(path, "data.db"))
+        connection = sqlite3.connect(os.path.join(path, "data.db"), cached_statements=DATABASE_STATEMENTS)
         dbCursor = connection.cursor()
 
-        dbCursor.execute("PRAGMA foreign_keys = ON") # Enabling foreign key constraints
+        set_pragmas(dbCursor=dbCursor) # Set the settings of the connection
 
         if initializeTables:
             try:
@@ -80,18 +261,346 @@ def initialize():
             except:
                 os.remove(os.path.join(path, "data.db")) # If there was an error then remove the database
                 return None, None
+        
+        migrate(connection=connection) # Add the new indexes and changes to the database
             
         return connection, dbCursor
     
     except:
         return None, None
 
+def open_store(store_path=None):
+    '''
+    Opens the store (the storage folder and it's database) that the functions use, the default store is opened on the first query if none is opened
+
+    Parameters:
+        store_path (str): The path of the storage folder (None for the storage folder next to the program)
+    
+    Returns:
+        connection (sqlite3.Connection): The connection to the database (None if the store couldn't be opened)
+    '''
+
+    global path, connection, dbCursor
+    with store_lock:
+        if store_path is not None:
+            store_path = os.path.abspath(store_path)
+
+            if (connection is not None) and (store_path == path):
+                return connection # The store is already opened
+        
+        elif connection is not None:
+            return connection # A store is already opened
+        
+        close_store() # Close the previous store
+
+        if store_path is not None:
+            path = store_path # Change the base path
+        
+        connection, dbCursor = initialize() # Create the folder and the database if needed
+
+        if connection is None: # If there was an error in initializing
+            print("Couldn't open the store!")
+
+        return connection
+
+def close_store():
+    '''
+    Closes the database of the opened store (the database writer commits the queued jobs and stops)
+    '''
+
+    global connection, dbCursor, db_writer, db_jobs
+    with store_lock:
+        with db_lock:
+            writer, jobs = db_writer, db_jobs
+            db_writer, db_jobs = None, None # The writer opens the next store's database when it's needed
+
+            if writer is not None:
+                jobs.put(None) # Stop the writer after the queued jobs
+
+        if writer is not None:
+            writer.join()
+        
+        if connection is not None:
+            try:
+                connection.close()
+            
+            except:
+                pass # The connection is already closed
+        
+        connection, dbCursor = None, None
+
+    with folder_lock:
+        folder_names.clear() # The folders of the next store are found again
+
+def get_database():
+    '''
+    Gets the connection to the database of this thread (the database writer's connection, or a read-only one for the other threads)
+
+    Returns:
+        connection (sqlite3.Connection): The connection to the database (None if the store couldn't be opened)
+        dbCursor (sqlite3.Cursor): The cursor for the database
+    '''
+
+    if getattr(db_local, 'connection', None) is not None: # Each thread has it's own connection
+        if db_local.path == path:
+            return db_local.connection, db_local.cursor
+        
+        close_thread_database() # Another store is opened since
+    
+    if connection is None:
+        open_store() # Open the default store on the first query
+    
+    if connection is None:
+        return None, None # Couldn't open the store
+    
+    try:
+        open_thread_database(read_only=True) # The readers don't block each other or the writer (WAL)
+    
+    except:
+        return None, None # Couldn't open the database
+    
+    return db_local.connection, db_local.cursor
+
+def open_thread_database(read_only=False):
+    '''
+    Opens the connection of this thread to the database of the opened store
+
+    Parameters:
+        read_only (bool): Should the connection only read (the database writer's connection is the only one that writes)
+    '''
+
+    address = os.path.join(path, "data.db")
+
+    if read_only:
+        db_local.connection = sqlite3.connect(f"file:{quote(address)}?mode=ro", uri=True, cached_statements=DATABASE_STATEMENTS)
+    
+    else:
+        db_local.connection = sqlite3.connect(address, cached_statements=DATABASE_STATEMENTS)
+    
+    db_local.cursor = db_local.connection.cursor()
+    db_local.path = path # The store of the connection
+
+    set_pragmas(dbCursor=db_local.cursor) # Set the settings of the connection
+
+def close_thread_database():
+    '''
+    Closes the connection of this thread to the database
+    '''
+
+    try:
+        db_local.connection.close()
+    
+    except:
+        pass # The connection is already closed
+    
+    db_local.connection, db_local.cursor = None, None
+
+def is_db_writer():
+    '''
+    Checks if this thread is the database writer
+
+    Returns:
+        result (bool): If this thread is the database writer or not
+    '''
+
+    return getattr(db_local, 'writer', False)
+
+def commit_jobs(database, waiting):
+    '''
+    Commits the changes of the waiting jobs and gives them their results
+
+    Parameters:
+        database (sqlite3.Connection): The connection of the database writer
+        waiting (list): The (future, result) of each job that waits for the commit
+    '''
+
+    try:
+        if database.in_transaction:
+            database.commit() # A single commit for all of the jobs of the group
+
+        for future, result in waiting:
+            future.set_result(result)
+    
+    except Exception as error:
+        try:
+            database.rollback() # None of the changes of the group are saved
+        
+        except:
+            pass # The transaction is already rolled back
+
+        for future, _ in waiting:
+            future.set_exception(error)
+    
+    waiting.clear()
+
+def run_db_writer(jobs):
+    '''
+    Runs the jobs on the database writer's connection in order, each job is done completely or not at all and the jobs are committed in groups
+    (when there is no other job in the queue, or DATABASE_COMMIT_ROWS rows are changed or DATABASE_COMMIT_INTERVAL seconds are passed)
+
+    Parameters:
+        jobs (Queue): The (function, kwargs, future) of each job (None to stop the writer)
+    '''
+
+    try:
+        open_thread_database() # The only connection that writes to the database
+        database = db_local.connection
+    
+    except Exception as error:
+        database = None
+        failure = error # All of the jobs fail
+    
+    db_local.writer = True
+
+    waiting = [] # The jobs that wait for the commit
+    started = time() # When the group started
+    changes = 0 # Number of the changed rows before the group started
+
+    while True:
+        try:
+            job = jobs.get(block=len(waiting) == 0) # Only wait for the next job if there is nothing to commit
+        
+        except Empty:
+            commit_jobs(database=database, waiting=waiting) # No other job to add to the group
+            continue
+
+        if job is None: # The store is closed
+            commit_jobs(database=database, waiting=waiting)
+            break
+
+        function, kwargs, future = job
+
+        if not future.set_running_or_notify_cancel():
+            continue # The job is cancelled
+        
+        if database is None:
+            future.set_exception(failure) # Couldn't open the database
+            continue
+
+        if len(waiting) == 0: # The first job of a new group
+            started = time()
+            changes = database.total_changes
+        
+        try:
+            if not database.in_transaction:
+                database.execute("BEGIN")
+
+            database.execute("SAVEPOINT job") # Only this job is rolled back if it fails
+
+            try:
+                result = function(**kwargs)
+            
+            except:
+                database.execute("ROLLBACK TO job") # Rollback the changes of this job
+                database.execute("RELEASE job")
+                raise
+
+            database.execute("RELEASE job")
+            waiting.append((future, result))
+        
+        except Exception as error:
+            future.set_exception(error)
+            continue
+
+        if (database.total_changes - changes >= DATABASE_COMMIT_ROWS) or (time() - started >= DATABASE_COMMIT_INTERVAL):
+            commit_jobs(database=database, waiting=waiting) # The group is big enough
+    
+    if database is not None:
+        close_thread_database()
+
+def submit_db(function, **kwargs):
+    '''
+    Gives the job to the database writer (it's started on the first job)
+
+    Parameters:
+        function (function): The function to run (it's queries use the connection of the writer)
+        kwargs (dict): The arguments for the function
+    
+    Returns:
+        future (concurrent.futures.Future): The future for the result of the function (it's set after the changes are committed)
+    '''
+
+    global db_writer, db_jobs
+
+    if connection is None:
+        open_store() # Open the default store on the first query
+    
+    future = Future()
+
+    with db_lock:
+        if db_writer is None: # Start the writer on the first job
+            db_jobs = Queue()
+            db_writer = threading.Thread(target=run_db_writer, args=(db_jobs,), name="db-writer", daemon=True)
+            db_writer.start()
+        
+        db_jobs.put((function, kwargs, future))
+
+    return future
+
+def write_db(function, **kwargs):
+    '''
+    Runs the function on the database writer and waits until it's changes are committed
+
+    Parameters:
+        function (function): The function to run (it's queries use the connection of the writer)
+        kwargs (dict): The arguments for the function
+    
+    Returns:
+        result (any): The result of the function
+    '''
+
+    if is_db_writer():
+        return function(**kwargs) # It's already a part of a job of the writer
+    
+    return submit_db(function, **kwargs).result()
+
+@contextmanager
+def transaction():
+    '''
+    Groups the changes of the block into a single job of the database writer, so they're saved all together or not at all
+    (they're sent when the block ends, so the queries of the block return True and it's reads don't see it's changes until then,
+    and if one of them fails none of them is saved and the error is raised; it's not for the event loop, it's tasks share the thread)
+    '''
+
+    if is_db_writer() or (getattr(db_local, 'changes', None) is not None):
+        yield # It's already a part of a job of the writer or of an outer block
+        return
+    
+    db_local.changes = [] # The changes of the block
+
+    try:
+        yield
+        changes = db_local.changes
+    
+    finally:
+        db_local.changes = None # The changes of a block that raised an error are dropped
+    
+    if len(changes) > 0:
+        write_db(save_changes, changes=changes)
+
+def save_changes(changes):
+    '''
+    Saves the changes of a transaction block on the database writer (they're in the same job, so they're committed together)
+
+    Parameters:
+        changes (list): The (function, kwargs) of each change
+    
+    Returns:
+        result (bool): True (an error is raised if one of them fails, so the job is rolled back)
+    '''
+
+    for function, kwargs in changes:
+        if function(**kwargs) == False:
+            raise ValueError("Couldn't save the changes of the transaction")
+    
+    return True
+
 def execute_query(queries, commit, fetch):
     '''
-    Executes the query on the database
+    Executes the query on the database (the queries that commit are sent to the database writer)
 
     Parameters:
-        queries (list): The queries to execute
+        queries (list): The queries to execute (each one is the statement or the (statement, parameters) tuple)
         commit (bool): Should the changes be committed
         fetch (bool): Should all of the results be fetched (True) or just one (False) or none (None)
     
@@ -99,34 +608,124 @@ def execute_query(queries, commit, fetch):
         result (list/tuple/None): The result of the query
     '''
 
+    if commit and (getattr(db_local, 'changes', None) is not None):
+        db_local.changes.append((execute_query, {'queries': queries, 'commit': commit, 'fetch': fetch}))
+        return True # It's saved with the other changes of the transaction block
+
+    if commit and (not is_db_writer()):
+        try:
+            return write_db(execute_query, queries=queries, commit=commit, fetch=fetch) # Only the writer changes the database
+        
+        except:
+            return False # Couldn't execute the query
+
+    database, cursor = get_database()
+
+    if database is None:
+        return False # Couldn't open the store
+    
+    in_job = is_db_writer() # The writer commits the changes with the other jobs
+    
     try:
+        if in_job:
+            database.execute("SAVEPOINT query") # Only this query is rolled back if it fails
+        
         if len(queries) == 1 and (fetch is not None):
-            result = dbCursor.execute(queries[0]) # Execute the query
+            result = cursor.execute(*get_statement(query=queries[0])) # Execute the query
 
             if fetch:
                 result = result.fetchall() # Fetch all of the results
             
             else:
                 result = result.fetchone() # Fetch one of the results
-            
-            if commit:
-                connection.commit() # Commit the changes
-            
-            return result # Return the result
         
         else:
             for query in queries:
-                dbCursor.execute(query) # Execute the query
+                cursor.execute(*get_statement(query=query)) # Execute the query
             
-            if commit:
-                connection.commit() # Commit the changes
-            
-            return True # Query executed successfully
+            result = True # Query executed successfully
+        
+        if in_job:
+            database.execute("RELEASE query")
+        
+        return result # Return the result
     
     except:
-        connection.rollback() # Rollback the changes
+        if in_job:
+            try:
+                database.execute("ROLLBACK TO query") # Rollback the changes of this query
+                database.execute("RELEASE query")
+            
+            except:
+                pass # The savepoint isn't there
+        
         return False # Couldn't execute the query
 
+def get_statement(query):
+    '''
+    Gets the statement and it's parameters of the query (the values are bound by sqlite, so the parsed statement is reused)
+
+    Parameters:
+        query (str/tuple): The statement or the (statement, parameters) tuple
+    
+    Returns:
+        statement (str): The statement
+        parameters (tuple/dict): The values of the placeholders of the statement
+    '''
+
+    if isinstance(query, str):
+        return query, ()
+    
+    return query
+
+def execute_many(query, rows, commit):
+    '''
+    Executes the statement once for each row of parameters on the database writer (for adding many rows at once)
+
+    Parameters:
+        query (str): The statement
+        rows (list): The parameters of each execution
+        commit (bool): Should the changes be committed
+    
+    Returns:
+        result (bool): If the rows are executed successfully or not
+    '''
+
+    if getattr(db_local, 'changes', None) is not None:
+        db_local.changes.append((execute_many, {'query': query, 'rows': rows, 'commit': commit}))
+        return True # They're saved with the other changes of the transaction block
+
+    if not is_db_writer():
+        try:
+            return write_db(execute_many, query=query, rows=rows, commit=commit) # Only the writer changes the database
+        
+        except:
+            return False # Couldn't execute the rows
+
+    database, cursor = get_database()
+
+    if database is None:
+        return False # Couldn't open the store
+    
+    try:
+        database.execute("SAVEPOINT query") # Only these rows are rolled back if they fail
+        
+        cursor.executemany(query, rows) # Execute the statement for all of the rows
+
+        database.execute("RELEASE query")
+        
+        return True # Rows executed successfully
+    
+    except:
+        try:
+            database.execute("ROLLBACK TO query") # Rollback the changes of these rows
+            database.execute("RELEASE query")
+        
+        except:
+            pass # The savepoint isn't there
+        
+        return False # Couldn't execute the rows
+
 def circle_crop(image):
     '''
     Crops the image to a circle
@@ -135,6 +734,8 @@ def circle_crop(image):
         image (PIL.Image): The image to crop
     '''
 
+    from PIL import Image, ImageDraw, ImageFilter
+
     blur_radius = 2 # Radius of blurring the edges of the circle thumbnail
     offset = blur_radius * 2
 
@@ -147,12 +748,13 @@ def circle_crop(image):
 
     image.putalpha(mask) # Applying the mask to the image
     
-def make_thumbnail(address, size, is_video=False, circle=False):
+def render_thumbnail(file, thumbnail, size, is_video=False, circle=False):
     '''
-    Makes a thumbnail for the given file and saves it
+    Makes a thumbnail for the file and saves it (runs on the thumbnail processes, so it doesn't use the database)
 
     Parameters:
-        address (str): The address of the file
+        file (str): The full address of the file
+        thumbnail (str): The full address to save the thumbnail
         size (int): The size of the thumbnail
         is_video (bool): Is the media a video
         circle (bool): Should the thumbnail be a circle
@@ -162,14 +764,11 @@ def make_thumbnail(address, size, is_video=False, circle=False):
     '''
 
     try:
-        file = glob.glob(os.path.join(path, address) + ".*")
-        
-        if len(file) != 1:
-            return False # Couldn't find the image
-        
-        file = file[0]
+        from PIL import Image
 
         if is_video: # If the media is video
+            from cv2 import VideoCapture, cvtColor, COLOR_BGR2RGB
+
             vidcap = VideoCapture(file) # Get the video
             success, image = vidcap.read() # Read the first frame
 
@@ -195,33 +794,209 @@ def make_thumbnail(address, size, is_video=False, circle=False):
         if circle: # If the thumbnail should be a circle
             circle_crop(image=resized_image) # Cropping the thumbnail to a circle
 
-        file_name = os.path.basename(file) # Get the filename
-        file = file.replace(file_name, "") # Get the new path for the thumbnail
-        file_name = file_name.replace("_temp", "") # Remove the "_temp" (if any) from the filename
-        file += file_name # Add the filename to the path
-
-        resized_image.save(file[:file.rindex('.')] + "_thumbnail.png") # Saving thumbnail at the same path
+        resized_image.save(thumbnail) # Saving thumbnail at the same path
         
         return True # Thumbnail made successfully
     
     except:
         return False # Couldn't make the thumbnail
 
-def guess_type(file):
+def configure_thumbnails(workers=None, queue_size=None):
     '''
-    Guesses the type of the file
+    Changes the number of the thumbnail processes and the number of the thumbnails that can wait for them
 
     Parameters:
-        file (str): The file to guess the type of
-    
-    Returns:
-        mimestart (str): The type of the file
+        workers (int): The number of the processes that make the thumbnails at the same time
+        queue_size (int): The maximum number of the thumbnails waiting for the processes
     '''
 
-    mimestart = guess_type(path + file)[0] # Guessing the type of the file
+    global thumbnail_executor, thumbnail_threads, thumbnail_slots, THUMBNAIL_WORKERS, THUMBNAIL_QUEUE_SIZE
+    with thumbnail_lock:
+        if workers is not None:
+            THUMBNAIL_WORKERS = max(1, workers)
 
-    if mimestart != None:
-        mimestart = mimestart.split('/')[0]
+        if queue_size is not None:
+            THUMBNAIL_QUEUE_SIZE = max(1, queue_size)
+
+        executors = (thumbnail_executor, thumbnail_threads)
+        thumbnail_executor = thumbnail_threads = None # They will be made again with the new size
+
+        thumbnail_slots = None # It will be made again with the new size
+
+    for executor in executors:
+        if executor is not None:
+            executor.shutdown(wait=True) # Let the running thumbnails finish (the new thumbnails don't wait for thumbnail_lock meanwhile)
+
+def stop_thumbnail_processes(executor):
+    '''
+    Stops using the thumbnail processes pool after it's broken (like a crashed process), so the thumbnails are made on the threads
+
+    Parameters:
+        executor (ProcessPoolExecutor): The broken processes pool
+    '''
+
+    global thumbnail_executor, thumbnail_processes
+    with thumbnail_lock:
+        if thumbnail_executor is executor:
+            thumbnail_executor = None
+            thumbnail_processes = False # Don't try to start the processes again
+
+    if executor is not None:
+        print("The thumbnail processes stopped, making the thumbnails on threads!")
+
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def get_thumbnail_threads():
+    '''
+    Gets the threads pool for the thumbnails (it's only for the thumbnails, so the threads that wait for them are never the ones that make them)
+
+    Returns:
+        executor (ThreadPoolExecutor): The threads pool
+    '''
+
+    global thumbnail_threads
+    with thumbnail_lock:
+        if thumbnail_threads is None: # Make the threads pool on the first use
+            thumbnail_threads = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnail")
+
+        return thumbnail_threads
+
+def start_thumbnail(result, arguments):
+    '''
+    Starts making the thumbnail on the processes (or on the thumbnail threads if the processes pool is broken)
+
+    Parameters:
+        result (concurrent.futures.Future): The future that gets the result of the thumbnail
+        arguments (tuple): The arguments of render_thumbnail
+    '''
+
+    from concurrent.futures.process import ProcessPoolExecutor, BrokenProcessPool
+
+    global thumbnail_executor
+    with thumbnail_lock:
+        if (thumbnail_executor is None) and thumbnail_processes: # Make the processes pool on the first thumbnail
+            thumbnail_executor = ProcessPoolExecutor(max_workers=THUMBNAIL_WORKERS) # The default start method (fork on Linux, so the scripts aren't run again)
+
+        executor = thumbnail_executor
+
+    def on_thread():
+        get_thumbnail_threads().submit(render_thumbnail, *arguments).add_done_callback(lambda done: result.set_result(done.result()))
+
+    def on_process_done(done):
+        try:
+            result.set_result(done.result())
+
+        except BrokenProcessPool: # A process has crashed
+            stop_thumbnail_processes(executor=executor)
+            on_thread()
+        
+        except:
+            result.set_result(False) # Couldn't make the thumbnail
+
+    if executor is None:
+        return on_thread()
+
+    try:
+        executor.submit(render_thumbnail, *arguments).add_done_callback(on_process_done)
+
+    except BrokenProcessPool:
+        stop_thumbnail_processes(executor=executor)
+        on_thread()
+
+    except RuntimeError:
+        with thumbnail_lock:
+            if thumbnail_executor is executor:
+                raise # Couldn't start the processes (like a script without the __main__ guard on spawn)
+
+        start_thumbnail(result=result, arguments=arguments) # The pool was changed by configure_thumbnails meanwhile
+
+def submit_thumbnail(address, file, size, is_video=False, circle=False):
+    '''
+    Gives the thumbnail to the thumbnail processes (waits while THUMBNAIL_QUEUE_SIZE thumbnails are already waiting for them)
+
+    Parameters:
+        address (str): The address of the file (relative to the storage folder and without the extension)
+        file (str): The full address of the file
+        size (int): The size of the thumbnail
+        is_video (bool): Is the media a video
+        circle (bool): Should the thumbnail be a circle
+    
+    Returns:
+        future (concurrent.futures.Future): The future for the result of the thumbnail (it isn't added to the media index)
+    '''
+
+    global thumbnail_slots
+    with thumbnail_lock:
+        if thumbnail_slots is None:
+            thumbnail_slots = threading.BoundedSemaphore(THUMBNAIL_QUEUE_SIZE)
+
+        slots = thumbnail_slots
+
+    slots.acquire() # Wait for a free place
+
+    result = Future() # The result of the thumbnail from the processes or the threads
+    result.add_done_callback(lambda _: slots.release()) # Free the place when the thumbnail is done
+
+    try:
+        start_thumbnail(result=result, arguments=(file, os.path.join(path, get_thumbnail_address(address=address)), size, is_video, circle))
+
+    except:
+        result.set_result(False) # Free the place
+
+        raise # Let the error of starting the processes be seen
+
+    return result
+
+def make_thumbnail(address, size, is_video=False, circle=False):
+    '''
+    Makes a thumbnail for the given file on the thumbnail processes, waits for it and adds it to the media index
+
+    Parameters:
+        address (str): The address of the file
+        size (int): The size of the thumbnail
+        is_video (bool): Is the media a video
+        circle (bool): Should the thumbnail be a circle
+    
+    Returns:
+        result (bool): If the thumbnail is made successfully or not
+    '''
+
+    try:
+        file = find_media(address=address) # Look up the file in the media index
+    
+    except:
+        return False # Couldn't find the image
+        
+    if file is None:
+        return False # Couldn't find the image
+
+    # Not caught, so the error of starting the processes (like a script without the __main__ guard on spawn) is seen
+    if not submit_thumbnail(address=address, file=file, size=size, is_video=is_video, circle=circle).result():
+        return False # Couldn't make the thumbnail
+
+    try:
+        index_thumbnail(address=address) # Add the thumbnail to the media index
+        
+        return True # Thumbnail made successfully
+    
+    except:
+        return False # Couldn't make the thumbnail
+
+def guess_type(file):
+    '''
+    Guesses the type of the file
+
+    Parameters:
+        file (str): The file to guess the type of
+    
+    Returns:
+        mimestart (str): The type of the file
+    '''
+
+    mimestart = guess_type(path + file)[0] # Guessing the type of the file
+
+    if mimestart != None:
+        mimestart = mimestart.split('/')[0]
 
         if mimestart in ['image', 'video']:
             return mimestart
@@ -255,1890 +1030,6056 @@ def find_folder_name(pk):
         folder_name (str): The folder name for the profile
     '''
 
+    with folder_lock:
+        folder_name = folder_names.get(pk)
+
+    if (folder_name is not None) and os.path.isdir(os.path.join(path, folder_name)):
+        return folder_name # The remembered folder is still there
+    
     try:
         folder_name = glob.glob(os.path.join(path, f"*@{pk}")) # Get the folder name for the profile
 
         if len(folder_name) == 0: # The folder doesn't exist
+            remember_folder_name(pk=pk, folder_name=None)
             return None
         
         folder_name = os.path.basename(folder_name[0]) # Get the folder name
 
+        remember_folder_name(pk=pk, folder_name=folder_name)
+
         return folder_name # Return the folder name
     
     except:
         return None # Couldn't find the folder name
 
-def send_request(url, method='POST', payload=None, headers=None, retries=3, timeout=60):
+def remember_folder_name(pk, folder_name):
     '''
-    Sends a request to the url and returns the response
+    Remembers the folder name of the profile, so it's found without searching the storage folder
 
     Parameters:
-        url (str): The url to send the request
-        method (str): The method for the request
-        payload (str): The payload for the request
-        headers (dict): The headers for the request
-        retries (int): The number of retries for the request
-        timeout (int): The timeout for the request
-    
-    Returns:
-        response (requests.Response): The response of the request
+        pk (int): The pk of the profile
+        folder_name (str): The folder name for the profile (None to forget it)
     '''
 
-    try:
-        response = requests.request(method=method, url=url, data=payload, headers=headers if headers is not None else HEADERS, timeout=timeout) # Send the request
-        
-        if response.status_code == 200:
-            return response # Return the response
-        
-        elif (response.status_code) == 429 and (retries > 0): # Too many requests
-            sleep(30) # Sleep for 30 seconds
-
-            return send_request(url=url, method=method, payload=payload, headers=headers, retries=retries-1) # Try again
-        
-        elif (response.status_code) == 500: # Internal server error
-            if ('stealthgram' in url) and ('EXPIRED' in response.text): # If the tokens are expired
-                if not get_stealthgram_tokens(): # Get new tokens
-                    return None # Couldn't get new tokens
-                
-                # Set the headers for the request
-                headers = {
-                    'Cookie': f"access-token={stealthgram_tokens['access-token']}; refresh-token={stealthgram_tokens['refresh-token']};",
-                }
-                headers.update(HEADERS) # Add the default headers to the request
-
-                return send_request(url=url, method=method, payload=payload, headers=headers, retries=retries-1) # Try again with the new tokens
+    with folder_lock:
+        if folder_name is None:
+            folder_names.pop(pk, None)
         
         else:
-            return None # Couldn't get the data
-    
-    except:
-        return None # Couldn't get the data
+            folder_names[pk] = folder_name
 
-def download_link(link, address):
+def get_media_owner(address):
     '''
-    Downloads the link and saves it to the address
+    Gets the kind of the media from it's address
 
     Parameters:
-        link (str): The link to download
-        address (str): The address to save the file
-    
+        address (str): The address of the file (relative to the storage folder and without the extension)
+
     Returns:
-        result (bool): If the link is downloaded successfully or not
+        owner (str): "post", "story", "cover" or "profile" (None if it isn't a media of a profile)
     '''
 
-    # TODO: Needs change for GUI implementation and multithreading
-    try:
-        media = requests.get(link, headers=HEADERS, timeout=60, allow_redirects=True) # Get the media from the link
+    parts = address.split(os.sep)
 
-        extension = guess_extension(media.headers['content-type'].partition(';')[0].strip()) # Find the extension from the headers
-        if extension is None: # If couldn't find from headers then find from the link
-            extension = link[:link.index('?')]
-            extension = extension[extension.rindex('.'):]
-        
-        if extension in [None, '', '.', '.txt', '.html']: # If couldn't find the extension or it's a text or html file (Probably an error)
-            return False # Couldn't download the link
-        
-        open(os.path.join(path, address) + extension, 'wb').write(media.content) # saving the file
-        return True
-    
-    except:
-        return False # Couldn't download the link
+    if len(parts) < 3:
+        return None # Not in a profile's folder
 
-def try_downloading(link, address, retries=3):
+    if parts[1] in ["Posts", "Tagged"]:
+        return "post"
+
+    if parts[1] == "Profiles":
+        return "profile"
+
+    if parts[1] == "Stories":
+        return "story"
+
+    if parts[1] == "Highlights":
+        if (parts[-1] == "Cover") or (parts[-2] == "History"): # The current cover or the past ones
+            return "cover"
+
+        return "story"
+
+    return None # Not a media of a profile
+
+def get_thumbnail_address(address):
     '''
-    Tries to download the link for retries times
+    Gets the address of the thumbnail of the media
 
     Parameters:
-        link (str): The link to download
-        address (str): The address to save the file
-        retries (int): The number of retries for the download
-    
+        address (str): The address of the file (relative to the storage folder and without the extension)
+
     Returns:
-        result (bool): If the link is downloaded successfully or not
+        thumbnail (str): The address of the thumbnail (relative to the storage folder)
     '''
 
-    isDownloaded = download_link(link=link, address=address) # Try downloading the link
+    folder, name = os.path.split(address)
 
-    if not isDownloaded: # If couldn't download the link, Try retries times
-        for _ in range(retries):
-            isDownloaded = download_link(link=link, address=address) # Try downloading the link
+    return os.path.join(folder, name.replace("_temp", "")) + "_thumbnail.png" # The thumbnail is saved next to the file
 
-            if isDownloaded: # If downloaded the link
-                return True
+def index_media(files):
+    '''
+    Adds the saved files to the media index (or updates them if they are already there)
 
-        return False # Couldn't download the link
-        
-    return True # Link downloaded successfully
+    Parameters:
+        files (list): The (address, extension) of each saved file
 
-def list_profiles():
+    Returns:
+        result (bool): If the files are added successfully or not
     '''
-    Lists the profiles in the database
+
+    rows = get_media_rows(files=files) # The files are checked on this thread, only the rows are sent to the database writer
+
+    if len(rows) == 0:
+        return True # Nothing to add
+
+    return execute_many(query="""INSERT OR REPLACE INTO Media VALUES(?, ?, ?, ?, ?, ?)""", rows=rows, commit=True)
+
+def get_media_rows(files):
     '''
+    Gets the rows of the media index for the saved files
 
-    # TODO: Needs change for GUI implementation
-    try:
-        if os.name == 'nt': # Clearing the screen
-            os.system('cls')
+    Parameters:
+        files (list): The (address, extension) of each saved file
 
-        else:
-            os.system('clear')
-        
-        query = ["""SELECT username, full_name, biography, media_count,
-                 follower_count, following_count FROM Profile"""]
-        
-        profiles = execute_query(queries=query, commit=False, fetch=True) # Get the list of profiles
+    Returns:
+        rows (list): The address, owner, extension, size, mime and thumbnail of each file that is there
+    '''
 
-        if profiles == False:
-            print("Couldn't list the profiles!")
-            return # There was an error in getting the profiles
+    rows = []
+    for address, extension in files:
+        try:
+            size = os.path.getsize(os.path.join(path, address) + extension)
 
-        for profile in profiles:
-            biography = profile[2]
-            if biography is None:
-                biography = ''
+        except:
+            continue # The file isn't there
 
-            print(profile[0] + ":\n" + profile[1] + "\n" + biography + "\nPosts: " + str(profile[3])
-                + "\nFollowers: " + str(profile[4]) + "\nFollowings: " + str(profile[5])) # Show the details of each profile
-            print("---------------------------------")
-    
-    except:
-        print("Couldn't list the profiles!") # There was an error somewhere
+        thumbnail = get_thumbnail_address(address=address)
 
-def move_profile_history(pk, profile_id):
+        if not os.path.exists(os.path.join(path, thumbnail)):
+            thumbnail = None # It's added when the thumbnail is made
+
+        rows.append((address, get_media_owner(address=address), extension, size, mimetypes.guess_type(address + extension)[0], thumbnail))
+
+    return rows
+
+def find_media(address):
     '''
-    Moves the past profile files (if any) to History folder
+    Finds the file of the address through the media index (the folder is only searched if the file isn't in the index)
 
     Parameters:
-        pk (int): The pk of the profile
-        profile_id (int): The id of the profile
-    
+        address (str): The address of the file (relative to the storage folder and without the extension)
+
     Returns:
-        result (bool): If the profile is moved to history successfully or not
+        file (str): The full address of the file (None if it doesn't exist)
     '''
 
     try:
-        folder_name = find_folder_name(pk=pk) # Get the folder name for the profile
+        query = [("""SELECT extension FROM Media WHERE address = ?""", (address,))]
 
-        if folder_name is None:
-            return True # No profile folder to move
-        
-        files = glob.glob(os.path.join(path, f"{folder_name}", "Profiles", "Profile*.*")) # Get the profile files
+        media = execute_query(queries=query, commit=False, fetch=False)
 
-        if len(files) == 0:
-            return True # No profile files to move
-        
-        if not os.path.exists(os.path.join(path, f"{folder_name}", "Profiles" "History")): # Make the History folder
-            os.mkdir(os.path.join(path, f"{folder_name}", "Profiles", "History"))
+        if media:
+            file = os.path.join(path, address) + media[0]
 
-        for file in files:
-            newName = file.rsplit("Profile", 1)
-            newName = os.path.join(newName[0], "History", f"{profile_id}") + newName[1] # Change the name from Profile(_thumbnail) to {profile_id}
+            if os.path.isfile(file):
+                return file # The indexed file is still there
 
-            shutil.move(file, newName) # Move the file to the History folder
+        files = glob.glob(glob.escape(os.path.join(path, address)) + ".*") # Not indexed yet (like the files of the older versions)
+
+        if len(files) != 1:
+            return None # Couldn't find the file
+
+        index_media(files=[(address, files[0][len(os.path.join(path, address)):])]) # So the next lookup doesn't search the folder
+
+        return files[0]
 
-        return True # Profile moved to history successfully
-    
     except:
-        return False # Couldn't move the profile to history
+        return None # Couldn't find the file
 
-async def response_handler(evt: zd.cdp.network.ResponseReceived):
+def index_thumbnail(address):
     '''
-    Handles the response event for the profile data
+    Adds the thumbnail of the media to the media index
 
     Parameters:
-        evt (zd.cdp.network.ResponseReceived): The event object
+        address (str): The address of the file (relative to the storage folder and without the extension)
+
+    Returns:
+        result (bool): If the thumbnail is added successfully or not
     '''
 
-    # Check if the event resource type is XHR
-    if evt.type_ is zd.cdp.network.ResourceType.XHR:
-        # Check if the event url contains 'userInfo' (this is the request that contains the user profile data)
-        if 'userInfo' in evt.response.url:
-            # get the response body and store it in the global variable
-            global profile_data
-            profile_data = zd.cdp.network.get_response_body(evt.request_id)
+    query = [("""UPDATE Media SET thumbnail = ? WHERE address = ?""", (get_thumbnail_address(address=address), address))]
 
-async def profile_data_api(username):
+    return execute_query(queries=query, commit=True, fetch=None) == True
+
+def move_media(address, new_address):
     '''
-    Calls the API to get the profile data
+    Moves the file and it's thumbnail to the new address and updates the media index
 
     Parameters:
-        username (str): The username of the user
-    
+        address (str): The address of the file (relative to the storage folder and without the extension)
+        new_address (str): The new address of the file (relative to the storage folder and without the extension)
+
     Returns:
-        data (str): The profile data of the user
+        result (bool): If the file is moved successfully or not
     '''
 
     try:
-        # Create a new browser instance in headless mode
-        browser = await zd.start(browser_args=["--headless=new", '--disable-gpu'])
+        file = find_media(address=address)
+        thumbnail = os.path.join(path, get_thumbnail_address(address=address))
 
-        # Create a new page instance
-        page = await browser.get('https://anonyig.com/en/')
+        if file is not None:
+            extension = file[len(os.path.join(path, address)):]
+            shutil.move(file, os.path.join(path, new_address) + extension) # Move the file
 
-        # Add a handler for the ResponseReceived event
-        page.add_handler(zd.cdp.network.ResponseReceived, response_handler)
+        if os.path.exists(thumbnail):
+            shutil.move(thumbnail, os.path.join(path, get_thumbnail_address(address=new_address))) # Move the thumbnail
 
-        # Wait for the search bar to load
-        await page.wait_for('input[type=text]')
+        execute_query(queries=[("""DELETE FROM Media WHERE address = ?""", (address,))], commit=True, fetch=None)
 
-        sleep(3) # Wait for 3 seconds
+        if file is not None:
+            index_media(files=[(new_address, extension)])
 
-        # Find the search bar
-        username_input = await page.select('input[type=text]')
+        return True # File moved successfully
 
-        # Enter the username in the search bar
-        await username_input.send_keys(username)
+    except:
+        return False # Couldn't move the file
 
-        # Find the search button
-        search_button = await page.select('button[class=search-form__button]')
+def copy_media(address, new_address):
+    '''
+    Copies the file and it's thumbnail to the new address and adds the copy to the media index
 
-        # Click the search button
-        await search_button.click()
+    Parameters:
+        address (str): The address of the file (relative to the storage folder and without the extension)
+        new_address (str): The address of the copy (relative to the storage folder and without the extension)
 
-        # Wait for the user profile data to load
-        await page.wait_for('span[class=user-info__username-text]', timeout=60)
+    Returns:
+        result (bool): If the file and it's thumbnail are copied successfully or not
+    '''
 
-        # Check if the request has been captured
-        global profile_data
-        if profile_data:
-            # Get the profile data
-            data = await page.send(cdp_obj=profile_data)
-        
-        else: # The request has not been captured
-            data = None
-        
-        # Close the page
-        await page.close()
+    try:
+        file = find_media(address=address)
+        thumbnail = os.path.join(path, get_thumbnail_address(address=address))
 
-        # Stop the browser
-        await browser.stop()
+        if (file is None) or (not os.path.exists(thumbnail)):
+            return False # The file or it's thumbnail doesn't exist
 
-        return data # Return the result
-    
-    except:
-        # Close the page
-        await page.close()
+        extension = file[len(os.path.join(path, address)):]
 
-        # Stop the browser
-        await browser.stop()
+        shutil.copy(file, os.path.join(path, new_address) + extension) # Copy the file
+        shutil.copy(thumbnail, os.path.join(path, get_thumbnail_address(address=new_address))) # Copy the thumbnail
 
-        return None # There was an error
+        return index_media(files=[(new_address, extension)])
 
-def get_profile_data(username):
+    except:
+        return False # Couldn't copy the file
+
+def remove_media(address):
     '''
-    Gets the profile's data
+    Removes the file and it's thumbnail from the disk and the media index
 
     Parameters:
-        username (str): The username of the profile
-    
+        address (str): The address of the file (relative to the storage folder and without the extension)
+
     Returns:
-        profile (dict): The profile's data
+        result (bool): If the file is removed successfully or not
     '''
 
     try:
-        # Empty the global variable
-        global profile_data
-        profile_data = None
+        file = find_media(address=address)
+        thumbnail = os.path.join(path, get_thumbnail_address(address=address))
 
-        response = zd.loop().run_until_complete(profile_data_api(username=username)) # Get the profile's data
+        if file is not None:
+            os.remove(file) # Remove the file
 
-        if response is None:
-            return None # Couldn't get the data
-        
-        data = json.loads(response[0]) # Parse the data to json
-        data = data['result'][0]['user']
+        if os.path.exists(thumbnail):
+            os.remove(thumbnail) # Remove the thumbnail
 
-        profile = {
-            'pk': int(data["pk"]),
-            'username': data["username"],
-            'full_name': data["full_name"],
-            'page_name': data["page_name"],
-            'biography': data["biography"],
-        }
+        return execute_query(queries=[("""DELETE FROM Media WHERE address = ?""", (address,))], commit=True, fetch=None) == True
 
-        is_private = data["is_private"]
-        if is_private:
-            is_private = 1
-        else:
-            is_private = 0
-        
-        profile['is_private'] = is_private
+    except:
+        return False # Couldn't remove the file
 
-        if "public_email" in data.keys():
-            public_email = data["public_email"]
+def rename_media_folder(folder, new_folder):
+    '''
+    Changes the addresses of the indexed files of the folder after it's renamed
 
-            if public_email == '':
-                public_email = None
+    Parameters:
+        folder (str): The old address of the folder (relative to the storage folder)
+        new_folder (str): The new address of the folder (relative to the storage folder)
 
-        else:
-            public_email = None
+    Returns:
+        result (bool): If the addresses are changed successfully or not
+    '''
 
-        profile['public_email'] = public_email
-        profile['media_count'] = data["media_count"]
-        profile['follower_count'] = data["follower_count"]
-        profile['following_count'] = data["following_count"]
+    prefix = folder + os.sep
+    new_prefix = new_folder + os.sep
 
-        if "profile_pic_id" in data.keys():
-            profile_id = data["profile_pic_id"]
-            profile_id = int(profile_id[:profile_id.index('_')])
-        
-        else:
-            profile_id = profile['pk']
+    # The files of the folder are a range of the primary key (the separator is followed by the next character)
+    query = [("""UPDATE OR REPLACE Media SET address = ? || substr(address, ?), thumbnail = ? || substr(thumbnail, ?)
+              WHERE address >= ? AND address < ?""",
+              (new_prefix, len(prefix) + 1, new_prefix, len(prefix) + 1, prefix, folder + chr(ord(os.sep) + 1)))]
 
-        profile['profile_id'] = profile_id
-        profile['original_profile_pic_link'] = data["hd_profile_pic_url_info"]["url"]
-        profile['original_profile_pic'] = os.path.join(f"{username}@{profile['pk']}", "Profiles", "Profile")
+    return execute_query(queries=query, commit=True, fetch=None) == True
 
-        return profile # Return profile's data
+def repair_media_index():
+    '''
+    Rebuilds the media index from the files in the storage folder (for the files that are added, moved or removed by hand)
+
+    Returns:
+        counts (dict): The number of the 'indexed' files, the 'added' ones and the 'removed' ones that were missing (None if it couldn't)
+    '''
+
+    try:
+        files = [] # The (address, extension) of each file
+        for folder, folders, names in os.walk(path):
+            folders[:] = [name for name in folders if not name.startswith('.')] # Skip the hidden folders (like the saved pages)
+
+            for name in names:
+                if name.startswith('.') or name.endswith("_thumbnail.png"):
+                    continue # The hidden files (like the incomplete downloads) and the thumbnails aren't indexed by themselves
+
+                address, extension = os.path.splitext(os.path.relpath(os.path.join(folder, name), path))
+
+                if os.sep not in address:
+                    continue # The files of the storage folder itself (like the database)
+
+                files.append((address, extension))
+
+        # The files are checked here and the index is replaced at once on the database writer
+        return write_db(replace_media_index, rows=get_media_rows(files=files))
 
     except:
-        return None # Couldn't get the data
+        return None # Couldn't repair the index
 
-def get_pk_username(pk):
+def replace_media_index(rows):
     '''
-    Gets the username of the given pk
+    Replaces the rows of the media index (runs on the database writer, so none of the changes are saved if it fails)
 
     Parameters:
-        pk (int): The pk of the profile
-    
+        rows (list): The rows of the media index for the files in the storage folder (from get_media_rows)
+
     Returns:
-        username (str): The username of the profile
+        counts (dict): The number of the 'indexed' files, the 'added' ones and the 'removed' ones that were missing
     '''
 
-    try:
-        url = f'https://i.instagram.com/api/v1/users/{pk}/info/' # The url to get the profile's data
+    indexed = execute_query(queries=["""SELECT address FROM Media"""], commit=False, fetch=True)
 
-        headers = {
-            'User-Agent': 'Instagram 85.0.0.21.100 Android (23/6.0.1; 538dpi; 1440x2560; LGE; LG-E425f; vee3e; en_US)',
-        }
+    if indexed == False:
+        raise ValueError("Couldn't read the media index")
 
-        response = send_request(url=url, method='GET', headers=headers).json() # Get the profile's data
+    indexed = set(row[0] for row in indexed)
+    addresses = set(row[0] for row in rows)
 
-        if 'user' in response.keys(): # If the data is found
-            return response['user']['username']
-        
-        return None # Couldn't get the username
-    
-    except:
-        return None # Couldn't get the data
+    if execute_query(queries=["""DELETE FROM Media"""], commit=True, fetch=None) == False:
+        raise ValueError("Couldn't clear the media index")
 
-def change_profile_username(pk, old_username, new_username):
+    if not execute_many(query="""INSERT INTO Media VALUES(?, ?, ?, ?, ?, ?)""", rows=rows, commit=True):
+        raise ValueError("Couldn't index the files")
+
+    return {'indexed': len(addresses), 'added': len(addresses - indexed), 'removed': len(indexed - addresses)}
+
+def get_saved_media(addresses):
     '''
-    Changes the profile's username
+    Gets the media that their file and thumbnail are already saved (like the ones of an interrupted run), using the media index
 
     Parameters:
-        pk (int): The pk of the profile
-        old_username (str): The old username of the profile
-        new_username (str): The new username of the profile
-    
+        addresses (list): The addresses of the files (relative to the storage folder and without the extension)
+
     Returns:
-        result (bool): If the username is changed successfully or not
+        saved (set): The addresses that don't need downloading
     '''
 
-    try:
-        folder_name = find_folder_name(pk=pk) # Get the folder name for the profile
+    saved = set()
+    for start in range(0, len(addresses), MEDIA_QUERY_SIZE):
+        batch = addresses[start:start + MEDIA_QUERY_SIZE]
 
-        if folder_name is not None:
-            os.rename(os.path.join(path, folder_name), os.path.join(path, f"{new_username}@{pk}")) # Change the folder name
-    
-    except:
-        return False # Couldn't change the folder name
+        query = [(f"""SELECT address, extension, thumbnail FROM Media WHERE address IN ({', '.join('?' * len(batch))})""", tuple(batch))]
 
-    query = [f"""UPDATE Profile SET username = \"{new_username}\" WHERE
-                username = \"{old_username}\""""]
-    
-    result = execute_query(queries=query, commit=True, fetch=None) # Change the username in the database
+        rows = execute_query(queries=query, commit=False, fetch=True)
 
-    if result == True:
-        return True # Username changed successfully
-    
-    else:
-        if folder_name is not None: # If the folder name was changed
-            try:
-                os.rename(os.path.join(path, f"{new_username}@{pk}"), os.path.join(path, folder_name))
-            
-            except:
-                pass # Couldn't change the folder name back
-        
-        return False # Couldn't change the username
+        if rows == False:
+            return set() # Couldn't check, so all of them are downloaded again
 
-def add_profile(username):
+        for address, extension, thumbnail in rows:
+            if (thumbnail is not None) and os.path.exists(os.path.join(path, address) + extension) and os.path.exists(os.path.join(path, thumbnail)):
+                saved.add(address)
+
+    return saved
+
+def add_jobs(kind, jobs):
     '''
-    Adds a profile to the database
+    Adds the jobs to the job queue as running by this program (the jobs that are already there are taken over and start their attempts
+    again, except the ones that this program is already running, like the ones of resume)
 
     Parameters:
-        username (str): The username of the profile
-    
+        kind (str): The kind of the jobs ("story", "post" or "highlight")
+        jobs (list): The (key, payload) of each job (the payload is what the job needs to be resumed)
+
     Returns:
-        result (bool): If the profile is added successfully or not
+        result (bool): If the jobs are added successfully or not
     '''
 
-    try:
-        data = get_profile_data(username=username) # Get the profile's data
-        if data is None:
-            print("There was an error!")
-            return # Couldn't get the data
-        
-        query = [f"""SELECT pk, username FROM Profile WHERE pk = {data['pk']}"""]
+    if len(jobs) == 0:
+        return True # There is nothing to add
 
-        does_exist = execute_query(queries=query, commit=False, fetch=True) # Get the pk information
-        
-        if does_exist == False:
-            print("There was an error!")
-            return # Couldn't get the pk information
+    rows = [(kind, key, json.dumps(payload), JOB_PRIORITIES[kind], job_owner, time() + JOB_LEASE) for key, payload in jobs]
 
-        if len(does_exist) != 0: # If the pk is already added
-            if does_exist[0][1] == data['username']: # If the username is the same
-                print("This account is already added!")
-                return # Profile already exist, don't need to continue
-            
-            if not change_profile_username(pk=data['pk'], old_username=does_exist[0][1], new_username=data['username']):
-                print("There was an error!")
-                return # Couldn't change the username
-            
-            if not update_profile(username=data['username'], profile_data=data): # Update the profile
-                print("There was an error!")
+    query = """INSERT INTO Job(kind, job_key, payload, state, priority, attempts, owner, lease_expiry) VALUES(?, ?, ?, 'running', ?, 0, ?, ?)
+               ON CONFLICT(kind, job_key) DO UPDATE SET payload = excluded.payload, state = 'running',
+               attempts = CASE WHEN state = 'running' AND owner = excluded.owner THEN attempts ELSE 0 END,
+               last_error = CASE WHEN state = 'running' AND owner = excluded.owner THEN last_error ELSE NULL END,
+               owner = excluded.owner, lease_expiry = excluded.lease_expiry"""
 
-            return # Username changed successfully and profile updated
-        
-        if not os.path.exists(os.path.join(path, f"{data['username']}@{data['pk']}")): # Make the profile folder
-            os.mkdir(os.path.join(path, f"{data['username']}@{data['pk']}"))
-        
-        if not os.path.exists(os.path.join(path, f"{data['username']}@{data['pk']}", "Profiles")): # Make the Profiles folder
-            os.mkdir(os.path.join(path, f"{data['username']}@{data['pk']}", "Profiles"))
-        
-        # Else if Profiles folder exist then move the past profile files (if any) to History folder
-        elif not move_profile_history(pk=data['pk'], profile_id=int(time())):
-            print("Couldn't Move the past profile to history!")
-            return
-        
-        # Try downloading the profile picture
-        isDownloaded = try_downloading(link=data['original_profile_pic_link'], address=data['original_profile_pic'])
+    return execute_many(query=query, rows=rows, commit=True)
 
-        if not isDownloaded: # Couldn't download the profile picture
-            print("There was an error!")
-            return
-    
-    except:
-        print("There was an error!")
-        return # Couldn't add the profile
-    
-    try:
-        # Try Making a thumbnail for the profile picture
-        if not make_thumbnail(address=data['original_profile_pic'], size=128, circle=True):
-            print("There was an error!")
-            return # Couldn't make the thumbnail
+def finish_jobs(kind, keys):
+    '''
+    Removes the finished jobs from the job queue
 
-        query = f"""INSERT INTO Profile VALUES({data['pk']}, \"{data['username']}\", \"{data['full_name']}\","""
+    Parameters:
+        kind (str): The kind of the jobs
+        keys (list): The keys of the jobs
 
-        if data['page_name'] is None:
-            query += "NULL"
-        else:
-            query += f"""\"{data['page_name']}\""""
-        
-        if data['biography'] == '':
-            query += f", NULL"
-            data['biography'] = None
-        else:
-            query += f""", \"{data['biography']}\""""
+    Returns:
+        result (bool): If the jobs are removed successfully or not
+    '''
 
-        query += f""", {data['is_private']},"""
+    if len(keys) == 0:
+        return True # There is nothing to remove
 
-        if data['public_email'] is None:
-            query += "NULL"
-        else:
-            query += f"""\"{data['public_email']}\""""
+    return execute_many(query="""DELETE FROM Job WHERE kind = ? AND job_key = ?""", rows=[(kind, key) for key in keys], commit=True)
 
-        query += f""", {data['media_count']}, {data['follower_count']},
-                        {data['following_count']}, {data['profile_id']}, NULL, NULL)"""
-        
-        queries = [query, # Add the profile to the database
-                   f"""INSERT INTO Highlight VALUES({data['pk']}, {data['pk']},
-                         "Stories", 0)"""] # Add a default highlight for the stories (highlight_id = pk)
+def fail_jobs(kind, keys, error):
+    '''
+    Gives the failed jobs back to the job queue (they aren't resumed anymore after JOB_MAX_ATTEMPTS failures)
 
-        result = execute_query(queries=queries, commit=True, fetch=None) # Add the profile to the database
-        
-        if result == False: # Couldn't add the profile
-            try:
-                files = glob.glob(os.path.join(path, f"{data['username']}@{data['pk']}", "Profiles", "Profile*")) # Get the profile files
+    Parameters:
+        kind (str): The kind of the jobs
+        keys (list): The keys of the jobs (the ones that are finished or aren't running by this program are skipped)
+        error (str): The reason of the failure
 
-                for file in files:
-                    os.remove(file) # Remove the profile files
-            
-            except:
-                pass # Couldn't remove the profile files
+    Returns:
+        result (bool): If the jobs are given back successfully or not
+    '''
 
-            print("There was an error!") # Couldn't add the profile
-            return
-        
-        if not data['is_private']:
-            update_highlights(pk=data['pk']) # If the account isn't private then update it's highlights
+    if len(keys) == 0:
+        return True # There is nothing to give back
 
-        list_profiles() # Update the screen
+    query = """UPDATE Job SET attempts = attempts + 1, state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END,
+               last_error = ?, owner = NULL, lease_expiry = NULL WHERE kind = ? AND job_key = ? AND state = 'running' AND owner = ?"""
 
-    except:
+    return execute_many(query=query, rows=[(JOB_MAX_ATTEMPTS, error, kind, key, job_owner) for key in keys], commit=True)
+
+def claim_jobs(kinds=None, limit=None):
+    '''
+    Takes the unfinished jobs for this program (the pending ones and the running ones whose lease is expired, like the ones of a killed run)
+
+    Parameters:
+        kinds (list): The kinds of the jobs to take (None for all of them)
+        limit (int): Maximum number of the jobs to take (None for JOB_BATCH_SIZE)
+
+    Returns:
+        jobs (list): The (kind, key, payload) of each job, in the order of their priority
+    '''
+
+    now = time()
+    kinds = list(JOB_PRIORITIES) if kinds is None else kinds
+
+    query = (f"""SELECT job_id, kind, job_key, payload FROM Job
+             WHERE (state = 'pending' OR (state = 'running' AND lease_expiry < ?))
+             AND kind IN ({', '.join('?' * len(kinds))}) ORDER BY priority DESC, job_id LIMIT ?""",
+             (now, *kinds, limit or JOB_BATCH_SIZE))
+
+    rows = execute_query(queries=[query], commit=False, fetch=True)
+
+    if rows == False:
+        raise ValueError("Couldn't read the jobs")
+
+    if not execute_many(query="""UPDATE Job SET state = 'running', owner = ?, lease_expiry = ? WHERE job_id = ?""",
+                        rows=[(job_owner, now + JOB_LEASE, row[0]) for row in rows], commit=True):
+        raise ValueError("Couldn't take the jobs")
+
+    return [(kind, key, json.loads(payload)) for _, kind, key, payload in rows]
+
+def resume(kinds=None):
+    '''
+    Runs the unfinished jobs (like the ones of a run that was killed) until none is left, without fetching the lists of the posts and the highlights again
+
+    Parameters:
+        kinds (list): The kinds of the jobs to run ("story", "post" or "highlight"), None for all of them
+
+    Returns:
+        counts (dict): Number of the jobs of each kind that were run (None if it couldn't read the jobs)
+    '''
+
+    counts = {}
+
+    while True:
         try:
-            files = glob.glob(os.path.join(path, f"{data['username']}@{data['pk']}", "Profiles", "Profile*")) # Get the profile files
+            jobs = write_db(claim_jobs, kinds=kinds) # Taken on the database writer, so two callers don't take the same jobs
 
-            for file in files:
-                os.remove(file) # Remove the profile files
-        
         except:
-            pass # Couldn't remove the profile files
+            return None # Couldn't read the jobs
 
-        print("There was an error!") # Couldn't add the profile
+        if len(jobs) == 0:
+            return counts # All of the jobs are done
 
-def update_profile(username, with_highlights=True, profile_data=None):
+        for kind in JOB_PRIORITIES:
+            batch = [(key, payload) for job_kind, key, payload in jobs if job_kind == kind]
+
+            if len(batch) == 0:
+                continue
+
+            try:
+                if kind == 'story':
+                    download_new_stories(stories=[refresh_story_address(story=payload) for _, payload in batch])
+
+                elif kind == 'post':
+                    resume_posts(jobs=batch)
+
+                else:
+                    for key, payload in batch:
+                        resume_highlight(key=key, payload=payload)
+
+                # The jobs that weren't finished by the functions above
+                fail_jobs(kind=kind, keys=[key for key, _ in batch], error=f"Couldn't finish the {kind}")
+
+            except Exception as error:
+                fail_jobs(kind=kind, keys=[key for key, _ in batch], error=str(error))
+
+            counts[kind] = counts.get(kind, 0) + len(batch)
+
+def resume_highlight(key, payload):
     '''
-    Updates the profile
+    Downloads the stories of a highlight whose job wasn't finished
 
     Parameters:
-        username (str): The username of the profile
-        with_highlights (bool): Should the highlights be updated or not
-        profile_data (dict): The profile's data (if already fetched)
-    
-    Returns:
-        result (bool): If the profile is updated successfully or not
+        key (str): The key of the job
+        payload (dict): The pk, highlight_id and highlight_title of the highlight
     '''
 
-    try:
-        query = [f"""SELECT pk, profile_id FROM Profile
-                 WHERE username = \"{username}\""""]
-        
-        user_data = execute_query(queries=query, commit=False, fetch=False) # Get current information of user
-        
-        if user_data == False:
-            print("Couldn't update profile")
-            return False
+    query = [("""SELECT username FROM Profile WHERE pk = ?""", (payload['pk'],))]
 
-        if profile_data is None: # If the profile's data is not already fetched (function not called from add_profile)
-            new_username = get_pk_username(pk=user_data[0]) # Get the username of the profile
+    result = execute_query(queries=query, commit=False, fetch=False) # The username may have changed
 
-            if new_username is None:
-                print("Couldn't update profile")
-                return False
-            
-            if new_username != username: # If the username has changed
-                if not change_profile_username(pk=user_data[0], old_username=username, new_username=new_username):
-                    print("Couldn't update profile")
-                    return False
-                
-                username = new_username # Change the username to the new username
+    if not result:
+        finish_jobs(kind='highlight', keys=[key]) # The profile isn't in the database anymore
+        return
+
+    download_single_highlight_stories(username=result[0], highlight_id=payload['highlight_id'], highlight_title=payload['highlight_title'],
+                                      direct_call=False)
+
+def resume_posts(jobs):
+    '''
+    Downloads the posts whose jobs weren't finished (in the current folders of their profiles)
+
+    Parameters:
+        jobs (list): The key and payload (pk, post_code and is_tag) of each job
+    '''
+
+    posts = [] # The posts that their profile is still there
+    for key, payload in jobs:
+        address = get_posts_address(pk=payload['pk'], is_tag=payload['is_tag']) # The username may have changed
+
+        if address is None:
+            finish_jobs(kind='post', keys=[key]) # The profile isn't in the database anymore
+            continue
+
+        os.makedirs(os.path.join(path, address), exist_ok=True) # Make the folder for the posts
+
+        posts.append((payload['pk'], payload['post_code'], payload['is_tag'], address))
+
+    download_pending_posts(posts=posts)
+
+def refresh_story_address(story):
+    '''
+    Moves the address of the story of an unfinished job to the current folder of it's profile (the username may have changed)
+
+    Parameters:
+        story (list): The story information of the job
+    
+    Returns:
+        story (tuple): The story information
+    '''
+
+    folder_name = find_folder_name(pk=story[0])
+
+    if folder_name is not None:
+        story[5] = os.path.join(folder_name, story[5].split(os.sep, 1)[1]) # Change the profile's folder in the address
+    
+    return tuple(story)
+
+def retry_failed_jobs(kinds=None):
+    '''
+    Gives the failed jobs (the ones that failed JOB_MAX_ATTEMPTS times) back to the job queue, so the next resume runs them again
+
+    Parameters:
+        kinds (list): The kinds of the jobs ("story", "post" or "highlight"), None for all of them
+    
+    Returns:
+        result (bool): If the jobs are given back successfully or not
+    '''
+
+    kinds = list(JOB_PRIORITIES) if kinds is None else kinds
+
+    query = [(f"""UPDATE Job SET state = 'pending', attempts = 0, last_error = NULL
+              WHERE state = 'failed' AND kind IN ({', '.join('?' * len(kinds))})""", tuple(kinds))]
+
+    return execute_query(queries=query, commit=True, fetch=None) == True
+
+def purge_failed_jobs(kinds=None):
+    '''
+    Removes the failed jobs (the ones that failed JOB_MAX_ATTEMPTS times) from the job queue
+
+    Parameters:
+        kinds (list): The kinds of the jobs ("story", "post" or "highlight"), None for all of them
+    
+    Returns:
+        result (bool): If the jobs are removed successfully or not
+    '''
+
+    kinds = list(JOB_PRIORITIES) if kinds is None else kinds
+
+    query = [(f"""DELETE FROM Job WHERE state = 'failed' AND kind IN ({', '.join('?' * len(kinds))})""", tuple(kinds))]
+
+    return execute_query(queries=query, commit=True, fetch=None) == True
+
+def get_highlight_job(pk, highlight_id, highlight_title):
+    '''
+    Gets the job of downloading the stories of a highlight
+
+    Parameters:
+        pk (int): The profile's pk
+        highlight_id (int): The highlight's id
+        highlight_title (str): The highlight's title
+    
+    Returns:
+        job (tuple): The key and payload of the job
+    '''
+
+    return (str(highlight_id), {'pk': pk, 'highlight_id': highlight_id, 'highlight_title': highlight_title})
+
+def get_rate_limit(host):
+    '''
+    Gets the rate limit of the host (must be called while holding rate_limit_lock)
+
+    Parameters:
+        host (str): The host of the requests
+    
+    Returns:
+        rate_limit (dict): The rate limit of the host
+    '''
+
+    if host not in rate_limits: # First request to this host
+        rate_limits[host] = {
+            'rate': RATE_LIMIT_START, # Requests per second
+            'tokens': 1.0, # Number of the requests that can be sent right now
+            'updated': time(), # Last time the tokens were refilled
+            'blocked_until': 0.0, # No request is sent to the host before this time
+        }
+
+    return rate_limits[host]
+
+def take_rate_limit_token(url):
+    '''
+    Takes a token for sending a request to the url's host if there is one
+
+    Parameters:
+        url (str): The url of the request
+    
+    Returns:
+        wait (float): The number of seconds to wait before trying again (0 if the request can be sent now)
+    '''
+
+    host = urlparse(url).netloc # Get the host of the url
+
+    with rate_limit_lock:
+        rate_limit = get_rate_limit(host=host)
+
+        now = time()
+
+        # Refill the tokens for the passed time (at most one second's worth of requests)
+        rate_limit['tokens'] = min(max(1.0, rate_limit['rate']), rate_limit['tokens'] + max(0.0, now - rate_limit['updated']) * rate_limit['rate'])
+        rate_limit['updated'] = max(now, rate_limit['updated'])
+
+        if now < rate_limit['blocked_until']: # The host asked us to wait
+            return rate_limit['blocked_until'] - now
+        
+        if rate_limit['tokens'] >= 1: # The request can be sent
+            rate_limit['tokens'] -= 1
+            return 0
+        
+        return (1 - rate_limit['tokens']) / rate_limit['rate'] # Wait for the next token
+
+def wait_for_rate_limit(url):
+    '''
+    Waits until a request can be sent to the url's host
+
+    Parameters:
+        url (str): The url of the request
+    '''
+
+    while True:
+        wait = take_rate_limit_token(url=url)
+
+        if wait == 0:
+            return # The request can be sent
+        
+        sleep(wait) # Wait without holding the lock
+
+def get_retry_after(headers):
+    '''
+    Gets the number of seconds the server asked us to wait
+
+    Parameters:
+        headers (Headers): The headers of the response
+    
+    Returns:
+        seconds (float): The number of seconds to wait (None if the server didn't say)
+    '''
+
+    try:
+        retry_after = headers.get('retry-after')
+
+        if retry_after is None:
+            return None
+        
+        if retry_after.strip().isdigit(): # Retry-After: <seconds>
+            return float(retry_after)
+        
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time()) # Retry-After: <http-date>
+    
+    except:
+        return None # Couldn't read the header
+
+def report_rate_limit(url, status_code, retry_after=None):
+    '''
+    Changes the rate of the url's host according to the result of the request (AIMD)
+
+    Parameters:
+        url (str): The url of the request
+        status_code (int): The status code of the response
+        retry_after (float): The number of seconds the server asked us to wait (if any)
+    '''
+
+    host = urlparse(url).netloc # Get the host of the url
+
+    with rate_limit_lock:
+        rate_limit = get_rate_limit(host=host)
+
+        if status_code == 429: # Too many requests, slow down quickly
+            rate_limit['rate'] = max(RATE_LIMIT_MIN, rate_limit['rate'] * RATE_LIMIT_DECREASE)
+            rate_limit['tokens'] = 0.0
+
+            if retry_after is None: # Wait for one request at the new rate
+                retry_after = 1 / rate_limit['rate']
+
+            rate_limit['blocked_until'] = max(rate_limit['blocked_until'], time() + retry_after)
+            rate_limit['updated'] = rate_limit['blocked_until'] # No tokens are refilled while blocked
+        
+        elif status_code < 400: # Successful request, speed up slowly
+            rate_limit['rate'] = min(RATE_LIMIT_MAX, rate_limit['rate'] + RATE_LIMIT_INCREASE)
+
+def get_request_rate(url):
+    '''
+    Gets the current rate of the url's host
+
+    Parameters:
+        url (str): The url (or host) of the requests
+    
+    Returns:
+        rate (float): The number of the requests per second
+    '''
+
+    host = urlparse(url).netloc or url # Get the host of the url
+
+    with rate_limit_lock:
+        return get_rate_limit(host=host)['rate']
+
+def register_provider(interface, name, function, first=False, async_function=None):
+    '''
+    Registers a provider (mirror) for an interface
+
+    Parameters:
+        interface (str): The interface (profile_info, highlights, stories, post_list or post_page)
+        name (str): The name of the provider
+        function (function): Gets the same arguments and returns the same data as the built-in provider
+                             (None if there is no data, raises an error if it couldn't connect)
+        first (bool): Should it be tried before the other providers
+        async_function (function): The async version of function (if None, function is run in a thread by the async functions)
+    '''
+
+    if async_function is not None:
+        async_providers[(interface, name)] = async_function
+    
+    else:
+        async_providers.pop((interface, name), None) # Don't keep the async version of the replaced provider
+
+    interface_providers = [provider for provider in providers.get(interface, []) if provider[0] != name] # Replace the provider with the same name
+
+    if first:
+        interface_providers.insert(0, (name, function))
+    
+    else:
+        interface_providers.append((name, function))
+    
+    providers[interface] = interface_providers
+
+def circuit_allows(endpoint):
+    '''
+    Checks if the endpoint can be called (it's circuit isn't open)
+
+    Parameters:
+        endpoint (str): The endpoint ("interface:provider")
+    
+    Returns:
+        result (bool): If the endpoint can be called or not
+    '''
+
+    with circuit_lock:
+        breaker = circuit_breakers.get(endpoint)
+
+        if (breaker is None) or (breaker['opened_at'] is None):
+            return True # The endpoint is working
+        
+        if (time() - breaker['opened_at'] >= CIRCUIT_COOLDOWN) and (not breaker['trying']):
+            breaker['trying'] = True # Let a single call try the endpoint again
+            return True
+        
+        return False # The endpoint is failing, don't wait for it
+
+def record_circuit(endpoint, success):
+    '''
+    Records the result of calling the endpoint and opens it's circuit after repeated failures
+
+    Parameters:
+        endpoint (str): The endpoint ("interface:provider")
+        success (bool): If the call was successful or not
+    '''
+
+    with circuit_lock:
+        if endpoint not in circuit_breakers:
+            circuit_breakers[endpoint] = {'failures': 0, 'opened_at': None, 'trying': False}
+        
+        breaker = circuit_breakers[endpoint]
+        breaker['trying'] = False
+
+        if success:
+            breaker['failures'] = 0
+            breaker['opened_at'] = None # Close the circuit
+        
+        else:
+            breaker['failures'] += 1
+
+            if breaker['failures'] >= CIRCUIT_FAILURES:
+                breaker['opened_at'] = time() # Open (or open again) the circuit
+
+def note_request_failure():
+    '''
+    Records that a request of the running provider call couldn't connect or the host failed (an error, 429 or 5xx response)
+    '''
+
+    record = request_failures.get()
+
+    if record is not None:
+        record['failed'] = True
+
+def is_host_failure(status_code):
+    '''
+    Checks if the status code means the host is failing (not that the data isn't there)
+
+    Parameters:
+        status_code (int): The status code of the response
+    
+    Returns:
+        result (bool): If the host is failing or not
+    '''
+
+    return (status_code == 429) or (status_code >= 500)
+
+def call_step(function, async_function=None, **kwargs):
+    '''
+    Makes a step of a shared body that calls the function (the sync and async functions only differ in how their steps are run)
+
+    Parameters:
+        function (function): The function that the sync functions call
+        async_function (function): The async version of function (if None, function is run in a thread by the async functions)
+        kwargs (dict): The arguments for the function
+    
+    Returns:
+        step (tuple): The step
+    '''
+
+    return ('call', function, async_function, kwargs)
+
+def cpu_step(function, **kwargs):
+    '''
+    Makes a step of a shared body for the CPU work (like parsing pages), the async functions run it on the workers
+
+    Parameters:
+        function (function): The function to run
+        kwargs (dict): The arguments for the function
+    
+    Returns:
+        step (tuple): The step
+    '''
+
+    return ('cpu', function, None, kwargs)
+
+def db_step(function, **kwargs):
+    '''
+    Makes a step of a shared body that runs the function as a single job of the database writer
+
+    Parameters:
+        function (function): The function to run (it should only run queries)
+        kwargs (dict): The arguments for the function
+    
+    Returns:
+        step (tuple): The step
+    '''
+
+    return ('db', function, None, kwargs)
+
+def together(steps, limit=None):
+    '''
+    Makes a step of a shared body that runs several steps (or shared bodies), the async functions run all of them at the same time
+
+    Parameters:
+        steps (list): The steps to run
+        limit (tuple): The name and the number of the steps that can run at the same time
+                       (None to run them one by one in the sync functions and all at once in the async functions)
+    
+    Returns:
+        step (tuple): The step (it's result is the list of the results of the steps)
+    '''
+
+    return ('together', steps, limit, None)
+
+def run_step(step):
+    '''
+    Runs a step of a shared body on this thread
+
+    Parameters:
+        step (tuple/generator): The step (or a shared body)
+    
+    Returns:
+        result (any): The result of the step
+    '''
+
+    if isinstance(step, GeneratorType):
+        return run_steps(steps=step) # Another shared body
+
+    kind, function, extra, kwargs = step
+
+    if kind == 'together':
+        if extra is None:
+            return [run_step(step=item) for item in function] # One by one
+        
+        with ThreadPoolExecutor(max_workers=extra[1], thread_name_prefix=extra[0]) as executor:
+            return list(executor.map(run_step, function)) # Several at the same time
+
+    if kind == 'db':
+        return write_db(function, **kwargs)
+    
+    return function(**kwargs)
+
+def run_steps(steps):
+    '''
+    Runs a shared body of a sync and async function (the generator yields the steps and gets their results back)
+
+    Parameters:
+        steps (generator): The shared body
+    
+    Returns:
+        result (any): The result of the shared body
+    '''
+
+    result = None
+    error = None # The error of the last step is raised in the shared body
+
+    while True:
+        try:
+            step = steps.throw(error) if error is not None else steps.send(result)
+        
+        except StopIteration as stop:
+            return stop.value
+        
+        try:
+            result, error = run_step(step=step), None
+        
+        except Exception as exception:
+            result, error = None, exception
+
+def run_provider_steps(function, async_function=None, **kwargs):
+    '''
+    Calls the provider and checks if it failed because of the connection (the shared body of run_provider and async_run_provider)
+
+    Parameters:
+        function (function): The provider
+        async_function (function): The async version of the provider (None if it doesn't have one)
+        kwargs (dict): The arguments for the provider
+    
+    Yields:
+        step (tuple): The steps of the provider call
+    
+    Returns:
+        data (any): The data of the provider (None if there is no data)
+        failed (bool): If the provider or one of it's requests failed
+    '''
+
+    record = {'failed': False}
+    token = request_failures.set(record) # The requests of the provider record their failures here (a thread gets a copy with the same record)
+
+    try:
+        data = yield call_step(function=function, async_function=async_function, **kwargs) # Call the provider
+    
+    except:
+        data = None
+        record['failed'] = True # The provider failed
+    
+    finally:
+        request_failures.reset(token)
+
+    return data, record['failed']
+
+def run_provider(function, **kwargs):
+    '''
+    Calls the provider and checks if it failed because of the connection (a clean "no data" isn't a failure)
+
+    Parameters:
+        function (function): The provider
+        kwargs (dict): The arguments for the provider
+    
+    Returns:
+        data (any): The data of the provider (None if there is no data)
+        failed (bool): If the provider or one of it's requests failed
+    '''
+
+    return run_steps(steps=run_provider_steps(function=function, **kwargs))
+
+def call_provider_steps(interface, with_provider=False, **kwargs):
+    '''
+    Calls the providers of the interface in order until one of them returns the data (the shared body of call_provider and async_call_provider)
+
+    Parameters:
+        interface (str): The interface (profile_info, highlights, stories, post_list or post_page)
+        with_provider (bool): Should the name of the provider be returned too
+        kwargs (dict): The arguments for the provider
+    
+    Yields:
+        step (tuple): The steps of the provider calls
+    
+    Returns:
+        data (any): The data of the first working provider (None if all of them failed)
+        name (str): The name of the provider that got the data (only if with_provider, None if all of them failed)
+    '''
+
+    for name, function in providers.get(interface, []):
+        endpoint = f"{interface}:{name}"
+
+        if not circuit_allows(endpoint=endpoint):
+            continue # Skip the failing provider
+        
+        # Call the provider
+        data, failed = yield run_provider_steps(function=function, async_function=async_providers.get((interface, name)), **kwargs)
+
+        record_circuit(endpoint=endpoint, success=not failed) # Missing data (like a deleted post) doesn't open the circuit
+
+        if data is not None:
+            return (data, name) if with_provider else data # Return the data
+    
+    return (None, None) if with_provider else None # None of the providers could get the data
+
+def call_provider(interface, with_provider=False, **kwargs):
+    '''
+    Calls the providers of the interface in order until one of them returns the data
+
+    Parameters:
+        interface (str): The interface (profile_info, highlights, stories, post_list or post_page)
+        with_provider (bool): Should the name of the provider be returned too
+        kwargs (dict): The arguments for the provider
+    
+    Returns:
+        data (any): The data of the first working provider (None if all of them failed)
+        name (str): The name of the provider that got the data (only if with_provider, None if all of them failed)
+    '''
+
+    return run_steps(steps=call_provider_steps(interface=interface, with_provider=with_provider, **kwargs))
+
+def get_session_pool(url):
+    '''
+    Gets the sessions pool of the url's host
+
+    Parameters:
+        url (str): The url of the request
+    
+    Returns:
+        pool (dict): The sessions pool of the host
+    '''
+
+    host = urlparse(url).netloc # Get the host of the url
+
+    with session_lock:
+        if host not in session_pools: # First request to this host
+            session_pools[host] = {
+                'sessions': LifoQueue(), # The idle sessions (last used first, so it's connection is still alive)
+                'made': 0, # Number of the sessions made for this host
+            }
+
+        return session_pools[host]
+
+@contextmanager
+def pooled_session(url):
+    '''
+    Borrows a kept-alive session for the url's host and gives it back after use
+
+    Parameters:
+        url (str): The url of the request
+    
+    Yields:
+        session (requests.Session): The session for sending the request
+    '''
+
+    from curl_cffi import requests
+
+    pool = get_session_pool(url=url) # Get the sessions pool of the host
+
+    session = None
+    with session_lock:
+        if pool['sessions'].empty() and pool['made'] < SESSION_POOL_SIZE: # Make a new session if the pool isn't full
+            session = requests.Session()
+            pool['made'] += 1
+
+    if session is None:
+        session = pool['sessions'].get() # Wait for an idle session
+
+    try:
+        yield session
+
+    finally:
+        try:
+            session.cookies.clear() # Cookies are set by hand for each request
+        
+        except:
+            pass
+
+        pool['sessions'].put(session) # Give the session back to the pool
+
+def close_sessions():
+    '''
+    Closes all of the kept-alive sessions
+    '''
+
+    with session_lock:
+        for pool in session_pools.values():
+            while not pool['sessions'].empty():
+                try:
+                    pool['sessions'].get_nowait().close() # Close the session
+                
+                except:
+                    pass
+
+        session_pools.clear() # The pools will be made again on the next request
+
+def send_single_request(url, method, payload, headers, timeout):
+    '''
+    Sends the request with a kept-alive session of the url's host (after the rate limiter allows it)
+
+    Parameters:
+        url (str): The url to send the request
+        method (str): The method for the request
+        payload (str): The payload for the request
+        headers (dict): The headers for the request
+        timeout (int): The timeout for the request
+    
+    Returns:
+        response (requests.Response): The response of the request
+    '''
+
+    wait_for_rate_limit(url=url) # Wait until the host allows another request
+
+    with pooled_session(url=url) as session:
+        return session.request(method=method, url=url, data=payload, headers=headers, timeout=timeout) # Send the request
+
+def send_request_steps(url, method='POST', payload=None, headers=None, retries=3, timeout=60, valid_status_codes=(200,)):
+    '''
+    Sends a request to the url and returns the response (the shared body of send_request and async_send_request)
+
+    Parameters:
+        url (str): The url to send the request
+        method (str): The method for the request
+        payload (str): The payload for the request
+        headers (dict): The headers for the request
+        retries (int): The number of retries for the request
+        timeout (int): The timeout for the request
+        valid_status_codes (tuple): The status codes that are returned as a valid response
+    
+    Yields:
+        step (tuple): The steps of the request
+    
+    Returns:
+        response (requests.Response): The response of the request
+    '''
+
+    try:
+        response = yield call_step(function=send_single_request, async_function=async_send_single_request, url=url, method=method, payload=payload,
+                                   headers=headers if headers is not None else HEADERS, timeout=timeout) # Send the request
+        
+        report_rate_limit(url=url, status_code=response.status_code, retry_after=get_retry_after(headers=response.headers)) # Update the rate of the host
+
+        if response.status_code in valid_status_codes:
+            return response # Return the response
+        
+        elif (response.status_code) == 429 and (retries > 0): # Too many requests (the rate limiter waits before the next try)
+            return (yield send_request_steps(url=url, method=method, payload=payload, headers=headers, retries=retries-1, valid_status_codes=valid_status_codes)) # Try again
+        
+        elif (response.status_code) == 500: # Internal server error
+            if ('stealthgram' in url) and ('EXPIRED' in response.text): # If the tokens are expired
+                if not (yield call_step(function=get_stealthgram_tokens)): # Get new tokens
+                    return None # Couldn't get new tokens
+                
+                headers = get_stealthgram_headers() # Set the headers for the request with the new tokens
+
+                return (yield send_request_steps(url=url, method=method, payload=payload, headers=headers, retries=retries-1, valid_status_codes=valid_status_codes)) # Try again with the new tokens
+        
+        if is_host_failure(status_code=response.status_code):
+            note_request_failure() # The host is failing, not just missing the data
+
+        return None # Couldn't get the data
+    
+    except:
+        note_request_failure() # Couldn't connect
+        return None # Couldn't get the data
+
+def send_request(url, method='POST', payload=None, headers=None, retries=3, timeout=60, valid_status_codes=(200,)):
+    '''
+    Sends a request to the url and returns the response
+
+    Parameters:
+        url (str): The url to send the request
+        method (str): The method for the request
+        payload (str): The payload for the request
+        headers (dict): The headers for the request
+        retries (int): The number of retries for the request
+        timeout (int): The timeout for the request
+        valid_status_codes (tuple): The status codes that are returned as a valid response
+    
+    Returns:
+        response (requests.Response): The response of the request
+    '''
+
+    return run_steps(steps=send_request_steps(url=url, method=method, payload=payload, headers=headers, retries=retries, timeout=timeout,
+                                              valid_status_codes=valid_status_codes))
+
+def get_cache_address(url):
+    '''
+    Gets the address of the saved page of the url
+
+    Parameters:
+        url (str): The url of the page
+    
+    Returns:
+        address (str): The full address of the saved page
+    '''
+
+    return os.path.join(path, ".cache", hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+def read_cached_response(url, cache_type):
+    '''
+    Reads the saved page of the url if it's not expired
+
+    Parameters:
+        url (str): The url of the page
+        cache_type (str): The type of the page (a key of RESPONSE_CACHE_TTLS)
+    
+    Returns:
+        text (str): The saved page (None if there isn't a fresh one)
+    '''
+
+    if not RESPONSE_CACHE_ENABLED:
+        return None # The cache is off
+    
+    try:
+        address = get_cache_address(url=url)
+
+        with open(address, 'r', encoding='utf-8') as file:
+            cached = json.load(file)
+
+        if (cached['url'] != url) or (time() - cached['time'] > RESPONSE_CACHE_TTLS[cache_type]):
+            return None # It's expired (or it's not for this url)
+        
+        os.utime(address) # Mark it as recently used
+        
+        return cached['text'] # Return the saved page
+    
+    except:
+        return None # There isn't a saved page
+
+def save_cached_response(url, text):
+    '''
+    Saves the page of the url for reusing it later
+
+    Parameters:
+        url (str): The url of the page
+        text (str): The page
+    '''
+
+    if not RESPONSE_CACHE_ENABLED:
+        return # The cache is off
+    
+    folder = os.path.join(path, ".cache")
+
+    try:
+        if not os.path.exists(folder): # Make the cache folder
+            os.makedirs(folder, exist_ok=True)
+        
+        address = get_cache_address(url=url)
+        content = json.dumps({'url': url, 'time': time(), 'text': text}).encode('utf-8')
+
+        with cache_lock:
+            if folder not in cache_sizes: # Count the saved pages once
+                cache_sizes[folder] = sum(entry.stat().st_size for entry in os.scandir(folder) if entry.name.endswith(".json"))
+            
+            old_size = os.path.getsize(address) if os.path.exists(address) else 0 # The old page of the url is replaced
+
+        save_file(content=content, address=address)
+
+        with cache_lock:
+            cache_sizes[folder] += len(content) - old_size
+
+            if cache_sizes[folder] > RESPONSE_CACHE_SIZE:
+                cache_sizes[folder] = remove_cached_responses(folder=folder)
+    
+    except: # Couldn't save the page, it will be requested again next time
+        with cache_lock:
+            cache_sizes.pop(folder, None) # Count the saved pages again next time
+
+def remove_cached_responses(folder):
+    '''
+    Removes the least recently used saved pages until RESPONSE_CACHE_KEEP of RESPONSE_CACHE_SIZE is left (cache_lock must be held)
+
+    Parameters:
+        folder (str): The cache folder
+    
+    Returns:
+        total_size (int): The total size of the saved pages that are left
+    '''
+
+    files = [(entry.path, entry.stat()) for entry in os.scandir(folder) if entry.name.endswith(".json")]
+    files.sort(key=lambda file: file[1].st_mtime) # The least recently used ones first
+
+    total_size = sum(stat.st_size for _, stat in files)
+
+    for address, stat in files:
+        if total_size <= RESPONSE_CACHE_SIZE * RESPONSE_CACHE_KEEP:
+            break
+
+        try:
+            os.remove(address) # Remove the least recently used page
+            total_size -= stat.st_size
+        
+        except:
+            continue # It's removed by another program
+
+    return total_size
+
+def get_link_extension(link, content_type):
+    '''
+    Finds the extension of the downloaded file
+
+    Parameters:
+        link (str): The link of the file
+        content_type (str): The content-type header of the response
+    
+    Returns:
+        extension (str): The extension of the file (None if it's not a media)
+    '''
+
+    try:
+        extension = guess_extension(content_type.partition(';')[0].strip()) # Find the extension from the headers
+        if extension is None: # If couldn't find from headers then find from the link
+            extension = link[:link.index('?')]
+            extension = extension[extension.rindex('.'):]
+        
+        if extension in [None, '', '.', '.txt', '.html']: # If couldn't find the extension or it's a text or html file (Probably an error)
+            return None
+        
+        return extension # Return the extension
+    
+    except:
+        return None # Couldn't find the extension
+
+def get_part_address(address):
+    '''
+    Gets the address of the temporary file for a download
+
+    Parameters:
+        address (str): The address to save the file
+    
+    Returns:
+        part_address (str): The full address of the temporary file
+    '''
+
+    folder, name = os.path.split(os.path.join(path, address))
+
+    return os.path.join(folder, f".{name}.part") # Hidden file, so globs like "{name}.*" don't find it
+
+def read_part_state(part_address):
+    '''
+    Reads the saved state of an incomplete download
+
+    Parameters:
+        part_address (str): The full address of the temporary file
+    
+    Returns:
+        state (dict): The expected size and validator of the file (None if there is no usable state)
+    '''
+
+    try:
+        if not os.path.exists(part_address):
+            return None # There is nothing to resume
+        
+        with open(part_address + ".json", 'r') as file:
+            return json.load(file) # Return the state
+    
+    except:
+        return None # Couldn't read the state
+
+def save_part_state(part_address, size, validator):
+    '''
+    Saves the state of an incomplete download so it can be resumed later
+
+    Parameters:
+        part_address (str): The full address of the temporary file
+        size (int): The expected size of the whole file (None if unknown)
+        validator (str): The ETag or Last-Modified of the file (None if unknown)
+    '''
+
+    try:
+        with open(part_address + ".json", 'w') as file:
+            json.dump({'size': size, 'validator': validator}, file)
+    
+    except:
+        pass # Couldn't save the state, the download will start from zero next time
+
+def remove_part(part_address):
+    '''
+    Removes the temporary file of a download and it's state
+
+    Parameters:
+        part_address (str): The full address of the temporary file
+    '''
+
+    for file in [part_address, part_address + ".json"]:
+        try:
+            if os.path.exists(file):
+                os.remove(file)
+        
+        except:
+            pass # Couldn't remove the file
+
+def get_validator(headers):
+    '''
+    Gets the validator of the response that can be used for If-Range
+
+    Parameters:
+        headers (Headers): The headers of the response
+    
+    Returns:
+        validator (str): The strong ETag or the Last-Modified of the response (None if there isn't any)
+    '''
+
+    etag = headers.get('etag')
+
+    if (etag is not None) and (not etag.startswith('W/')): # Weak ETags can't be used for ranges
+        return etag
+
+    return headers.get('last-modified')
+
+def get_total_size(media, offset):
+    '''
+    Gets the size of the whole file from the response
+
+    Parameters:
+        media (requests.Response): The response of the download
+        offset (int): The byte that the response should start from
+    
+    Returns:
+        size (int): The size of the whole file (None if unknown, -1 if the response doesn't start from offset)
+    '''
+
+    if media.status_code == 206: # Partial content, the size is in Content-Range (bytes start-end/size)
+        content_range = media.headers.get('content-range', '')
+        start = content_range.partition(' ')[2].partition('-')[0]
+        size = content_range.rpartition('/')[2]
+
+        if (not start.isdigit()) or (int(start) != offset):
+            return -1 # The response isn't the rest of the file
+
+        return int(size) if size.isdigit() else None
+    
+    size = media.headers.get('content-length')
+
+    # Content-Length isn't the file size if the response was compressed
+    if (size is None) or (media.headers.get('content-encoding') not in [None, 'identity']):
+        return None
+
+    return int(size)
+
+def prepare_download(address):
+    '''
+    Gets the temporary file of the download and the headers for continuing it (if there is an incomplete one)
+
+    Parameters:
+        address (str): The address to save the file
+    
+    Returns:
+        part_address (str): The full address of the temporary file
+        state (dict): The state of the last incomplete download (None if there isn't any)
+        offset (int): The number of the bytes already downloaded
+        headers (dict): The headers for the request
+    '''
+
+    part_address = get_part_address(address=address) # The file is written here and renamed when it's complete
+
+    state = read_part_state(part_address=part_address) # The state of the last incomplete download (if any)
+
+    if (state is not None) and (state.get('validator') is None): # Can't be sure the file hasn't changed since then
+        remove_part(part_address=part_address)
+        state = None
+
+    offset = os.path.getsize(part_address) if state is not None else 0 # Number of the bytes already downloaded
+
+    headers = dict(HEADERS)
+
+    if offset > 0: # Ask only for the rest of the file
+        headers['Range'] = f"bytes={offset}-"
+        headers['If-Range'] = state['validator'] # The server sends the whole file if it has changed
+
+    return part_address, state, offset, headers
+
+def open_part(part_address, media, offset):
+    '''
+    Opens the temporary file for the body of the response and saves it's state (with the validator of the response)
+
+    Parameters:
+        part_address (str): The full address of the temporary file
+        media (requests.Response): The response of the download (only it's headers are received)
+        offset (int): The number of the bytes already downloaded
+    
+    Returns:
+        file (file): The opened temporary file (None if the body isn't part of the file)
+    '''
+
+    if (media.status_code == 206) and (offset > 0): # The server continues where it stopped
+        return open(part_address, 'ab', buffering=DOWNLOAD_CHUNK_SIZE)
+    
+    if media.status_code == 200: # The server sends the whole file
+        # Saved before the first chunk, so a download that stops in the middle can still be continued safely
+        save_part_state(part_address=part_address, size=get_total_size(media=media, offset=0), validator=get_validator(headers=media.headers))
+
+        return open(part_address, 'wb', buffering=DOWNLOAD_CHUNK_SIZE)
+    
+    return None # Skip the body of the errors
+
+def save_interrupted_part(part_address, media, offset):
+    '''
+    Saves the state of a download that stopped in the middle so the next try continues from there
+
+    Parameters:
+        part_address (str): The full address of the temporary file
+        media (requests.Response): The response of the download (None if there isn't any)
+        offset (int): The byte that the response should start from
+    '''
+
+    if (media is not None) and (media.status_code in [200, 206]): # Keep what's downloaded for the next try
+        size = get_total_size(media=media, offset=offset)
+        save_part_state(part_address=part_address, size=size, validator=get_validator(headers=media.headers))
+
+def finish_download(link, address, media, part_address, state, offset):
+    '''
+    Checks the downloaded file and moves it to it's place if it's complete
+
+    Parameters:
+        link (str): The link of the download
+        address (str): The address to save the file
+        media (requests.Response): The response of the download
+        part_address (str): The full address of the temporary file
+        state (dict): The state of the last incomplete download (None if there wasn't any)
+        offset (int): The byte that the response should start from
+    
+    Returns:
+        result (str): The extension of the saved file (False if couldn't download the link)
+    '''
+
+    try:
+        report_rate_limit(url=link, status_code=media.status_code, retry_after=get_retry_after(headers=media.headers)) # Update the rate of the host
+
+        if media.status_code == 416: # The saved part isn't valid anymore
+            remove_part(part_address=part_address)
+            return False # Couldn't download the link
+
+        if media.status_code not in [200, 206]:
+            return False # Couldn't download the link (the saved part, if any, is kept for the next try)
+
+        extension = get_link_extension(link=link, content_type=media.headers.get('content-type', ''))
+        size = get_total_size(media=media, offset=offset)
+
+        # Probably an error, or the response isn't the rest of the saved file
+        if (extension is None) or (size == -1) or ((media.status_code == 206) and (state['size'] not in [None, size])):
+            remove_part(part_address=part_address)
+            return False # Couldn't download the link
+
+        written = os.path.getsize(part_address) # Number of the bytes of the file
+
+        if (size is not None) and (written != size): # The file isn't complete
+            if written < size: # Save the state so the next try continues from here
+                save_part_state(part_address=part_address, size=size, validator=get_validator(headers=media.headers))
+
+            else:
+                remove_part(part_address=part_address)
+
+            return False # Couldn't download the link
+        
+        os.replace(part_address, os.path.join(path, address) + extension) # Move the complete file to it's place
+        remove_part(part_address=part_address) # Remove the state
+        return extension # The file is saved with this extension
+    
+    except:
+        remove_part(part_address=part_address) # Remove the incomplete file
+        return False # Couldn't download the link
+
+def receive_download(link, headers, part_address, offset):
+    '''
+    Sends the request of the download and writes the body of the response straight to the temporary file
+
+    Parameters:
+        link (str): The link to download
+        headers (dict): The headers for the request
+        part_address (str): The full address of the temporary file
+        offset (int): The number of the bytes already downloaded
+    
+    Returns:
+        media (requests.Response): The response of the download (None if it stopped before the temporary file is opened)
+        is_complete (bool): If the whole body is received (False if the download stopped in the middle)
+    '''
+
+    file = None # Opened when the status and headers of the response are known
+    media = None
+
+    try:
+        wait_for_rate_limit(url=link) # Wait until the host allows another request
+
+        with pooled_session(url=link) as session:
+            media = session.get(link, headers=headers, timeout=60, allow_redirects=True,
+                                accept_encoding=None, stream=True) # Get the headers of the media
+
+            try:
+                file = open_part(part_address=part_address, media=media, offset=offset)
+
+                if file is not None:
+                    for chunk in media.iter_content():
+                        file.write(chunk) # Write each received chunk straight to the file
+            
+            finally:
+                media.close() # Skip the rest of the body (if any) and free the connection
+    
+    except Exception: # The download stopped in the middle (like a timeout)
+        return (media if file is not None else None), False
+    
+    finally:
+        if file is not None:
+            file.close()
+
+    return media, True
+
+def download_link_steps(link, address):
+    '''
+    Downloads the link and saves it to the address (the shared body of download_link and async_download_link)
+
+    Parameters:
+        link (str): The link to download
+        address (str): The address to save the file
+    
+    Yields:
+        step (tuple): The steps of the download
+    
+    Returns:
+        result (str): The extension of the saved file (False if couldn't download the link)
+    '''
+
+    # Continue the last incomplete download (if any)
+    part_address, state, offset, headers = yield call_step(function=prepare_download, address=address)
+
+    try:
+        media, is_complete = yield call_step(function=receive_download, async_function=async_receive_download, link=link, headers=headers,
+                                             part_address=part_address, offset=offset)
+
+        if not is_complete: # Keep what's downloaded for the next try
+            yield call_step(function=save_interrupted_part, part_address=part_address, media=media, offset=offset)
+            return False # Couldn't download the link
+
+        return (yield call_step(function=finish_download, link=link, address=address, media=media, part_address=part_address, state=state, offset=offset))
+    
+    except:
+        yield call_step(function=remove_part, part_address=part_address) # Remove the incomplete file
+        return False # Couldn't download the link
+
+def download_link(link, address):
+    '''
+    Downloads the link and saves it to the address (continues the last incomplete download if possible)
+
+    Parameters:
+        link (str): The link to download
+        address (str): The address to save the file
+    
+    Returns:
+        result (str): The extension of the saved file (False if couldn't download the link)
+    '''
+
+    # TODO: Needs change for GUI implementation
+    return run_steps(steps=download_link_steps(link=link, address=address))
+
+def try_downloading_steps(link, address, retries=3):
+    '''
+    Tries to download the link for retries times (the shared body of try_downloading and async_try_downloading)
+
+    Parameters:
+        link (str): The link to download
+        address (str): The address to save the file
+        retries (int): The number of retries for the download
+    
+    Yields:
+        step (tuple): The steps of the downloads
+    
+    Returns:
+        result (str): The extension of the saved file (False if couldn't download the link)
+    '''
+
+    for _ in range(retries + 1):
+        extension = yield download_link_steps(link=link, address=address) # Try downloading the link
+
+        if extension:
+            return extension # Link downloaded successfully
+    
+    return False # Couldn't download the link
+
+def try_downloading(link, address, retries=3):
+    '''
+    Tries to download the link for retries times
+
+    Parameters:
+        link (str): The link to download
+        address (str): The address to save the file
+        retries (int): The number of retries for the download
+    
+    Returns:
+        result (str): The extension of the saved file (False if couldn't download the link)
+    '''
+
+    return run_steps(steps=try_downloading_steps(link=link, address=address, retries=retries))
+
+def configure_downloads(workers=None, host_concurrency=None):
+    '''
+    Changes the number of the download workers and the downloads limit of each host
+
+    Parameters:
+        workers (int): The number of the workers that download at the same time
+        host_concurrency (int): The maximum number of the downloads at the same time from a single host
+    '''
+
+    global download_executor, DOWNLOAD_WORKERS, HOST_CONCURRENCY
+    with download_lock:
+        if workers is not None:
+            DOWNLOAD_WORKERS = max(1, workers)
+
+        if host_concurrency is not None:
+            HOST_CONCURRENCY = max(1, host_concurrency)
+
+        executor = download_executor
+        download_executor = None # It will be made again with the new size
+
+        host_semaphores.clear() # They will be made again with the new limit
+
+    if executor is not None:
+        executor.shutdown(wait=True) # Let the running downloads finish (they need download_lock, so it's not held here)
+
+def get_host_semaphore(link):
+    '''
+    Gets the semaphore that limits the downloads from the host of the link
+
+    Parameters:
+        link (str): The link to download
+
+    Returns:
+        semaphore (threading.BoundedSemaphore): The semaphore of the host
+    '''
+
+    host = urlparse(link).netloc # Get the host of the link
+
+    with download_lock:
+        if host not in host_semaphores: # First download from this host
+            host_semaphores[host] = threading.BoundedSemaphore(HOST_CONCURRENCY)
+
+        return host_semaphores[host]
+
+def download_job(link, address):
+    '''
+    Downloads a single job while respecting the downloads limit of its host
+
+    Parameters:
+        link (str): The link to download
+        address (str): The address to save the file
+
+    Returns:
+        result (str): The extension of the saved file (False if couldn't download the link)
+    '''
+
+    try:
+        with get_host_semaphore(link=link): # Wait for a free slot on the host
+            return try_downloading(link=link, address=address)
+
+    except:
+        return False # Couldn't download the link
+
+def submit_download(link, address):
+    '''
+    Gives the download job to the download workers
+
+    Parameters:
+        link (str): The link to download
+        address (str): The address to save the file
+
+    Returns:
+        future (concurrent.futures.Future): The future for the result of the download
+    '''
+
+    global download_executor
+    with download_lock:
+        if download_executor is None: # Make the workers pool on the first download
+            download_executor = ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix="download")
+
+        executor = download_executor
+
+    return executor.submit(download_job, link, address)
+
+def download_many(jobs, thumbnails=None):
+    '''
+    Downloads the jobs at the same time and waits for all of them (the saved files are added to the media index)
+
+    Parameters:
+        jobs (list): The list of (link, address) jobs to download
+        thumbnails (list): The size, is_video and circle of the thumbnail of each job (None for no thumbnails),
+                           each thumbnail is made on the thumbnail processes as soon as it's file is downloaded
+
+    Returns:
+        results (list): If each job is downloaded (and it's thumbnail is made) successfully or not (in the same order as jobs)
+    '''
+
+    futures = {submit_download(link=link, address=address): i for i, (link, address) in enumerate(jobs)} # Start all the downloads
+
+    results = [False] * len(jobs) # Result of each job
+    files = [] # The (address, extension) of the saved files
+    made = {} # The thumbnail of each job
+
+    for future in as_completed(futures):
+        i = futures[future]
+        address = jobs[i][1]
+
+        try:
+            extension = future.result() # Get the download
+
+        except:
+            extension = False # Couldn't download the link
+
+        if not extension:
+            continue
+
+        files.append((address, extension))
+        results[i] = True
+
+        if thumbnails is not None: # The next files are still downloading while the thumbnail is made
+            made[i] = submit_thumbnail(address=address, file=os.path.join(path, address) + extension, **thumbnails[i])
+
+    for i, future in made.items():
+        try:
+            results[i] = future.result() # Wait for the thumbnail
+        
+        except:
+            results[i] = False # Couldn't make the thumbnail
+
+    index_media(files=files) # Indexed on this thread (with their thumbnails), so the download workers don't wait for the database
+
+    return results
+
+def list_profiles():
+    '''
+    Lists the profiles in the database
+    '''
+
+    # TODO: Needs change for GUI implementation
+    try:
+        if os.name == 'nt': # Clearing the screen
+            os.system('cls')
+
+        else:
+            os.system('clear')
+        
+        query = ["""SELECT username, full_name, biography, media_count,
+                 follower_count, following_count FROM Profile"""]
+        
+        profiles = execute_query(queries=query, commit=False, fetch=True) # Get the list of profiles
+
+        if profiles == False:
+            print("Couldn't list the profiles!")
+            return # There was an error in getting the profiles
+
+        for profile in profiles:
+            biography = profile[2]
+            if biography is None:
+                biography = ''
+
+            print(profile[0] + ":\n" + profile[1] + "\n" + biography + "\nPosts: " + str(profile[3])
+                + "\nFollowers: " + str(profile[4]) + "\nFollowings: " + str(profile[5])) # Show the details of each profile
+            print("---------------------------------")
+    
+    except:
+        print("Couldn't list the profiles!") # There was an error somewhere
+
+def move_profile_history(pk, profile_id):
+    '''
+    Moves the past profile files (if any) to History folder
+
+    Parameters:
+        pk (int): The pk of the profile
+        profile_id (int): The id of the profile
+    
+    Returns:
+        result (bool): If the profile is moved to history successfully or not
+    '''
+
+    try:
+        folder_name = find_folder_name(pk=pk) # Get the folder name for the profile
+
+        if folder_name is None:
+            return True # No profile folder to move
+        
+        address = os.path.join(f"{folder_name}", "Profiles", "Profile") # The address of the profile picture
+
+        if (find_media(address=address) is None) and (not os.path.exists(os.path.join(path, get_thumbnail_address(address=address)))):
+            return True # No profile files to move
+        
+        if not os.path.exists(os.path.join(path, f"{folder_name}", "Profiles", "History")): # Make the History folder
+            os.mkdir(os.path.join(path, f"{folder_name}", "Profiles", "History"))
+
+        # Change the name from Profile(_thumbnail) to {profile_id} in the History folder
+        return move_media(address=address, new_address=os.path.join(f"{folder_name}", "Profiles", "History", f"{profile_id}"))
+    
+    except:
+        return False # Couldn't move the profile to history
+
+def get_browser_loop():
+    '''
+    Gets the event loop of the browser thread (the browser and it's tabs live on this loop between lookups)
+
+    Returns:
+        loop (asyncio.AbstractEventLoop): The event loop of the browser thread
+    '''
+
+    import asyncio
+
+    global browser_loop
+    with browser_lock:
+        if browser_loop is None: # Start the browser thread on the first lookup
+            browser_loop = asyncio.new_event_loop()
+
+            threading.Thread(target=browser_loop.run_forever, name="browser", daemon=True).start()
+
+        return browser_loop
+
+def run_in_browser(coroutine):
+    '''
+    Runs the coroutine on the browser thread and waits for it's result
+
+    Parameters:
+        coroutine (coroutine): The coroutine to run
+    
+    Returns:
+        result (any): The result of the coroutine
+    '''
+
+    import asyncio
+
+    return asyncio.run_coroutine_threadsafe(coroutine, get_browser_loop()).result()
+
+async def warm_tab(pool, tab):
+    '''
+    Puts the tab on the search page and gives it back to the pool (a new tab is opened if it's broken or used too many times)
+
+    Parameters:
+        pool (dict): The browser pool
+        tab (dict): The tab and the number of it's lookups
+    '''
+
+    import zendriver as zd
+
+    try:
+        if (tab['page'] is not None) and ((tab['lookups'] >= BROWSER_MAX_LOOKUPS) or tab['page'].closed): # Recycle the tab
+            try:
+                await tab['page'].close()
+            
+            except:
+                pass # The tab is already closed
+
+            tab['page'] = None
+        
+        if tab['page'] is None: # Open a new tab
+            tab['page'] = await pool['browser'].get(ANONYIG_URL, new_tab=True)
+            tab['lookups'] = 0
+
+            # Add the handlers that catch the profile data of the lookups of this tab
+            tab['page'].add_handler(zd.cdp.network.ResponseReceived, partial(response_handler, tab=tab))
+            tab['page'].add_handler(zd.cdp.network.LoadingFinished, partial(loading_handler, tab=tab))
+            tab['page'].add_handler(zd.cdp.network.LoadingFailed, partial(loading_handler, tab=tab))
+        
+        else: # Go back to the search page
+            await tab['page'].get(ANONYIG_URL)
+
+        # Wait for the search form to load
+        await tab['page'].wait_for('input[type=text]')
+        await tab['page'].wait_for('button[class=search-form__button]')
+
+        await tab['page'].wait_for_ready_state(until='complete') # Wait for the scripts of the search form
+    
+    except:
+        tab['lookups'] = BROWSER_MAX_LOOKUPS # The tab is broken, it's replaced on the next use
+
+    if tab['browser'] is pool['browser']: # The tabs of a stopped browser aren't used again
+        pool['tabs'].put_nowait(tab)
+
+async def check_tab(pool, tab):
+    '''
+    Checks if the tab is still usable (the browser is running and the search bar is there)
+
+    Parameters:
+        pool (dict): The browser pool
+        tab (dict): The tab and the number of it's lookups
+    
+    Returns:
+        result (bool): If the tab is healthy or not
+    '''
+
+    import asyncio
+
+    try:
+        if (tab['page'] is None) or tab['page'].closed or pool['browser'].stopped or (tab['lookups'] >= BROWSER_MAX_LOOKUPS):
+            return False
+        
+        check = tab['page'].evaluate("document.querySelector('input[type=text]') !== null")
+
+        return (await asyncio.wait_for(check, timeout=5)) is True
+    
+    except:
+        return False # The tab doesn't respond
+
+async def get_browser_pool():
+    '''
+    Gets the browser pool (starts the browser and opens the warm tabs if it's not running)
+
+    Returns:
+        pool (dict): The browser pool
+    '''
+
+    import asyncio
+    import zendriver as zd
+
+    global browser_pool
+    if browser_pool is None:
+        browser_pool = {
+            'browser': None, # The running browser
+            'tabs': asyncio.Queue(), # The idle tabs
+            'lock': asyncio.Lock(), # Lock for starting the browser
+            'tasks': set(), # The tabs that are going back to the search page
+        }
+    
+    pool = browser_pool
+
+    async with pool['lock']:
+        if (pool['browser'] is None) or pool['browser'].stopped: # Start (or restart) the browser
+            await stop_browser(pool=pool)
+
+            pool['browser'] = await zd.start(browser_args=BROWSER_ARGS) # Create a new browser instance in headless mode
+
+            tabs = [{'browser': pool['browser'], 'page': None, 'lookups': 0, 'future': None, 'request_id': None} for _ in range(max(1, BROWSER_TABS))]
+
+            await asyncio.gather(*[warm_tab(pool=pool, tab=tab) for tab in tabs]) # Open the tabs on the search page
+    
+    return pool
+
+async def borrow_tab():
+    '''
+    Borrows a healthy warm tab from the browser pool
+
+    Returns:
+        pool (dict): The browser pool
+        tab (dict): The tab and the number of it's lookups (None if there isn't a healthy tab)
+    '''
+
+    pool = await get_browser_pool()
+
+    for _ in range(max(1, BROWSER_TABS) + 1):
+        tab = await pool['tabs'].get() # Wait for an idle tab
+
+        if tab['browser'] is not pool['browser']:
+            continue # The tab of a stopped browser
+        
+        if await check_tab(pool=pool, tab=tab):
+            return pool, tab # Return the healthy tab
+        
+        tab['lookups'] = BROWSER_MAX_LOOKUPS # Replace the broken tab with a new one
+        await warm_tab(pool=pool, tab=tab)
+    
+    return pool, None # Couldn't get a healthy tab
+
+def give_back_tab(pool, tab):
+    '''
+    Gives the tab back to the pool after a lookup (it goes back to the search page in the background)
+
+    Parameters:
+        pool (dict): The browser pool
+        tab (dict): The tab and the number of it's lookups
+    '''
+
+    import asyncio
+
+    tab['lookups'] += 1
+
+    task = asyncio.ensure_future(warm_tab(pool=pool, tab=tab))
+
+    pool['tasks'].add(task) # Keep the task until it's done
+    task.add_done_callback(pool['tasks'].discard)
+
+async def stop_browser(pool):
+    '''
+    Stops the browser of the pool and forgets it's tabs
+
+    Parameters:
+        pool (dict): The browser pool
+    '''
+
+    browser = pool['browser']
+    pool['browser'] = None
+
+    while not pool['tabs'].empty():
+        pool['tabs'].get_nowait() # Forget the idle tabs
+    
+    if browser is not None:
+        try:
+            await browser.stop() # Stop the browser
+        
+        except:
+            pass # The browser is already stopped
+
+def close_browser_pool():
+    '''
+    Stops the browser and closes it's tabs (it's started again on the next lookup)
+    '''
+
+    if (browser_loop is None) or (browser_pool is None):
+        return # The browser isn't started
+
+    try:
+        run_in_browser(coroutine=stop_browser(pool=browser_pool))
+    
+    except:
+        pass # Couldn't stop the browser
+
+async def response_handler(evt: 'zd.cdp.network.ResponseReceived', tab):
+    '''
+    Handles the response event for the profile data (remembers the request of the lookup that is waiting on the tab)
+
+    Parameters:
+        evt (zd.cdp.network.ResponseReceived): The event object
+        tab (dict): The tab that the event came from
+    '''
+
+    import zendriver as zd
+
+    # Check if the event resource type is XHR
+    if evt.type_ is zd.cdp.network.ResourceType.XHR:
+        # Check if the event url contains 'userInfo' (this is the request that contains the user profile data)
+        if 'userInfo' in evt.response.url:
+            if (tab['future'] is not None) and not tab['future'].done(): # A lookup is waiting for it
+                tab['request_id'] = evt.request_id
+
+async def loading_handler(evt, tab):
+    '''
+    Handles the loading finished (or failed) event for the profile data (gives the body of the response to the waiting lookup)
+
+    Parameters:
+        evt (zd.cdp.network.LoadingFinished | zd.cdp.network.LoadingFailed): The event object
+        tab (dict): The tab that the event came from
+    '''
+
+    import zendriver as zd
+
+    future = tab['future']
+
+    if (future is None) or future.done() or (evt.request_id != tab['request_id']):
+        return # Not the request of the lookup
+    
+    tab['request_id'] = None
+
+    if isinstance(evt, zd.cdp.network.LoadingFailed):
+        future.set_result(None) # The request has failed
+        return
+
+    try:
+        # Get the profile data
+        data = await tab['page'].send(zd.cdp.network.get_response_body(evt.request_id))
+    
+    except:
+        data = None # Couldn't get the body of the response
+    
+    if not future.done():
+        future.set_result(data)
+
+async def profile_data_api(username):
+    '''
+    Calls the API to get the profile data
+
+    Parameters:
+        username (str): The username of the user
+    
+    Returns:
+        data (str): The profile data of the user
+    '''
+
+    import asyncio
+
+    try:
+        pool, tab = await borrow_tab() # Get a tab that is already on the search page
+
+        if tab is None:
+            return None # Couldn't open the search page
+    
+    except:
+        return None # Couldn't start the browser
+
+    try:
+        page = tab['page']
+
+        # The response of this lookup is given to this future by the handlers of the tab
+        tab['future'] = asyncio.get_running_loop().create_future()
+        tab['request_id'] = None
+
+        # Find the search bar
+        username_input = await page.select('input[type=text]')
+
+        # Enter the username in the search bar
+        await username_input.clear_input()
+        await username_input.send_keys(username)
+
+        # Find the search button
+        search_button = await page.select('button[class=search-form__button]')
+
+        # Click the search button
+        await search_button.click()
+
+        # Wait for the body of the userInfo request (the page doesn't need to show it)
+        return await asyncio.wait_for(tab['future'], timeout=60)
+    
+    except:
+        return None # There was an error
+    
+    finally:
+        if tab['future'] is not None:
+            tab['future'].cancel() # Nothing is waiting for the response anymore
+        
+        tab['future'] = None
+        tab['request_id'] = None
+
+        give_back_tab(pool=pool, tab=tab) # The tab goes back to the search page for the next lookup
+
+async def profiles_data_api(usernames):
+    '''
+    Calls the API to get the profile data of many users (each warm tab looks up one user at a time)
+
+    Parameters:
+        usernames (list): The usernames of the users
+    
+    Returns:
+        data (dict): The profile data of each user (None if it couldn't be fetched)
+    '''
+
+    import asyncio
+
+    usernames = list(dict.fromkeys(usernames)) # Look up each user once
+
+    # The lookups wait for the idle tabs, so they run as many at a time as there are tabs
+    results = await asyncio.gather(*[profile_data_api(username=username) for username in usernames])
+
+    return dict(zip(usernames, results)) # Return the result of each user
+
+def get_anonyig_profile_info_steps(username):
+    '''
+    Gets the profile's information from anonyig (the shared body of get_anonyig_profile_info and async_get_anonyig_profile_info)
+
+    Parameters:
+        username (str): The username of the profile
+    
+    Yields:
+        step (tuple): The steps of the lookup
+    
+    Returns:
+        user (dict): The profile's information
+    '''
+
+    try:
+        # The browser and it's tabs live on the browser thread, so the lookup runs there
+        response = yield call_step(function=run_in_browser, async_function=async_run_in_browser, coroutine=profile_data_api(username=username))
+
+        return parse_anonyig_profile_info(response=response) # Return the profile's information
+
+    except:
+        return None # Couldn't get the data
+
+def get_anonyig_profile_info(username):
+    '''
+    Gets the profile's information from anonyig
+
+    Parameters:
+        username (str): The username of the profile
+    
+    Returns:
+        user (dict): The profile's information
+    '''
+
+    return run_steps(steps=get_anonyig_profile_info_steps(username=username))
+
+def get_anonyig_profiles_info(usernames):
+    '''
+    Gets the information of many profiles from anonyig at the same time
+
+    Parameters:
+        usernames (list): The usernames of the profiles
+    
+    Returns:
+        users (dict): The information of each profile (the error message if it couldn't be fetched)
+    '''
+
+    try:
+        responses = run_in_browser(coroutine=profiles_data_api(usernames=usernames)) # Spread the lookups on the tabs of the browser
+    
+    except:
+        return {username: "Couldn't start the browser" for username in usernames}
+    
+    users = {}
+    for username, response in responses.items():
+        user = parse_anonyig_profile_info(response=response)
+
+        if (user is not None) and (str(user.get('username', '')).lower() != username.lower()):
+            user = None # The response isn't for this profile
+
+        users[username] = user if user is not None else "Couldn't get the profile's information"
+    
+    return users # Return the information of each profile
+
+def parse_anonyig_profile_info(response):
+    '''
+    Gets the profile's information from the anonyig response
+
+    Parameters:
+        response (tuple): The body of the response and if it's base64 encoded
+    
+    Returns:
+        user (dict): The profile's information
+    '''
+
+    try:
+        if response is None:
+            return None # Couldn't get the data
+        
+        data = json.loads(response[0]) # Parse the data to json
+
+        return data['result'][0]['user'] # Return the profile's information
+    
+    except:
+        return None # Couldn't get the data
+
+def get_profile_data_steps(username):
+    '''
+    Gets the profile's data (the shared body of get_profile_data and async_get_profile_data)
+
+    Parameters:
+        username (str): The username of the profile
+    
+    Yields:
+        step (tuple): The steps of the providers
+    
+    Returns:
+        profile (dict): The profile's data
+    '''
+
+    try:
+        data, source = yield call_provider_steps(interface='profile_info', with_provider=True, username=username) # Get the profile's information
+
+        if data is None:
+            return None # Couldn't get the data
+
+        return parse_profile_data(data=data, username=username, source=source) # Return profile's data
+
+    except:
+        return None # Couldn't get the data
+
+def get_profile_data(username):
+    '''
+    Gets the profile's data
+
+    Parameters:
+        username (str): The username of the profile
+    
+    Returns:
+        profile (dict): The profile's data
+    '''
+
+    return run_steps(steps=get_profile_data_steps(username=username))
+
+def get_profiles_data(usernames):
+    '''
+    Gets the data of many profiles (looked up on the tabs of the browser at the same time)
+
+    Parameters:
+        usernames (list): The usernames of the profiles
+    
+    Returns:
+        profiles (dict): The data of each profile (the error message if it couldn't be fetched)
+    '''
+
+    profiles = {}
+    for username, data in get_anonyig_profiles_info(usernames=usernames).items():
+        if isinstance(data, dict):
+            data = parse_profile_data(data=data, username=username, source='anonyig')
+        
+        else:
+            data = get_profile_data(username=username) # Try the other providers
+        
+        profiles[username] = data if data is not None else "Couldn't get the profile's data"
+    
+    return profiles # Return the data of each profile
+
+def parse_profile_data(data, username, source):
+    '''
+    Makes the profile's data from the profile's information
+
+    Parameters:
+        data (dict): The profile's information
+        username (str): The username of the profile
+        source (str): The provider that the information is got from (api for the HTTP API)
+    
+    Returns:
+        profile (dict): The profile's data
+    '''
+
+    try:
+        profile = {
+            'pk': int(data["pk"]),
+            'username': data["username"],
+            'full_name': data["full_name"],
+            'page_name': data.get("page_name"),
+            'biography': data["biography"],
+        }
+
+        is_private = data["is_private"]
+        if is_private:
+            is_private = 1
+        else:
+            is_private = 0
+        
+        profile['is_private'] = is_private
+
+        if "public_email" in data.keys():
+            public_email = data["public_email"]
+
+            if public_email == '':
+                public_email = None
+
+        else:
+            public_email = None
+
+        profile['public_email'] = public_email
+        profile['media_count'] = data["media_count"]
+        profile['follower_count'] = data["follower_count"]
+        profile['following_count'] = data["following_count"]
+
+        if "profile_pic_id" in data.keys():
+            profile_id = data["profile_pic_id"]
+            profile_id = int(profile_id[:profile_id.index('_')])
+        
+        else:
+            profile_id = profile['pk']
+
+        profile['profile_id'] = profile_id
+        profile['original_profile_pic_link'] = data["hd_profile_pic_url_info"]["url"]
+        profile['original_profile_pic'] = os.path.join(f"{username}@{profile['pk']}", "Profiles", "Profile")
+        profile['source'] = source
+
+        with profile_source_lock:
+            profile_sources[source] = profile_sources.get(source, 0) + 1 # Record the provider that the profile's data is got from
+
+        return profile # Return profile's data
+
+    except:
+        return None # Couldn't get the data
+
+def get_pk_username(pk):
+    '''
+    Gets the username of the given pk
+
+    Parameters:
+        pk (int): The pk of the profile
+    
+    Returns:
+        username (str): The username of the profile
+    '''
+
+    info = get_pk_profile_info(pk=pk) # Get the profile's information
+
+    if info is None:
+        return None # Couldn't get the username
+    
+    return info['username']
+
+def get_pk_profile_info_steps(pk):
+    '''
+    Gets the profile's information of the given pk from the HTTP API (the shared body of get_pk_profile_info and async_get_pk_profile_info)
+
+    Parameters:
+        pk (int): The pk of the profile
+    
+    Yields:
+        step (tuple): The steps of the request
+    
+    Returns:
+        user (dict): The profile's information
+    '''
+
+    try:
+        response = yield send_request_steps(url=get_pk_info_link(pk=pk), method='GET', headers=PK_INFO_HEADERS)
+        response = response.json() # Get the profile's data
+
+        if 'user' in response.keys(): # If the data is found
+            return response['user']
+
+        return None # Couldn't get the information
+
+    except:
+        return None # Couldn't get the data
+
+def get_pk_profile_info(pk):
+    '''
+    Gets the profile's information of the given pk from the HTTP API (no browser is needed)
+
+    Parameters:
+        pk (int): The pk of the profile
+    
+    Returns:
+        user (dict): The profile's information
+    '''
+
+    return run_steps(steps=get_pk_profile_info_steps(pk=pk))
+
+def parse_pk_profile_info(info):
+    '''
+    Makes the profile's data from the profile's information of the HTTP API
+
+    Parameters:
+        info (dict): The profile's information of the HTTP API
+    
+    Returns:
+        profile (dict): The profile's data (None if the information isn't complete, so the browser should be used)
+    '''
+
+    try:
+        if any(field not in info for field in PK_INFO_FIELDS):
+            return None # The API didn't give all of the fields
+        
+        return parse_profile_data(data=info, username=info['username'], source='api') # Return profile's data
+    
+    except:
+        return None # Couldn't get the data
+
+def get_pk_info_link(pk):
+    '''
+    Gets the link for the profile's information by it's pk
+
+    Parameters:
+        pk (int): The pk of the profile
+    
+    Returns:
+        link (str): The link of the profile's information
+    '''
+
+    return f'https://i.instagram.com/api/v1/users/{pk}/info/'
+
+def change_profile_username(pk, old_username, new_username):
+    '''
+    Changes the profile's username
+
+    Parameters:
+        pk (int): The pk of the profile
+        old_username (str): The old username of the profile
+        new_username (str): The new username of the profile
+    
+    Returns:
+        result (bool): If the username is changed successfully or not
+    '''
+
+    try:
+        folder_name = find_folder_name(pk=pk) # Get the folder name for the profile
+
+        if folder_name is not None:
+            os.rename(os.path.join(path, folder_name), os.path.join(path, f"{new_username}@{pk}")) # Change the folder name
+
+            remember_folder_name(pk=pk, folder_name=f"{new_username}@{pk}")
+    
+    except:
+        return False # Couldn't change the folder name
+
+    query = [("""UPDATE Profile SET username = ? WHERE
+                username = ?""", (new_username, old_username))]
+    
+    try:
+        with transaction(): # The username and the addresses of it's files are changed together
+            if folder_name is not None:
+                rename_media_folder(folder=folder_name, new_folder=f"{new_username}@{pk}") # Change the addresses of it's files
+
+            execute_query(queries=query, commit=True, fetch=None) # Change the username in the database
+        
+        return True # Username changed successfully
+    
+    except:
+        if folder_name is not None: # If the folder name was changed
+            try:
+                os.rename(os.path.join(path, f"{new_username}@{pk}"), os.path.join(path, folder_name))
+
+                remember_folder_name(pk=pk, folder_name=folder_name)
+            
+            except:
+                pass # Couldn't change the folder name back
+        
+        return False # Couldn't change the username
+
+def add_profile(username):
+    '''
+    Adds a profile to the database
+
+    Parameters:
+        username (str): The username of the profile
+    
+    Returns:
+        result (bool): If the profile is added successfully or not
+    '''
+
+    try:
+        data = get_profile_data(username=username) # Get the profile's data
+        if data is None:
+            print("There was an error!")
+            return # Couldn't get the data
+        
+        query = [("""SELECT pk, username FROM Profile WHERE pk = ?""", (data['pk'],))]
+
+        does_exist = execute_query(queries=query, commit=False, fetch=True) # Get the pk information
+        
+        if does_exist == False:
+            print("There was an error!")
+            return # Couldn't get the pk information
+
+        if len(does_exist) != 0: # If the pk is already added
+            if does_exist[0][1] == data['username']: # If the username is the same
+                print("This account is already added!")
+                return # Profile already exist, don't need to continue
+            
+            if not change_profile_username(pk=data['pk'], old_username=does_exist[0][1], new_username=data['username']):
+                print("There was an error!")
+                return # Couldn't change the username
+            
+            if not update_profile(username=data['username'], profile_data=data): # Update the profile
+                print("There was an error!")
+
+            return # Username changed successfully and profile updated
+        
+        if not os.path.exists(os.path.join(path, f"{data['username']}@{data['pk']}")): # Make the profile folder
+            os.mkdir(os.path.join(path, f"{data['username']}@{data['pk']}"))
+        
+        remember_folder_name(pk=data['pk'], folder_name=f"{data['username']}@{data['pk']}")
+        
+        if not os.path.exists(os.path.join(path, f"{data['username']}@{data['pk']}", "Profiles")): # Make the Profiles folder
+            os.mkdir(os.path.join(path, f"{data['username']}@{data['pk']}", "Profiles"))
+        
+        # Else if Profiles folder exist then move the past profile files (if any) to History folder
+        elif not move_profile_history(pk=data['pk'], profile_id=int(time())):
+            print("Couldn't Move the past profile to history!")
+            return
+        
+        # Try downloading the profile picture
+        isDownloaded = download_many(jobs=[(data['original_profile_pic_link'], data['original_profile_pic'])])[0]
+
+        if not isDownloaded: # Couldn't download the profile picture
+            print("There was an error!")
+            return
+    
+    except:
+        print("There was an error!")
+        return # Couldn't add the profile
+    
+    try:
+        # Try Making a thumbnail for the profile picture
+        if not make_thumbnail(address=data['original_profile_pic'], size=128, circle=True):
+            print("There was an error!")
+            return # Couldn't make the thumbnail
+
+        if data['biography'] == '':
+            data['biography'] = None
+        
+        query = ("""INSERT INTO Profile VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL)""",
+                 (data['pk'], data['username'], data['full_name'], data['page_name'], data['biography'], data['is_private'],
+                  data['public_email'], data['media_count'], data['follower_count'], data['following_count'], data['profile_id']))
+        
+        queries = [query, # Add the profile to the database
+                   ("""INSERT INTO Highlight VALUES(?, ?, "Stories", 0)""", (data['pk'], data['pk']))] # Add a default highlight for the stories (highlight_id = pk)
+
+        result = execute_query(queries=queries, commit=True, fetch=None) # Add the profile to the database
+        
+        if result == False: # Couldn't add the profile
+            try:
+                remove_media(address=data['original_profile_pic']) # Remove the profile files
+            
+            except:
+                pass # Couldn't remove the profile files
+
+            print("There was an error!") # Couldn't add the profile
+            return
+        
+        if not data['is_private']:
+            update_highlights(pk=data['pk']) # If the account isn't private then update it's highlights
+
+        list_profiles() # Update the screen
+
+    except:
+        try:
+            remove_media(address=data['original_profile_pic']) # Remove the profile files
+        
+        except:
+            pass # Couldn't remove the profile files
+
+        print("There was an error!") # Couldn't add the profile
+
+def update_profile_steps(username, with_highlights=True, profile_data=None):
+    '''
+    Updates the profile (the shared body of update_profile and async_update_profile)
+
+    Parameters:
+        username (str): The username of the profile
+        with_highlights (bool): Should the highlights be updated or not
+        profile_data (dict): The profile's data (if already fetched)
+    
+    Yields:
+        step (tuple): The steps of the update
+    
+    Returns:
+        result (bool): If the profile is updated successfully or not
+    '''
+
+    try:
+        query = [("""SELECT pk, profile_id FROM Profile
+                 WHERE username = ?""", (username,))]
+
+        user_data = yield call_step(function=execute_query, queries=query, commit=False, fetch=False) # Get current information of user
+
+        if user_data == False:
+            print("Couldn't update profile")
+            return False
+
+        if profile_data is None: # If the profile's data is not already fetched (function not called from add_profile)
+            info = yield get_pk_profile_info_steps(pk=user_data[0]) # Get the profile's information from the HTTP API
+
+            if info is None:
+                print("Couldn't update profile")
+                return False
+
+            new_username = info['username'] # Get the username of the profile
+
+            if new_username != username: # If the username has changed
+                if not (yield call_step(function=change_profile_username, pk=user_data[0], old_username=username, new_username=new_username)):
+                    print("Couldn't update profile")
+                    return False
+
+                username = new_username # Change the username to the new username
+
+            new_data = parse_pk_profile_info(info=info) # Most of the times the HTTP API has all of the data
+
+            if new_data is None:
+                new_data = yield get_profile_data_steps(username=username) # Get new information of user from the browser
+
+            if new_data is None:
+                print("Couldn't update profile")
+                return False
+
+        else:
+            new_data = profile_data # Use the profile's data passed as argument
+
+        # Make the folders and move the past profile to history
+        profile_changed = yield call_step(function=prepare_profile_folders, user_data=user_data, new_data=new_data)
+
+        if profile_changed is None:
+            print("Couldn't update profile")
+            return False
+
+        # Try downloading the profile picture
+        isDownloaded = (yield call_step(function=download_many, async_function=async_download_many,
+                                        jobs=[(new_data['original_profile_pic_link'], new_data['original_profile_pic'])]))[0]
+
+        if not isDownloaded: # Couldn't download the profile picture
+            print("Couldn't update profile")
+            return False
+
+    except:
+        print("Couldn't update profile")
+        return False
+
+    try:
+        # Try Making a thumbnail for the profile picture
+        if not (yield call_step(function=make_thumbnail, address=new_data['original_profile_pic'], size=128, circle=True)):
+            print("Couldn't update profile")
+            return False
+
+        # Update the profile's information in database
+        if not (yield call_step(function=save_profile_update, user_data=user_data, new_data=new_data, profile_changed=profile_changed)):
+            print("Couldn't update profile")
+            return False
+
+        if with_highlights and (not new_data['is_private']):
+            yield update_highlights_steps(pk=new_data['pk']) # If the account isn't private then update it's highlights
+
+        return True # Profile updated successfully
+
+    except:
+        print("Couldn't update profile")
+        return False # Threre was an error somewhere
+
+def update_profile(username, with_highlights=True, profile_data=None):
+    '''
+    Updates the profile
+
+    Parameters:
+        username (str): The username of the profile
+        with_highlights (bool): Should the highlights be updated or not
+        profile_data (dict): The profile's data (if already fetched)
+    
+    Returns:
+        result (bool): If the profile is updated successfully or not
+    '''
+
+    updated = run_steps(steps=update_profile_steps(username=username, with_highlights=with_highlights, profile_data=profile_data))
+
+    if updated:
+        list_profiles() # Update the screen
+
+    return updated
+
+def update_profiles(usernames, with_highlights=True):
+    '''
+    Updates many profiles (their data is looked up on the tabs of the browser at the same time)
+
+    Parameters:
+        usernames (list): The usernames of the profiles
+        with_highlights (bool): Should the highlights be updated or not
+    
+    Returns:
+        results (dict): If each profile is updated successfully or not (the error message if it's not)
+    '''
+
+    results = {}
+    current_usernames = {}
+    profiles = {}
+    for username in dict.fromkeys(usernames):
+        query = [("""SELECT pk FROM Profile WHERE username = ?""", (username,))]
+
+        result = execute_query(queries=query, commit=False, fetch=False)
+
+        if not result:
+            results[username] = "The profile isn't added"
+            continue
+
+        info = get_pk_profile_info(pk=result[0]) # Get the profile's information from the HTTP API
+
+        if info is None:
+            results[username] = "Couldn't get the profile's username"
+            continue
+        
+        new_username = info['username'] # Get the username of the profile
+        
+        if new_username != username: # If the username has changed
+            if not change_profile_username(pk=result[0], old_username=username, new_username=new_username):
+                results[username] = "Couldn't change the profile's username"
+                continue
+        
+        current_usernames[new_username] = username
+        profiles[new_username] = parse_pk_profile_info(info=info) # Most of the times the HTTP API has all of the data
+    
+    missing = [new_username for new_username, data in profiles.items() if data is None]
+
+    if missing:
+        profiles.update(get_profiles_data(usernames=missing)) # Look up the rest of the profiles on the browser at once
+
+    for new_username, data in profiles.items():
+        username = current_usernames[new_username]
+
+        if not isinstance(data, dict):
+            results[username] = data # The error message
+        
+        elif update_profile(username=new_username, with_highlights=with_highlights, profile_data=data):
+            results[username] = True # Profile updated successfully
+        
+        else:
+            results[username] = "Couldn't update the profile"
+    
+    return results # Return the result of each profile
+
+def prepare_profile_folders(user_data, new_data):
+    '''
+    Makes the folders of the profile and moves the past profile to history if the profile picture has changed
+
+    Parameters:
+        user_data (tuple): The pk and profile_id of the profile in the database
+        new_data (dict): The profile's new data
+    
+    Returns:
+        profile_changed (bool): If the profile picture has changed (None if there was an error)
+    '''
+
+    try:
+        # Check if profile picture has changed and the last profile isn't default icon
+        profile_changed = (user_data[1] != new_data['profile_id']) and (user_data[0] != user_data[1])
+
+        if not os.path.exists(os.path.join(path, f"{new_data['username']}@{new_data['pk']}")): # Make the profile folder
+            os.mkdir(os.path.join(path, f"{new_data['username']}@{new_data['pk']}"))
+        
+        remember_folder_name(pk=new_data['pk'], folder_name=f"{new_data['username']}@{new_data['pk']}")
+        
+        if not os.path.exists(os.path.join(path, f"{new_data['username']}@{new_data['pk']}", "Profiles")): # Make the Profiles folder
+            os.mkdir(os.path.join(path, f"{new_data['username']}@{new_data['pk']}", "Profiles"))
+        
+        elif profile_changed: # Profile picture has changed
+            if not move_profile_history(pk=user_data[0], profile_id=user_data[1]): # Move the past profile to history
+                return None
+        
+        return profile_changed
+    
+    except:
+        return None # Couldn't make the folders
+
+def save_profile_update(user_data, new_data, profile_changed):
+    '''
+    Updates the profile's information in database (removes the new profile picture if it couldn't)
+
+    Parameters:
+        user_data (tuple): The pk and profile_id of the profile in the database
+        new_data (dict): The profile's new data
+        profile_changed (bool): If the profile picture has changed
+    
+    Returns:
+        result (bool): If the profile is updated successfully or not
+    '''
+
+    try:
+        if new_data['biography'] == '':
+            new_data['biography'] = None
+        
+        query = ("""UPDATE Profile SET full_name = ?, page_name = ?, biography = ?, is_private = ?, public_email = ?,
+                 media_count = ?, follower_count = ?, following_count = ?, profile_id = ? WHERE pk = ?""",
+                 (new_data['full_name'], new_data['page_name'], new_data['biography'], new_data['is_private'], new_data['public_email'],
+                  new_data['media_count'], new_data['follower_count'], new_data['following_count'], new_data['profile_id'], new_data['pk']))
+        
+        queries = [query] # Update the profile's information in database
+
+        if profile_changed: # Profile picture has changed
+            queries.append(("""INSERT INTO ProfileHistory VALUES(?, ?)""", (new_data['pk'], user_data[1]))) # Add the past profile to history
+        
+        result = execute_query(queries=queries, commit=True, fetch=None) # Update the profile's information in database
+
+        if result == False: # Couldn't update the profile
+            if profile_changed: # Profile picture has changed
+                try:
+                    remove_media(address=new_data['original_profile_pic']) # Remove the profile files
+                
+                except:
+                    pass # Couldn't remove the profile files
+
+            return False
+
+        return True # Profile updated successfully
+    
+    except:
+        if profile_changed: # Profile picture has changed
+            try:
+                remove_media(address=new_data['original_profile_pic']) # Remove the profile files
+            
+            except:
+                pass # Couldn't remove the profile files
+
+        return False # Threre was an error somewhere
+
+def check_duplicate_stories(pk, story_pk, highlight_id, highlight_title, stories, folder_name):
+    '''
+    Checks if the story is already downloaded
+
+    Parameters:
+        pk (int): The profile's pk
+        story_pk (int): The story's pk
+        highlight_id (int): The highlight's id
+        highlight_title (str): The highlight's title
+        stories (dict): The downloaded stories of each story_pk (by their highlight_id)
+        folder_name (str): The folder name for the profile
+    
+    Returns:
+        result (bool): If the story already exists and downloaded or not
+    '''
+
+    try:
+        same_stories = stories.get(story_pk, {}) # The downloaded stories with the same story_pk
+
+        if highlight_id in same_stories: # An story with same story_pk and highlight_id is already downloaded
+            return True # Story already downloaded
+        
+        if len(same_stories) == 0:
+            return False # Couldn't find the story
+        
+        isHighlight = pk != highlight_id # highlight_id = pk is for stories
+
+        for story in list(same_stories.values()): # Try every downloaded copy (the files of one of them may be missing)
+            if story[2] == pk: # It was a story before and now it's a highlight
+                try:
+                    # Check if the files exist, if yes then copy them to the highlight folder
+                    if copy_media(address=os.path.join(f"{folder_name}", "Stories", f"{story_pk}"),
+                                  new_address=os.path.join(f"{folder_name}", "Highlights", f"{highlight_title}_{highlight_id}", f"{story_pk}")):
+                        query = [("""INSERT INTO Story VALUES(?, ?, ?, ?)""", (story[0], story[1], highlight_id, story[3]))]
+                    
+                        result = execute_query(queries=query, commit=True, fetch=None) # Add the story to the database
+
+                        if result == False:
+                            return False # Something went wrong but we know it's not from the same highlight
+                    
+                        same_stories[highlight_id] = (story[0], story[1], highlight_id, story[3]) # It's downloaded for this highlight too
+                        return True
+            
+                except:
+                    return False # Something went wrong but we know it's not from the same highlight
+
+            else: # It's from another highlight
+                try:
+                    folders = glob.glob(os.path.join(path, f"{folder_name}", "Highlights", f"*_{story[2]}"))
+                    if len(folders) == 1:
+                        address = os.path.join(os.path.relpath(folders[0], path), f"{story_pk}") # The address of the story in the other highlight
+
+                        if isHighlight:
+                            new_address = os.path.join(f"{folder_name}", "Highlights", f"{highlight_title}_{highlight_id}", f"{story_pk}")
+                    
+                        else:
+                            new_address = os.path.join(f"{folder_name}", "Stories", f"{story_pk}")
+
+                        if copy_media(address=address, new_address=new_address): # Check if the files exist, if yes then copy them to the highlight folder
+                            query = [("""INSERT INTO Story VALUES(?, ?, ?, ?)""", (story[0], story[1], highlight_id, story[3]))]
+                        
+                            result = execute_query(queries=query, commit=True, fetch=None) # Add the story to the database
+
+                            if result == False:
+                                return False # Something went wrong but we know it's not from the same highlight
+                        
+                            same_stories[highlight_id] = (story[0], story[1], highlight_id, story[3]) # It's downloaded for this highlight too
+                            return True
+                    
+                except:
+                    return False # Something went wrong but we know it's not from the same highlight
+        
+        return False # Couldn't find the story
+    
+    except:
+        return None # Something went wrong
+
+def update_stealthgram_tokens(headers):
+    '''
+    Updates the stealthgram tokens
+
+    Parameters:
+        headers (Headers): The headers of the request
+    
+    Returns:
+        result (bool): If the tokens are updated successfully or not
+    '''
+
+    try:
+        set_cookies = headers.get('set-cookie').split(' ') # Get the set-cookie's from the headers
+
+        found = 0 # Number of tokens found
+        
+        global stealthgram_tokens
+        for cookie in set_cookies:
+            if 'access-token' in cookie:
+                stealthgram_tokens['access-token'] = cookie[cookie.index('=') + 1:cookie.index(';')]
+                found += 1
+            
+            elif 'refresh-token' in cookie:
+                stealthgram_tokens['refresh-token'] = cookie[cookie.index('=') + 1:cookie.index(';')]
+                found += 1
+            
+            if found == 2:
+                break # Found both tokens
+    
+        return True # Tokens updated successfully
+    
+    except:
+        return False # Couldn't update the tokens
+
+def get_stealthgram_tokens():
+    '''
+    Gets the stealthgram tokens
+
+    Returns:
+        result (bool): If the tokens are updated successfully or not
+    '''
+
+    try:
+        url = 'https://stealthgram.com/'
+
+        response = send_request(url=url, method='GET', headers=HEADERS) # Get the data
+
+        if response is None:
+            return False # Couldn't get the tokens
+        
+        global stealthgram_tokens
+        stealthgram_tokens = {} # Empty the tokens
+
+        if update_stealthgram_tokens(headers=response.headers):
+            return True # Tokens updated successfully
+
+        stealthgram_tokens = None # Tokens are not available
+
+        return False # Couldn't get the tokens
+    
+    except:
+        stealthgram_tokens = None # Tokens are not available
+        return False # Couldn't get the tokens
+
+def call_stealthgram_api_steps(pk, highlight_id, is_highlight=False, highlight_ids=None):
+    '''
+    Calls the stealthgram API to get the data (the shared body of call_stealthgram_api and async_call_stealthgram_api)
+
+    Parameters:
+        pk (int): The profile's pk
+        highlight_id (int): The highlight's id
+        is_highlight (bool): Is the data for highlight or not
+        highlight_ids (list): The ids of the highlights to get the stories of all of them at once (highlight_id is ignored)
+    
+    Yields:
+        step (tuple): The steps of the request
+    
+    Returns:
+        response (requests.Response): The response of the request
+    '''
+
+    try:
+        payload = get_stealthgram_payload(pk=pk, highlight_id=highlight_id, is_highlight=is_highlight, highlight_ids=highlight_ids)
+
+        headers = yield call_step(function=get_stealthgram_headers) # Set the headers for the request (the tokens may need a request)
+
+        if headers is None:
+            return None # Couldn't update the tokens
+
+        response = yield send_request_steps(url=STEALTHGRAM_API, payload=payload, headers=headers) # Get the data
+
+        update_stealthgram_tokens(headers=response.headers) # Update the stealthgram tokens
+
+        return response # Return the response
+
+    except:
+        return None # There was an error
+
+def call_stealthgram_api(pk, highlight_id, is_highlight=False, highlight_ids=None):
+    '''
+    Calls the stealthgram API to get the data
+
+    Parameters:
+        pk (int): The profile's pk
+        highlight_id (int): The highlight's id
+        is_highlight (bool): Is the data for highlight or not
+        highlight_ids (list): The ids of the highlights to get the stories of all of them at once (highlight_id is ignored)
+    
+    Returns:
+        response (requests.Response): The response of the request
+    '''
+
+    return run_steps(steps=call_stealthgram_api_steps(pk=pk, highlight_id=highlight_id, is_highlight=is_highlight, highlight_ids=highlight_ids))
+
+def get_stealthgram_payload(pk, highlight_id, is_highlight=False, highlight_ids=None):
+    '''
+    Makes the payload of the stealthgram API request
+
+    Parameters:
+        pk (int): The profile's pk
+        highlight_id (int): The highlight's id
+        is_highlight (bool): Is the data for highlight or not
+        highlight_ids (list): The ids of the highlights to get the stories of all of them at once (highlight_id is ignored)
+    
+    Returns:
+        payload (str): The payload of the request
+    '''
+
+    # Set the payload for the request
+    if is_highlight: # If the data is for highlight
+        return json.dumps({
+            "body": {
+                "id": str(pk),
+            },
+            "url": "user/get_highlights"
+        })
+    
+    if highlight_ids is not None: # The stories of several highlights
+        return json.dumps({
+            "body": {
+                "ids": [str(highlight_id) for highlight_id in highlight_ids],
+            },
+            "url": "highlight/get_stories"
+        })
+    
+    if pk != highlight_id: # pk == highlight_id is for stories
+        return json.dumps({
+            "body": {
+                "ids": [
+                    str(highlight_id)
+                ],
+            },
+            "url": "highlight/get_stories"
+        })
+
+    return json.dumps({
+        "body": {
+            "ids": [
+                pk
+            ],
+        },
+        "url": "user/get_stories"
+    })
+
+def get_stealthgram_headers():
+    '''
+    Makes the headers of the stealthgram API request (gets the tokens if they aren't available)
+
+    Returns:
+        headers (dict): The headers of the request (None if couldn't get the tokens)
+    '''
+
+    # Check if stealthgram tokens are available
+    if stealthgram_tokens is None:
+        if not get_stealthgram_tokens():
+            return None # Couldn't update the tokens
+    
+    # Set the headers for the request
+    headers = {
+        'Cookie': f"access-token={stealthgram_tokens['access-token']}; refresh-token={stealthgram_tokens['refresh-token']};",
+    }
+    headers.update(HEADERS) # Add the default headers to the request
+
+    return headers
+
+def get_stories_data_steps(pk, highlight_id):
+    '''
+    Gets the stories (or highlights) data of the profile (the shared body of get_stories_data and async_get_stories_data)
+
+    Parameters:
+        pk (int): The profile's pk
+        highlight_id (int): The highlight's id
+    
+    Yields:
+        step (tuple): The steps of the request
+    
+    Returns:
+        data (list): The stories data
+    '''
+
+    try:
+        response = yield call_stealthgram_api_steps(pk=pk, highlight_id=highlight_id) # Get the stories data
+
+        if response is None:
+            return None # Couldn't get the data
+
+        return parse_stories_data(text=response.text, pk=pk, highlight_id=highlight_id) # Return the stories data
+
+    except:
+        return None # Couldn't get the stories data
+
+def get_stories_data(pk, highlight_id):
+    '''
+    Gets the stories (or highlights) data of the profile
+
+    Parameters:
+        pk (int): The profile's pk
+        highlight_id (int): The highlight's id
+    
+    Returns:
+        data (list): The stories data
+    '''
+
+    return run_steps(steps=get_stories_data_steps(pk=pk, highlight_id=highlight_id))
+
+def parse_stories_data(text, pk, highlight_id):
+    '''
+    Gets the stories data from the stealthgram response
+
+    Parameters:
+        text (str): The text of the response
+        pk (int): The profile's pk
+        highlight_id (int): The highlight's id
+    
+    Returns:
+        data (list): The stories data
+    '''
+
+    try:
+        data = json.loads(text) # Parse the data to json
+
+        # Set the label for getting the stories from the response
+        label = ('highlight:' if pk != highlight_id else '') + str(highlight_id)
+
+        # If there is currently no story or highlight
+        if label not in data['response']['body']['reels'].keys():
+            return [] # Return an empty list
+        
+        else: # If there is a story or highlight
+            data = data['response']['body']['reels'][label]['items']
+
+        return data # Return the stories data
+    
+    except:
+        return None # Couldn't get the stories data
+
+def get_highlights_stories_data_steps(pk, highlight_ids, batch_size=None):
+    '''
+    Gets the stories data of several highlights with a request for each batch of them
+    (the shared body of get_highlights_stories_data and async_get_highlights_stories_data)
+
+    Parameters:
+        pk (int): The profile's pk
+        highlight_ids (list): The highlights' ids
+        batch_size (int): The number of the highlights in each request
+    
+    Yields:
+        step (tuple): The steps of the requests
+    
+    Returns:
+        data (dict): The stories data of each highlight_id (None for the ones that couldn't get)
+    '''
+
+    batch_size = batch_size or STORIES_BATCH_SIZE
+
+    data = {highlight_id: None for highlight_id in highlight_ids} # The stories data of each highlight
+
+    if not circuit_allows(endpoint="stories:stealthgram"):
+        return data # Stealthgram is failing, the other providers are tried for each highlight
+
+    def get_batch(batch):
+        try:
+            response, failed = yield run_provider_steps(function=call_stealthgram_api, async_function=async_call_stealthgram_api,
+                                                        pk=pk, highlight_id=None, highlight_ids=batch) # Get the stories data
+
+            record_circuit(endpoint="stories:stealthgram", success=not failed)
+
+            if response is not None:
+                data.update(parse_highlights_stories_data(text=response.text, highlight_ids=batch))
+
+        except:
+            pass # Couldn't get the stories data of this batch
+
+    yield together(steps=[get_batch(batch=highlight_ids[start:start + batch_size]) for start in range(0, len(highlight_ids), batch_size)])
+
+    return data # Return the stories data of each highlight
+
+def get_highlights_stories_data(pk, highlight_ids, batch_size=None):
+    '''
+    Gets the stories data of several highlights with a request for each batch of them
+
+    Parameters:
+        pk (int): The profile's pk
+        highlight_ids (list): The highlights' ids
+        batch_size (int): The number of the highlights in each request
+    
+    Returns:
+        data (dict): The stories data of each highlight_id (None for the ones that couldn't get)
+    '''
+
+    return run_steps(steps=get_highlights_stories_data_steps(pk=pk, highlight_ids=highlight_ids, batch_size=batch_size))
+
+def parse_highlights_stories_data(text, highlight_ids):
+    '''
+    Gets the stories data of several highlights from the stealthgram response (raises an error if the response isn't valid)
+
+    Parameters:
+        text (str): The text of the response
+        highlight_ids (list): The highlights' ids that are asked for
+    
+    Returns:
+        data (dict): The stories data of each highlight_id
+    '''
+
+    reels = json.loads(text)['response']['body']['reels'] # Parse the data to json
+
+    data = {}
+
+    for highlight_id in highlight_ids:
+        label = f"highlight:{highlight_id}" # The label of the highlight in the response
+
+        # If there is currently no story in the highlight then it's an empty list
+        data[highlight_id] = reels[label]['items'] if label in reels.keys() else []
+    
+    return data
+
+def get_single_story(pk, new_story, highlight_id, highlight_title, stories, folder_name):
+    '''
+    Gets a single story for download
+
+    Parameters:
+        pk (int): The profile's pk
+        new_story (dict): The new story data
+        highlight_id (int): The highlight's id
+        highlight_title (str): The highlight's title
+        stories (dict): The downloaded stories of each story_pk (by their highlight_id)
+        folder_name (str): The folder name for the profile
+    
+    Returns:
+        story (tuple): The story information
+    '''
+
+    try:
+        story_pk = get_story_pk(new_story=new_story) # The story's pk
+
+        # Check if the story is already downloaded
+        downloaded = check_duplicate_stories(pk=pk, story_pk=story_pk, highlight_id=highlight_id, highlight_title=highlight_title,
+                                             stories=stories, folder_name=folder_name)
+
+        if downloaded or (downloaded is None):
+            return None # It was (found and copied) or (couldn't check and it may be duplicate) so skip this one
+
+        timestamp = new_story['taken_at'] # The timestamp of the story
+
+        media_link = None # The media link of the story
+        is_video = False # Is the story is video
+
+        if 'video_versions' in new_story.keys(): # If the story is video
+            media_link = new_story['video_versions'][0]['url'].replace("se=7&", "") # Get the video link (better quality)
+            is_video = True
+
+        if media_link is None: # If story isn't video then get the best picture
+            media_link = new_story['image_versions2']['candidates'][0]['url'].replace("se=7&", "") # Get the picture link (better quality)
+
+        # Set the saving address according to being a story or highlight
+        if pk != highlight_id: # highlight_id == pk is for stories
+            media_address = os.path.join(f"{folder_name}", "Highlights", f"{make_filename_friendly(text=highlight_title)}_{highlight_id}", f"{story_pk}")
+
+        else:
+            media_address = os.path.join(f"{folder_name}", "Stories", f"{story_pk}")
+        
+        return (pk, story_pk, highlight_id, timestamp, media_link, media_address, is_video) # Return the story information
+    
+    except:
+        return None # Something went wrong
+
+def get_story_pk(new_story):
+    '''
+    Gets the story's pk from the story data
+
+    Parameters:
+        new_story (dict): The story data
+    
+    Returns:
+        story_pk (int): The story's pk
+    '''
+
+    return int(new_story['id'][:new_story['id'].find('_')])
+
+def get_downloaded_stories(pk, data):
+    '''
+    Gets the downloaded stories that have the same story_pk as the stories of the data (with a single query for each batch)
+
+    Parameters:
+        pk (int): The profile's pk
+        data (list): The stories data
+    
+    Returns:
+        stories (dict): The downloaded stories of each story_pk (by their highlight_id), None if there was an error
+    '''
+
+    story_pks = set()
+    for new_story in data:
+        try:
+            story_pks.add(get_story_pk(new_story=new_story))
+        
+        except:
+            pass # It's skipped by get_single_story
+    
+    story_pks = sorted(story_pks)
+
+    stories = {}
+    for start in range(0, len(story_pks), STORIES_QUERY_SIZE):
+        batch = story_pks[start:start + STORIES_QUERY_SIZE]
+
+        query = [(f"""SELECT * FROM Story WHERE pk = ? AND story_pk IN ({', '.join('?' * len(batch))})""", (pk, *batch))]
+
+        rows = execute_query(queries=query, commit=False, fetch=True)
+
+        if rows == False:
+            return None # Something went wrong
+        
+        for row in rows:
+            stories.setdefault(row[1], {})[row[2]] = row # Key the stories by their story_pk and highlight_id
+    
+    return stories
+
+def get_stories(pk, highlight_id, highlight_title, stories_data=None):
+    '''
+    Gets the stories or highlights of the profile for download
+
+    Parameters:
+        pk (int): The profile's pk
+        highlight_id (int): The highlight's id
+        highlight_title (str): The highlight's title
+        stories_data (list): The stories data (if already fetched)
+    
+    Returns:
+        newStories (list): The list of new stories
+        number_of_items (int): The number of items
+    '''
+
+    try:
+        data = stories_data
+
+        if data is None: # If the stories data is not already fetched
+            data = call_provider(interface='stories', pk=pk, highlight_id=highlight_id) # Get the stories data
+
+        if data is None:
+            return None, 0 # Couldn't get the stories data
+
+        number_of_items = len(data) # Number of items in the stories or highlights
+
+        if number_of_items == 0:
+            return [], 0 # Return an empty list if there is no story
+        
+        folder_name = find_folder_name(pk=pk) # Get the folder name for the profile
+
+        if folder_name is None:
+            return [], number_of_items # Couldn't find the folder name
+
+        stories = get_downloaded_stories(pk=pk, data=data) # Get the already downloaded stories from database
+        
+        if stories is None:
+            return None, number_of_items # Something went wrong
+
+        newStories = [] # List of new stories that need downloading
+        
+        for new_story in data:
+            # Get the story information
+            new_story_data = get_single_story(pk=pk, new_story=new_story, highlight_id=highlight_id, highlight_title=highlight_title,
+                                              stories=stories, folder_name=folder_name)
+
+            if new_story_data is None:
+                continue # Couldn't get the story information so skip this one
+
+            newStories.append(new_story_data) # Add the story information to the list of new stories
+        
+        return newStories, number_of_items # Return the list of new stories and the number of items
+            
+    except:
+        return None, number_of_items # Something went wrong
+
+def download_stories_steps(pk, highlight_id, highlight_title, stories_data=None):
+    '''
+    Downloads the stories or highlights of the profile (the shared body of download_stories and async_download_stories)
+
+    Parameters:
+        pk (int): The profile's pk
+        highlight_id (int): The highlight's id
+        highlight_title (str): The highlight's title
+        stories_data (list): The stories data (if already fetched)
+    
+    Yields:
+        step (tuple): The steps of the download
+    
+    Returns:
+        number_of_items (int): The number of items
+        is_fetched (bool): If the stories are fetched (False means the highlight should be tried again)
+    '''
+
+    data = stories_data
+
+    if data is None: # If the stories data is not already fetched
+        data = yield call_provider_steps(interface='stories', pk=pk, highlight_id=highlight_id) # Get the stories data
+
+    if data is None:
+        print("There was an error!")
+        return 0, False # Couldn't get the stories data
+
+    # Get the list of new stories and the number of items
+    newstories, number_of_items = yield call_step(function=get_stories, pk=pk, highlight_id=highlight_id, highlight_title=highlight_title, stories_data=data)
+
+    if newstories is None:
+        print("There was an error!")
+        return number_of_items, False # At least return the number of items
+
+    elif len(newstories) == 0:
+        print("There was no story!")
+        return number_of_items, True # If there is no story then just return the number of items
+
+    # So they are resumed if the run is stopped
+    yield db_step(function=add_jobs, kind='story', jobs=[(get_story_job_key(story=story), story) for story in newstories])
+
+    yield download_new_stories_steps(stories=newstories)
+
+    return number_of_items, True # Return the number of items
+
+def download_stories(pk, highlight_id, highlight_title, stories_data=None):
+    '''
+    Downloads the stories or highlights of the profile
+
+    Parameters:
+        pk (int): The profile's pk
+        highlight_id (int): The highlight's id
+        highlight_title (str): The highlight's title
+        stories_data (list): The stories data (if already fetched)
+    
+    Returns:
+        number_of_items (int): The number of items
+        is_fetched (bool): If the stories are fetched (False means the highlight should be tried again)
+    '''
+
+    # TODO: Needs change for GUI implementation and multithreading
+    return run_steps(steps=download_stories_steps(pk=pk, highlight_id=highlight_id, highlight_title=highlight_title, stories_data=stories_data))
+
+def get_story_job_key(story):
+    '''
+    Gets the key of the story's job
+
+    Parameters:
+        story (tuple): The story information
+    
+    Returns:
+        key (str): The key of the job
+    '''
+
+    return f"{story[2]}_{story[1]}" # The highlight_id and story_pk
+
+def download_new_stories_steps(stories):
+    '''
+    Downloads the media of the new stories, makes their thumbnails and adds them to the database
+    (the shared body of download_new_stories and the async functions)
+
+    Parameters:
+        stories (list): The stories information
+    
+    Yields:
+        step (tuple): The steps of the downloads
+    '''
+
+    saved = yield call_step(function=get_saved_media, addresses=[story[5] for story in stories]) # Saved by an interrupted run
+
+    pending = [story for story in stories if story[5] not in saved]
+
+    # Try downloading all of the media at the same time and making their thumbnails as soon as each one is downloaded
+    downloads = iter((yield call_step(function=download_many, async_function=async_download_many, jobs=[(story[4], story[5]) for story in pending],
+                                      thumbnails=[{'size': 320, 'is_video': story[6]} for story in pending])))
+
+    downloaded = [] # The stories that are ready to be added to the database
+    for story in stories:
+        try:
+            if story[5] in saved:
+                downloaded.append(story)
+                continue
+
+            if not next(downloads): # Couldn't download the media or make it's thumbnail
+                print("Couldn't download story!")
+                continue
+
+            downloaded.append(story)
+
+        except:
+            print("There was an error!")
+            continue # Couldn't download, skip and try the next one
+
+    try:
+        if not (yield db_step(function=save_stories, stories=downloaded)): # Add the stories to the database with a single commit
+            print("There was an error!")
+
+    except:
+        print("There was an error!")
+
+    # The stories that couldn't be downloaded are tried again by resume
+    yield db_step(function=fail_jobs, kind='story', keys=[get_story_job_key(story=story) for story in stories], error="Couldn't download the story")
+
+def download_new_stories(stories):
+    '''
+    Downloads the media of the new stories, makes their thumbnails and adds them to the database (the media that is already saved isn't downloaded again)
+
+    Parameters:
+        stories (list): The stories information
+    '''
+
+    run_steps(steps=download_new_stories_steps(stories=stories))
+
+def save_stories(stories):
+    '''
+    Adds the downloaded stories to the database with a single statement and removes their jobs
+
+    Parameters:
+        stories (list): The stories information
+    
+    Returns:
+        result (bool): If the stories are added successfully or not
+    '''
+
+    if len(stories) == 0:
+        return True # There is nothing to add
+    
+    rows = [story[:4] for story in stories] # The pk, story_pk, highlight_id and timestamp of each story
+
+    # A story that is already recorded is skipped instead of failing the others
+    if not execute_many(query="""INSERT OR IGNORE INTO Story VALUES(?, ?, ?, ?)""", rows=rows, commit=True):
+        return False
+    
+    return finish_jobs(kind='story', keys=[get_story_job_key(story=story) for story in stories])
+
+def save_file(content, address):
+    '''
+    Saves the content to the address (the file is replaced at once, so it's never half-written)
+
+    Parameters:
+        content (bytes): The content of the file
+        address (str): The full address of the file (with extension)
+    
+    Returns:
+        result (bool): If the file is saved successfully or not
+    '''
+
+    part_address = get_part_address(address=address)
+
+    try:
+        with open(part_address, 'wb') as file:
+            file.write(content)
+
+        os.replace(part_address, address) # Move the complete file to it's place
+        return True
+    
+    except:
+        remove_part(part_address=part_address) # Remove the incomplete file
+        return False # Couldn't save the file
+
+def read_cover_validators(folder):
+    '''
+    Reads the saved validators of the highlight's current cover
+
+    Parameters:
+        folder (str): The full address of the highlight's folder
+    
+    Returns:
+        validators (dict): The etag, last_modified and content_hash of the cover (empty if there isn't any)
+    '''
+
+    try:
+        with open(os.path.join(folder, ".Cover.json"), 'r') as file:
+            return json.load(file)
+    
+    except:
+        return {} # There isn't any validator
+
+def save_cover_validators(folder, headers, content_hash):
+    '''
+    Saves the validators of the highlight's current cover for the next conditional request
+
+    Parameters:
+        folder (str): The full address of the highlight's folder
+        headers (Headers): The headers of the cover's response
+        content_hash (str): The sha256 of the cover
+    '''
+
+    try:
+        validators = {
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'content_hash': content_hash,
+        }
+
+        save_file(content=json.dumps(validators).encode(), address=os.path.join(folder, ".Cover.json"))
+    
+    except:
+        pass # Couldn't save the validators, the next check will download the whole cover
+
+def make_cover_headers(validators):
+    '''
+    Makes the headers for asking the cover only if it has changed
+
+    Parameters:
+        validators (dict): The validators of the current cover
+    
+    Returns:
+        headers (dict): The headers for the request
+    '''
+
+    headers = dict(HEADERS)
+
+    if validators.get('etag') is not None:
+        headers['If-None-Match'] = validators['etag']
+
+    if validators.get('last_modified') is not None:
+        headers['If-Modified-Since'] = validators['last_modified']
+    
+    return headers
+
+def add_cover_history(pk, highlight_id, new_cover_link, new_cover=None):
+    '''
+    Checks the highlight cover and if it has changed then add it to the database and save the new cover
+
+    Parameters:
+        pk (int): The profile's pk
+        highlight_id (int): The highlight's id
+        new_cover_link (str): The new cover link
+        new_cover (requests.Response): The response of the conditional request for the cover (if already sent)
+    
+    Returns:
+        status (str): The status of the cover ("No File", "Same" or "Changed" when the new cover is saved)
+    '''
+
+    try:
+        folder_name = find_folder_name(pk=pk) # Get the folder name for the profile
+
+        if folder_name is None:
+            return None # Couldn't find the folder name
+        
+        # Check if the highlight folder already exists
+        folder = glob.glob(os.path.join(path, f"{folder_name}", "Highlights", f"*_{highlight_id}"))
+
+        if len(folder) == 0: # If the folder doesn't exist
+            return "No File" # There is no folder so there is nothing to do
+        
+        cover_address = os.path.join(os.path.relpath(folder[0], path), "Cover")
+        cover_file = find_media(address=cover_address) # Check if the cover exists
+
+        if cover_file is None: # If the cover doesn't exist
+            return "No File" # There is no cover so there is nothing to do
+        
+        validators = read_cover_validators(folder=folder[0]) # The validators of the current cover
+
+        if new_cover is None: # Ask for the cover only if it has changed
+            new_cover = send_request(url=new_cover_link, method='GET', headers=make_cover_headers(validators=validators), valid_status_codes=(200, 304))
+
+        if new_cover is None:
+            return None # Couldn't get the new cover
+
+        if new_cover.status_code == 304: # Not modified
+            return "Same" # The cover is the same
+        
+        new_hash = hashlib.sha256(new_cover.content).hexdigest()
+        old_hash = validators.get('content_hash')
+
+        if old_hash is None: # The hash of the old cover isn't saved yet
+            with open(cover_file, 'rb') as file:
+                old_hash = hashlib.sha256(file.read()).hexdigest()
+
+        if old_hash == new_hash: # If the cover hasn't changed
+            save_cover_validators(folder=folder[0], headers=new_cover.headers, content_hash=new_hash) # So the next check can be conditional
+            return "Same" # The cover is the same
+        
+        extension = get_link_extension(link=new_cover_link, content_type=new_cover.headers.get('content-type', ''))
+
+        if extension is None:
+            return None # The response isn't an image
+        
+        if not os.path.exists(os.path.join(folder[0], "History")): # Make the History folder
+            os.mkdir(os.path.join(folder[0], "History"))
+        
+        new_name = int(time()) # Get the new name for the cover
+
+        with transaction(): # The moved cover, it's history and the new cover are saved in the database together
+            # Move the old cover and it's thumbnail to History folder
+            if not move_media(address=cover_address, new_address=os.path.join(os.path.relpath(folder[0], path), "History", f"{new_name}")):
+                return None # Couldn't move the old cover
+            
+            query = [("""INSERT INTO CoverHistory VALUES(?, ?)""", (highlight_id, new_name))]
+
+            execute_query(queries=query, commit=True, fetch=None) # Add the cover to the database
+
+            # Save the new cover from the bytes that are already downloaded
+            if not save_file(content=new_cover.content, address=os.path.join(folder[0], "Cover") + extension):
+                return "No File" # Couldn't save the new cover, so it should be downloaded again
+
+            index_media(files=[(cover_address, extension)]) # Add the new cover to the media index
+
+        save_cover_validators(folder=folder[0], headers=new_cover.headers, content_hash=new_hash)
+        
+        return "Changed" # The cover has changed and the new cover is saved
+
+    except:
+        return None # Something went wrong
+
+def get_highlights_data_steps(pk):
+    '''
+    Gets the highlights data of the profile (the shared body of get_highlights_data and async_get_highlights_data)
+
+    Parameters:
+        pk (int): The profile's pk
+    
+    Yields:
+        step (tuple): The steps of the request
+    
+    Returns:
+        data (list): The highlights data
+    '''
+
+    try:
+        response = yield call_stealthgram_api_steps(pk=pk, highlight_id=None, is_highlight=True) # Get the highlights data
+
+        if response is None: # Couldn't get the highlights data
+            return None
+
+        return parse_highlights_data(text=response.text) # Return the highlights data
+
+    except:
+        return None # Couldn't get the highlights data
+
+def get_highlights_data(pk):
+    '''
+    Gets the highlights data of the profile
+
+    Parameters:
+        pk (int): The profile's pk
+    
+    Returns:
+        data (list): The highlights data
+    '''
+
+    return run_steps(steps=get_highlights_data_steps(pk=pk))
+
+def parse_highlights_data(text):
+    '''
+    Gets the highlights data from the stealthgram response
+
+    Parameters:
+        text (str): The text of the response
+    
+    Returns:
+        data (list): The highlights data
+    '''
+
+    try:
+        data = json.loads(text)
+        data = data['response']['body']['data']['user']['edge_highlight_reels']['edges']
+
+        return data # Return the highlights data
+    
+    except:
+        return None # Couldn't get the highlights data
+
+def update_highlight_cover_steps(pk, highlight_id, cover_link, cover_address):
+    '''
+    Checks the highlight's cover and downloads it if it has changed or it doesn't exist
+    (the shared body of update_highlight_cover and async_update_highlight_cover)
+
+    Parameters:
+        pk (int): The profile's pk
+        highlight_id (int): The highlight's id
+        cover_link (str): The cover link
+        cover_address (str): The address of the cover
+    
+    Yields:
+        step (tuple): The steps of the check
+    
+    Returns:
+        result (bool): If the cover is saved and it's thumbnail is made
+    '''
+
+    try:
+        cover_file = yield call_step(function=find_media, address=cover_address) # Check if the cover exists
+
+        new_cover = None
+
+        if cover_file is not None: # Ask for the cover only if it has changed
+            validators = yield call_step(function=read_cover_validators, folder=os.path.dirname(cover_file)) # The validators of the current cover
+
+            new_cover = yield send_request_steps(url=cover_link, method='GET', headers=make_cover_headers(validators=validators), valid_status_codes=(200, 304))
+
+            if new_cover is None:
+                return False # Couldn't check the cover
+
+        # Check the highlight cover and if it has changed then add it to the database
+        cover_status = yield call_step(function=add_cover_history, pk=pk, highlight_id=highlight_id, new_cover_link=cover_link, new_cover=new_cover)
+        if cover_status is None:
+            return False # Couldn't check the cover
+
+        isDownloaded = cover_status == "Changed" # The changed cover is already saved
+
+        if cover_status == "No File": # If the cover file doesn't exist
+            # Try downloading highlight's cover
+            isDownloaded = (yield call_step(function=download_many, async_function=async_download_many, jobs=[(cover_link, cover_address)]))[0]
+
+        if isDownloaded: # If the cover is downloaded
+            # Make thumbnail for the cover
+            return (yield call_step(function=make_thumbnail, address=cover_address, size=64, circle=True))
+
+        return cover_status == "Same" # The cover hasn't changed
+
+    except:
+        return False # Couldn't check the cover
+
+def update_highlight_cover(pk, highlight_id, cover_link, cover_address):
+    '''
+    Checks the highlight's cover and downloads it if it has changed or it doesn't exist
+
+    Parameters:
+        pk (int): The profile's pk
+        highlight_id (int): The highlight's id
+        cover_link (str): The cover link
+        cover_address (str): The address of the cover
+    
+    Returns:
+        result (bool): If the cover is saved and it's thumbnail is made
+    '''
+
+    return run_steps(steps=update_highlight_cover_steps(pk=pk, highlight_id=highlight_id, cover_link=cover_link, cover_address=cover_address))
+
+def merge_highlight_folders(folders, new_folder):
+    '''
+    Moves the files of the highlight's folders to a single folder with the new name (and changes their addresses in the media index)
+
+    Parameters:
+        folders (list): The full addresses of the highlight's folders
+        new_folder (str): The new address of the highlight's folder (relative to the storage folder)
+    '''
+
+    for folder in folders[1:]:
+        shutil.copytree(folder, folders[0], dirs_exist_ok=True) # Copy the files from the other folders to the first one
+        shutil.rmtree(folder) # Remove the other folders
+
+        rename_media_folder(folder=os.path.relpath(folder, path), new_folder=os.path.relpath(folders[0], path))
+    
+    if folders[0] != os.path.join(path, new_folder):
+        os.rename(folders[0], os.path.join(path, new_folder)) # Rename the folder
+
+        rename_media_folder(folder=os.path.relpath(folders[0], path), new_folder=new_folder)
+
+def update_single_highlight(pk, new_highlight, highlights, check_cover=True):
+    '''
+    Updates a single highlight
+
+    Parameters:
+        pk (int): The profile's pk
+        new_highlight (dict): The new highlight data
+        highlights (list): The list of highlights
+        check_cover (bool): Should the cover be checked (the caller checks it itself if False)
+    
+    Returns:
+        result (bool): If the highlight is updated successfully or not
+    '''
+
+    try:
+        highlight_id = int(new_highlight['id'])
+
+        title = new_highlight['title']
+        folder_name = make_filename_friendly(text=title) # Make the title filename friendly
+        cover_link = new_highlight['cover_media_cropped_thumbnail']['url']
+
+        profile_folder_name = find_folder_name(pk=pk) # Get the folder name for the profile
+
+        if profile_folder_name is None:
+            return False # Couldn't find the folder name
+
+        # Check if the highlight folder already exists
+        folder = glob.glob(os.path.join(path, f"{profile_folder_name}", "Highlights", f"*_{highlight_id}"))
+
+        for i in range(len(highlights)):
+            if highlights[i][0] == highlight_id: # If highlight already exists
+
+                if (highlights[i][2] == title): # If title hasn't changed
+                    if (len(folder) == 0): # And folder doesn't exist
+                        os.mkdir(os.path.join(path, f"{profile_folder_name}", "Highlights", f"{folder_name}_{highlight_id}"))
+
+                else:
+
+                    if len(folder) > 0: # If folder exists then rename it
+                        merge_highlight_folders(folders=folder, new_folder=os.path.join(f"{profile_folder_name}", "Highlights", f"{folder_name}_{highlight_id}"))
+                        
+                    else:
+                        os.mkdir(os.path.join(path, f"{profile_folder_name}", "Highlights", f"{folder_name}_{highlight_id}"))
+                    
+                    query = [("""UPDATE Highlight SET title = ?
+                                 WHERE highlight_id = ?""", (title, highlight_id))]
+                    
+                    result = execute_query(queries=query, commit=True, fetch=None) # Update the title
+
+                    if result == False:
+                        return True # Couldn't Update the database but the folder is updated at least
+                
+                if check_cover: # Check the highlight cover and download it if it has changed
+                    update_highlight_cover(pk=pk, highlight_id=highlight_id, cover_link=cover_link,
+                                           cover_address=os.path.join(f"{profile_folder_name}", "Highlights", f"{folder_name}_{highlight_id}", "Cover"))
+
+                del(highlights[i])
+                return True # Highlight was found and updated
+        
+        # If this highlight is new
+        if len(folder) == 0:
+            os.mkdir(os.path.join(path, f"{profile_folder_name}", "Highlights", f"{folder_name}_{highlight_id}"))
+
+        else:
+            merge_highlight_folders(folders=folder, new_folder=os.path.join(f"{profile_folder_name}", "Highlights", f"{folder_name}_{highlight_id}"))
+        
+        query = [("""INSERT INTO Highlight VALUES(?, ?, ?, 0)""", (highlight_id, pk, title))]
+
+        result = execute_query(queries=query, commit=True, fetch=None) # Add it to database
+
+        if result == False:
+            return False # Couldn't add the highlight to the database
+        
+        if check_cover: # Check the highlight cover and download it if it has changed
+            update_highlight_cover(pk=pk, highlight_id=highlight_id, cover_link=cover_link,
+                                   cover_address=os.path.join(f"{profile_folder_name}", "Highlights", f"{folder_name}_{highlight_id}", "Cover"))
+        
+        return True # Highlight was added
+
+    except:
+        return False # There was an error somewhere
+
+def update_highlights_steps(pk):
+    '''
+    Updates the highlights of the profile (the shared body of update_highlights and async_update_highlights)
+
+    Parameters:
+        pk (int): The profile's pk
+    
+    Yields:
+        step (tuple): The steps of the update
+    
+    Returns:
+        data (list): The highlights data
+        update_states (list): The list of update states
+    '''
+
+    data = yield call_provider_steps(interface='highlights', pk=pk) # Get the highlights data
+
+    if data is None: # Couldn't get the highlights data
+        print("Couldn't get the highlights!")
+        return data, [] # Return None and empty list
+
+    # The highlights are saved first and the covers are checked after them
+    update_states = yield call_step(function=save_highlights, pk=pk, data=data, check_cover=False)
+
+    try:
+        folder_name = yield call_step(function=find_folder_name, pk=pk) # Get the folder name for the profile
+
+        covers = [] # Checking the cover of each updated highlight
+
+        for i in range(len(update_states)):
+            if update_states[i]: # If the highlight was updated
+                highlight = data[i]['node']
+                highlight_id = int(highlight['id'])
+
+                cover_address = os.path.join(f"{folder_name}", "Highlights", f"{make_filename_friendly(text=highlight['title'])}_{highlight_id}", "Cover")
+
+                covers.append(update_highlight_cover_steps(pk=pk, highlight_id=highlight_id, cover_link=highlight['cover_media_cropped_thumbnail']['url'],
+                                                           cover_address=cover_address))
+
+        yield together(steps=covers)
+
+    except:
+        pass # Couldn't check the covers but the highlights are updated at least
+
+    return data, update_states # Return the highlights data and update states
+
+def update_highlights(pk):
+    '''
+    Updates the highlights of the profile
+
+    Parameters:
+        pk (int): The profile's pk
+    
+    Returns:
+        data (list): The highlights data
+        update_states (list): The list of update states
+    '''
+
+    return run_steps(steps=update_highlights_steps(pk=pk))
+
+def save_highlights(pk, data, check_cover=True):
+    '''
+    Updates the highlights of the profile from the highlights data
+
+    Parameters:
+        pk (int): The profile's pk
+        data (list): The highlights data
+        check_cover (bool): Should the covers be checked (the caller checks them itself if False)
+    
+    Returns:
+        update_states (list): The list of update states
+    '''
+
+    update_states = [] # Stores the update states of highlights
+
+    try:
+        if len(data) == 0: # If there is no highlight
+            print("There is no highlight!")
+            return update_states # Return empty list
+        
+        folder_name = find_folder_name(pk=pk) # Get the folder name for the profile
+
+        if folder_name is None:
+            return update_states # Couldn't find the folder name
+
+        if not os.path.exists(os.path.join(path, f"{folder_name}", "Highlights")):
+            os.mkdir(os.path.join(path, f"{folder_name}", "Highlights")) # Make Highlights folder
+        
+        query = [("""SELECT * FROM Highlight WHERE pk = ?""", (pk,))]
+
+        highlights = execute_query(queries=query, commit=False, fetch=True) # Get the list of highlights from database
+
+        if highlights == False:
+            print("Couldn't get the highlights!")
+            return update_states # There was an error somewhere but return the update states anyway
+
+    except:
+        print("Couldn't get the highlights!")
+        return update_states # There was an error somewhere but return the update states anyway
+
+    try:
+        with transaction(): # All of the highlights are saved with a single commit
+            for new_highlight in data:
+                # Update this highlight
+                update_states.append(update_single_highlight(pk=pk, new_highlight=new_highlight['node'], highlights=highlights, check_cover=check_cover))
+
+        return update_states # Return the update states
+
+    except:
+        print("Couldn't save the highlights!")
+        return [False] * len(update_states) # None of the highlights are saved
+
+def download_single_highlight_stories_steps(username, highlight_id, highlight_title, direct_call=True, stories_data=None):
+    '''
+    Downloads the stories of a single highlight (the shared body of download_single_highlight_stories and async_download_single_highlight_stories)
+
+    Parameters:
+        username (str): The username of the profile
+        highlight_id (int): The highlight's id
+        highlight_title (str): The highlight's title
+        direct_call (bool): If the function is called directly or not
+        stories_data (list): The stories data of the highlight (if already fetched)
+    
+    Yields:
+        step (tuple): The steps of the download
+    '''
+
+    try:
+        if direct_call: # If the function is called directly
+            updated = yield update_profile_steps(username=username, with_highlights=False) # Update the profile
+
+            if not updated:
+                print("Couldn't update the profile!")
+
+        query = [("""SELECT pk, is_private FROM Profile WHERE username = ?""", (username,))]
+
+        result = yield call_step(function=execute_query, queries=query, commit=False, fetch=False)
+
+        if result == False:
+            print("Couldn't download the highlight!")
+            return # There was an error somewhere
+
+        pk, is_private = result # Get the pk and is_private of the profile
+
+        if is_private == 1: # If the account is private
+            print("This account is private!")
+            return
+
+        folder_name = yield call_step(function=find_folder_name, pk=pk) # Get the folder name for the profile
+
+        if folder_name is None:
+            return
+
+        if pk == highlight_id: # If the highlight is the stories
+            if not os.path.exists(os.path.join(path, f"{folder_name}", "Stories")):
+                os.makedirs(os.path.join(path, f"{folder_name}", "Stories"), exist_ok=True) # Make Stories folder
+
+        elif direct_call: # If the highlight is a highlight and it's a direct call
+            if not os.path.exists(os.path.join(path, f"{folder_name}", "Highlights")):
+                os.makedirs(os.path.join(path, f"{folder_name}", "Highlights"), exist_ok=True) # Make Highlights folder
+
+        if direct_call and pk != highlight_id: # If the highlight is a highlight
+            data = yield call_provider_steps(interface='highlights', pk=pk) # Get the highlights data
+
+            if data is None: # Couldn't get the highlights data
+                print("Couldn't update the highlight!")
+                return
+
+            for highlight in data:
+                highlight = highlight['node']
+
+                if highlight['id'] == highlight_id: # If the highlight_id is found in the data
+                    new_data = highlight
+                    highlight_title = new_data['title']
+                    break
+            else: # Couldn't find the highlight_id in the data
+                print("Couldn't update the highlight!")
+                return
+
+            query = [("""SELECT * FROM Highlight WHERE pk = ?""", (pk,))]
+
+            highlights = yield call_step(function=execute_query, queries=query, commit=False, fetch=True) # Get the list of highlights from database
+
+            if highlights == False:
+                print("Couldn't update the highlight!")
+                return # There was an error somewhere
+
+            # Update this highlight
+            state = yield call_step(function=update_single_highlight, pk=pk, new_highlight=new_data, highlights=highlights, check_cover=False)
+
+            if not state: # Couldn't update the highlight
+                print("Couldn't update the highlight!")
+                return
+
+            yield update_highlight_cover_steps(pk=pk, highlight_id=int(highlight_id), cover_link=new_data['cover_media_cropped_thumbnail']['url'],
+                                               cover_address=os.path.join(f"{folder_name}", "Highlights", f"{make_filename_friendly(text=highlight_title)}_{highlight_id}", "Cover"))
+
+        # So it's resumed if the run is stopped
+        yield db_step(function=add_jobs, kind='highlight', jobs=[get_highlight_job(pk=pk, highlight_id=highlight_id, highlight_title=highlight_title)])
+
+        # Download the stories of the highlight
+        number_of_items, is_fetched = yield download_stories_steps(pk=pk, highlight_id=highlight_id, highlight_title=highlight_title, stories_data=stories_data)
+
+        # Update the number of items in the database
+        yield db_step(function=update_number_of_items, pk=pk, highlight_id=highlight_id, number_of_items=number_of_items)
+
+        if not is_fetched: # Couldn't get the stories, so resume tries the highlight again
+            yield db_step(function=fail_jobs, kind='highlight', keys=[str(highlight_id)], error="Couldn't get the stories of the highlight")
+            return
+
+        yield db_step(function=finish_jobs, kind='highlight', keys=[str(highlight_id)]) # The stories that couldn't be downloaded have their own jobs
+
+    except:
+        print("Couldn't download the highlight!")
+        yield db_step(function=fail_jobs, kind='highlight', keys=[str(highlight_id)], error="Couldn't download the highlight")
+        return # There was an error somewhere
+
+def download_single_highlight_stories(username, highlight_id, highlight_title, direct_call=True, stories_data=None):
+    '''
+    Downloads the stories of a single highlight
+
+    Parameters:
+        username (str): The username of the profile
+        highlight_id (int): The highlight's id
+        highlight_title (str): The highlight's title
+        direct_call (bool): If the function is called directly or not
+        stories_data (list): The stories data of the highlight (if already fetched)
+    '''
+
+    run_steps(steps=download_single_highlight_stories_steps(username=username, highlight_id=highlight_id, highlight_title=highlight_title,
+                                                            direct_call=direct_call, stories_data=stories_data))
+
+def update_number_of_items(pk, highlight_id, number_of_items):
+    '''
+    Updates the number of items of the highlight if it has more items now
+
+    Parameters:
+        pk (int): The profile's pk
+        highlight_id (int): The highlight's id
+        number_of_items (int): The number of items in the stories data
+    '''
+
+    try:
+        if number_of_items > 0: # If there was any story
+            query = [("""SELECT number_of_items FROM Highlight WHERE highlight_id = ?""", (highlight_id,))]
+
+            old_number_of_items = execute_query(queries=query, commit=False, fetch=False) # Get the old number of items
+
+            if old_number_of_items == False: # Couldn't get the number of items
+                return # There was an error somewhere
+            
+            query = [("""SELECT COUNT(*) FROM Story WHERE pk = ? AND highlight_id = ?""", (pk, highlight_id))]
+
+            number_of_downloaded = execute_query(queries=query, commit=False, fetch=False) # Get the number of downloaded stories
+
+            if number_of_downloaded == False: # Couldn't get the number of downloaded stories
+                return # There was an error somewhere
+
+            new_max = max(number_of_items, number_of_downloaded[0]) # Get the new maximum number of items
+
+            if new_max > old_number_of_items[0]: # If the new maximum is greater than the old maximum
+                query = [("""UPDATE Highlight SET number_of_items = ?
+                         WHERE highlight_id = ?""", (new_max, highlight_id))]
+                
+                execute_query(queries=query, commit=True, fetch=None) # Update the number of items in the database
+
+    except: # Couldn't update the number of items
+        pass
+
+def download_highlights_stories_steps(username, direct_call=True):
+    '''
+    Downloads the stories of all highlights (the shared body of download_highlights_stories and async_download_highlights_stories)
+
+    Parameters:
+        username (str): The username of the profile
+        direct_call (bool): If the function is called directly or not
+    
+    Yields:
+        step (tuple): The steps of the downloads
+    '''
+
+    try:
+        if direct_call: # If the function is called directly
+            updated = yield update_profile_steps(username=username, with_highlights=False) # Update the profile
+
+            if not updated:
+                print("Couldn't update the profile!")
+
+        query = [("""SELECT pk, is_private FROM Profile WHERE username = ?""", (username,))]
+
+        result = yield call_step(function=execute_query, queries=query, commit=False, fetch=False)
+
+        if result == False:
+            print('There was an error!')
+            return
+
+        pk, is_private = result # Get the pk and is_private of the profile
+
+        if is_private == 1: # If the account is private
+            print("This account is private!")
+            return
+
+        data, update_states = yield update_highlights_steps(pk=pk) # Update the highlights
+
+        if len(update_states) == 0: # Couldn't update any highlight
+            print("Couldn't update the highlights!")
+            return
+
+        # Get the stories data of all the updated highlights with a few requests
+        highlight_ids = [int(data[i]['node']['id']) for i in range(len(update_states)) if update_states[i]]
+        stories_data = yield get_highlights_stories_data_steps(pk=pk, highlight_ids=highlight_ids)
+
+        # So the highlights that aren't reached are resumed if the run is stopped
+        yield db_step(function=add_jobs, kind='highlight', jobs=[get_highlight_job(pk=pk, highlight_id=int(data[i]['node']['id']), highlight_title=data[i]['node']['title'])
+                                                                for i in range(len(update_states)) if update_states[i]])
+
+        downloads = [] # Downloading the stories of each updated highlight
+
+        for i in range(len(update_states)):
+            if update_states[i]: # If the highlight was updated
+                highlight_id = int(data[i]['node']['id']) # Get the highlight_id
+
+                print(f"Downloading {data[i]['node']['title']}...") # Show the title of the highlight
+
+                # Download the stories of the highlight (it's fetched again on it's own if the batch failed)
+                downloads.append(download_single_highlight_stories_steps(username=username, highlight_id=highlight_id, highlight_title=data[i]['node']['title'],
+                                                                         direct_call=False, stories_data=stories_data.get(highlight_id)))
+
+        yield together(steps=downloads)
+
+    except:
+        print("There was an error!")
+        return
+
+def download_highlights_stories(username, direct_call=True):
+    '''
+    Downloads the stories of all highlights
+
+    Parameters:
+        username (str): The username of the profile
+        direct_call (bool): If the function is called directly or not
+    '''
+
+    run_steps(steps=download_highlights_stories_steps(username=username, direct_call=direct_call))
+
+def call_post_code_api_steps(pk, username, is_tag, is_cursor=True, cursor=None, use_cache=True):
+    '''
+    Calls the API for the (tagged/normal) posts codes of the profile (the shared body of call_post_code_api and async_call_post_code_api)
+
+    Parameters:
+        pk (int): The profile's pk
+        username (str): The username of the profile
+        is_tag (bool): If the posts are tagged posts
+        is_cursor (bool): If there is a cursor
+        cursor (str): The cursor for the next set of posts
+        use_cache (bool): Can a recently saved response be used instead of sending the request
+    
+    Yields:
+        step (tuple): The steps of the request
+    
+    Returns:
+        data (dict/BeautifulSoup): The posts data
+    '''
+
+    try:
+        link = get_post_code_link(pk=pk, username=username, is_tag=is_tag, is_cursor=is_cursor, cursor=cursor)
+
+        text = None
+
+        if use_cache: # Reuse the recent response (if any)
+            text = yield call_step(function=read_cached_response, url=link, cache_type='posts_cursor' if is_cursor else 'posts_page')
+
+        is_cached = text is not None
+
+        if not is_cached:
+            response = yield send_request_steps(url=link, method='GET') # Get the data
+
+            if response is None:
+                return None # Couldn't get the data
+
+            text = response.text
+
+        data = yield cpu_step(function=parse_post_code_response, text=text, is_tag=is_tag, is_cursor=is_cursor)
+
+        if (data is not None) and (not is_cached):
+            yield call_step(function=save_cached_response, url=link, text=text) # Save the valid response for reusing
+
+        return data # Return the data
+
+    except:
+        return None # Couldn't get the posts data
+
+def call_post_code_api(pk, username, is_tag, is_cursor=True, cursor=None, use_cache=True):
+    '''
+    Calls the API for the (tagged/normal) posts codes of the profile
+
+    Parameters:
+        pk (int): The profile's pk
+        username (str): The username of the profile
+        is_tag (bool): If the posts are tagged posts
+        is_cursor (bool): If there is a cursor
+        cursor (str): The cursor for the next set of posts
+        use_cache (bool): Can a recently saved response be used instead of sending the request
+    
+    Returns:
+        data (dict/BeautifulSoup): The posts data
+    '''
+
+    return run_steps(steps=call_post_code_api_steps(pk=pk, username=username, is_tag=is_tag, is_cursor=is_cursor, cursor=cursor, use_cache=use_cache))
+
+def get_post_code_link(pk, username, is_tag, is_cursor=True, cursor=None):
+    '''
+    Gets the link for the (tagged/normal) posts codes of the profile
+
+    Parameters:
+        pk (int): The profile's pk
+        username (str): The username of the profile
+        is_tag (bool): If the posts are tagged posts
+        is_cursor (bool): If there is a cursor
+        cursor (str): The cursor for the next set of posts
+    
+    Returns:
+        link (str): The link of the posts codes
+    '''
+
+    # Get the proper link according to being a post or tagged post and having a cursor or not
+    if is_tag: # If the posts are tagged posts
+        if is_cursor: # If there is a cursor
+            return f"https://imginn.com/api/tagged?id={pk}&cursor={cursor}" # Call the tagged posts data API with the cursor
+        
+        return f"https://imginn.com/tagged/{username}" # Call the tagged posts page link
+    
+    if is_cursor: # If there is a cursor
+        return f"https://imginn.com/api/posts/?id={pk}&cursor={cursor}" # Call the posts data API with the cursor
+    
+    return f"https://imginn.com/{username}" # Call the posts page link
+
+def parse_post_code_response(text, is_tag, is_cursor=True):
+    '''
+    Parses the response of the posts codes
+
+    Parameters:
+        text (str): The text of the response
+        is_tag (bool): If the posts are tagged posts
+        is_cursor (bool): If there is a cursor
+    
+    Returns:
+        data (dict/BeautifulSoup): The posts data (None if there is an error)
+    '''
+
+    from bs4 import BeautifulSoup
+
+    try:
+        if is_cursor: # If there is a cursor
+            data = json.loads(text) # Parse the data to json
+
+            if ((not is_tag) and (data['code'] != 200)) or ((is_tag) and (len(data.keys()) == 0)): # There is an error
+                return None # Couldn't get the data
+            
+            return data # Return the data
+        
+        return BeautifulSoup(text, 'html.parser') # Parse the response using BeautifulSoup to get the data
+    
+    except:
+        return None # Couldn't get the posts data
+
+def prefetch_post_code_pages(pk, username, is_tag, cursor, lookahead=None):
+    '''
+    Gets the next sets of the (tagged/normal) posts codes while the caller saves the current one
+
+    Parameters:
+        pk (int): The profile's pk
+        username (str): The username of the profile
+        is_tag (bool): If the posts are tagged posts
+        cursor (str): The cursor for the first set of posts
+        lookahead (int): The maximum number of the sets that are fetched before the caller needs them
+    
+    Yields:
+        data (dict): The posts data of each set (None if couldn't get it, and then it stops)
+    '''
+
+    pages = Queue(maxsize=lookahead or POST_CODE_LOOKAHEAD) # The sets that are fetched but not used yet
+    stop = threading.Event() # Set when the caller doesn't need more sets
+
+    def fetch_pages():
+        next_cursor = cursor
+
+        while not stop.is_set():
+            data = call_provider(interface='post_list', pk=pk, username=username, is_tag=is_tag, is_cursor=True, cursor=next_cursor) # Get the data
+
+            try:
+                has_next = (data is not None) and bool(data['hasNext']) # If there is more post
+                
+                if has_next:
+                    next_cursor = data['cursor'] # Get the cursor for the next set of posts
+            
+            except:
+                data, has_next = None, False # The data isn't valid
+
+            while not stop.is_set(): # Wait for a free place without blocking forever
+                try:
+                    pages.put(data, timeout=1)
+                    break
+                
+                except Full:
+                    continue
+
+            if not has_next:
+                return # Couldn't get the data or there is no more post
+
+    fetcher = threading.Thread(target=fetch_pages, name="post-codes", daemon=True)
+    fetcher.start()
+
+    try:
+        while True:
+            data = pages.get() # Wait for the next set
+
+            yield data
+
+            if (data is None) or (not data['hasNext']):
+                return # Couldn't get the data or there is no more post
+    
+    finally:
+        stop.set() # The caller stopped early or all the sets are used
+
+def add_posts(pk, post_codes, is_tag):
+    '''
+    Adds the posts to the database (the posts that are already recorded are skipped)
+
+    Parameters:
+        pk (int): The profile's pk
+        post_codes (list): The posts codes
+        is_tag (bool): If the posts are tagged posts
+    
+    Returns:
+        result (bool): If the posts are added to the database
+    '''
+
+    rows = [(pk, post_code, is_tag) for post_code in post_codes]
+
+    # The (pk, post_code, is_tag) is the primary key, so a recorded post is ignored
+    return execute_many(query="""INSERT OR IGNORE INTO Post VALUES(?, ?, ?, NULL, NULL, NULL)""", rows=rows, commit=True)
+
+def get_next_page(pages):
+    '''
+    Waits for the next set of the posts codes
+
+    Parameters:
+        pages (generator): The sets of the posts codes (from prefetch_post_code_pages)
+    
+    Returns:
+        data (dict): The posts data of the set (None if couldn't get it or there is no more set)
+    '''
+
+    return next(pages, None)
+
+def add_posts_codes_steps(pk, username, is_tag):
+    '''
+    Adds the (tagged/normal) posts codes of the profile to the database (the shared body of add_posts_codes and async_add_posts_codes)
+
+    Parameters:
+        pk (int): The profile's pk
+        username (str): The username of the profile
+        is_tag (bool): If the posts are tagged posts
+    
+    Yields:
+        step (tuple): The steps of the requests
+    
+    Returns:
+        result (bool): If the posts are added to the database
+    '''
+
+    try:
+        soap = yield call_provider_steps(interface='post_list', pk=pk, username=username, is_tag=is_tag, is_cursor=False) # Get the data
+
+        if soap is None: # If there is an error
+            return False # Couldn't get the data
+
+    except:
+        return False # Couldn't get the data
+
+    try:
+        last_post = yield call_step(function=get_last_post_code, username=username, is_tag=is_tag) # Get the last post that is checked
+
+        if last_post == False: # There was an error
+            return False # Couldn't get the last post that is checked
+
+        last_post = last_post[0]
+
+        post_codes, cursor = get_first_posts_codes(soap=soap) # Get the posts codes of the first set and the cursor for the next set
+
+        # Add the first set of posts (the new last post that is checked is found in it)
+        new_last_post, is_done = yield db_step(function=add_page_posts_codes, pk=pk, is_tag=is_tag, post_codes=post_codes, last_post=last_post,
+                                               new_last_post=last_post, is_first_page=True)
+
+        if is_done or (cursor is None): # If the last post that is checked is found or there is no more post
+            yield db_step(function=update_last_post_code, username=username, is_tag=is_tag, last_post=last_post, new_last_post=new_last_post)
+            return True # All the posts are checked
+
+        couldnt_get_all = False # Flag for if couldn't get all the posts data
+
+        # Get the next sets of posts until there is no more post (the next pages are fetched on their own thread while this one is saved)
+        pages = prefetch_post_code_pages(pk=pk, username=username, is_tag=is_tag, cursor=cursor)
+
+        try:
+            while True:
+                data = yield call_step(function=get_next_page, pages=pages)
+
+                if data is None: # Couldn't get the data
+                    couldnt_get_all = True # Couldn't get all the posts data
+                    break
+
+                post_codes = [item['code'] for item in data['items']] # Get the posts codes
+
+                new_last_post, is_done = yield db_step(function=add_page_posts_codes, pk=pk, is_tag=is_tag, post_codes=post_codes, last_post=last_post,
+                                                       new_last_post=new_last_post)
+
+                if is_done: # If the last post that is checked is found
+                    yield db_step(function=update_last_post_code, username=username, is_tag=is_tag, last_post=last_post, new_last_post=new_last_post)
+                    return True # All the posts are checked
+
+                if not data['hasNext']:
+                    break # There is no more post
+
+        finally:
+            pages.close() # Stop fetching the next pages
+
+        if not couldnt_get_all: # If all the posts are checked
+            yield db_step(function=update_last_post_code, username=username, is_tag=is_tag, last_post=last_post, new_last_post=new_last_post)
+
+        return True # All the posts are checked
+
+    except:
+        return False # Couldn't get all the posts data
+
+def add_posts_codes(pk, username, is_tag):
+    '''
+    Adds the (tagged/normal) posts codes of the profile to the database
+
+    Parameters:
+        pk (int): The profile's pk
+        username (str): The username of the profile
+        is_tag (bool): If the posts are tagged posts
+    
+    Returns:
+        result (bool): If the posts are added to the database
+    '''
+
+    return run_steps(steps=add_posts_codes_steps(pk=pk, username=username, is_tag=is_tag))
+
+def get_last_post_code(username, is_tag):
+    '''
+    Gets the last (tagged/normal) post that is checked
+
+    Parameters:
+        username (str): The username of the profile
+        is_tag (bool): If the posts are tagged posts
+    
+    Returns:
+        last_post (tuple): The last post code that is checked (False if there was an error)
+    '''
+
+    instruction = "last_tagged_post_code" if is_tag else "last_post_code" # The instruction for the last post
+
+    query = [(f"""SELECT {instruction} FROM Profile
+             WHERE username = ?""", (username,))]
+    
+    return execute_query(queries=query, commit=False, fetch=False) # Get the last post that is checked
+
+def update_last_post_code(username, is_tag, last_post, new_last_post):
+    '''
+    Updates the last (tagged/normal) post that is checked if it has changed
+
+    Parameters:
+        username (str): The username of the profile
+        is_tag (bool): If the posts are tagged posts
+        last_post (str): The last post that was checked
+        new_last_post (str): The new last post that is checked
+    '''
+
+    if new_last_post != last_post: # If the last post that is checked has changed
+        instruction = "last_tagged_post_code" if is_tag else "last_post_code" # The instruction for the last post
+
+        query = [(f"""UPDATE Profile SET {instruction} = ?
+                 WHERE username = ?""", (new_last_post, username))]
+        
+        execute_query(queries=query, commit=True, fetch=None) # Update the last post that is checked
+
+def get_first_posts_codes(soap):
+    '''
+    Gets the posts codes of the first set of posts and the cursor for the next set from the posts page
+
+    Parameters:
+        soap (BeautifulSoup): The posts page
+    
+    Returns:
+        post_codes (list): The posts codes
+        cursor (str): The cursor for the next set of posts (None if there is no more post)
+    '''
+
+    post_codes = []
+
+    items = soap.find_all(attrs={'class': 'item'}) # Get the items of the posts
+
+    for item in items:
+        post_code = item.find(attrs={'class': 'img'}).find('a').attrs['href'] # Get the post link
+        post_codes.append(post_code[post_code.index('p/') + 2:post_code.rindex('/')]) # Get the post code
+    
+    try:
+        cursor = soap.find(attrs={'class': 'load-more'})
+        cursor = cursor.attrs['data-cursor'] # Get the cursor for the next set of posts
+    
+    except:
+        cursor = None # There is no more post
+
+    return post_codes, cursor
+
+def add_page_posts_codes(pk, is_tag, post_codes, last_post, new_last_post, is_first_page=False):
+    '''
+    Adds a set of (tagged/normal) posts codes to the database
+
+    Parameters:
+        pk (int): The profile's pk
+        is_tag (bool): If the posts are tagged posts
+        post_codes (list): The posts codes of the set
+        last_post (str): The last post that was checked
+        new_last_post (str): The new last post that is checked until now
+        is_first_page (bool): If it's the first set of posts (it may have pinned posts)
+    
+    Returns:
+        new_last_post (str): The new last post that is checked
+        is_done (bool): If the last post that was checked is found
+    '''
+
+    count = len(post_codes) # Number of the posts that should be added
+    for i in range(len(post_codes)):
+        if ((not is_first_page) or i > 2 or is_tag) and last_post == post_codes[i]: # If the post is the last post that is checked
+            count = i + 1 # The posts after it are already checked
+            break
+
+    is_added = add_posts(pk=pk, post_codes=post_codes[:count], is_tag=is_tag) # Add the whole set with a single statement and commit
+
+    for i in range(count):
+        post_code = post_codes[i]
+
+        if not is_added:
+            new_last_post = post_code # Couldn't add the post to the database
+        
+        # If it's the first tagged post or the 4th post (the first post that is certainly not pinned)
+        if is_first_page and ((is_tag and i == 0) or ((not is_tag) and i == 3)):
+            new_last_post = post_code # Set the last post that is checked
+        
+        if ((not is_first_page) or i > 2 or is_tag) and last_post == post_code: # If the post is the last post that is checked
+            return new_last_post, True # All the posts are checked
+    
+    return new_last_post, False
+
+def call_post_page_api_steps(post_code, use_cache=True):
+    '''
+    Calls the API for the post page (the shared body of call_post_page_api and async_call_post_page_api)
+
+    Parameters:
+        post_code (str): The post's code
+        use_cache (bool): Can a recently saved response be used instead of sending the request
+    
+    Yields:
+        step (tuple): The steps of the request
+    
+    Returns:
+        soap (BeautifulSoup): The post data
+    '''
+
+    from bs4 import BeautifulSoup
+
+    try:
+        link = f"https://imginn.com/p/{post_code}" # The link for the post page
+
+        text = None
+
+        if use_cache: # Reuse the recent response (if any)
+            text = yield call_step(function=read_cached_response, url=link, cache_type='post_page')
+
+        if text is not None:
+            return (yield cpu_step(function=BeautifulSoup, markup=text, features='html.parser')) # Return the data
+
+        response = yield send_request_steps(url=link, method='GET') # Get the data
+
+        if response is None:
+            return None # Couldn't get the data
+
+        soap = yield cpu_step(function=BeautifulSoup, markup=response.text, features='html.parser') # Parse the response using BeautifulSoup to get the data
+
+        if soap.find(attrs={'class': 'page-post'}) is not None: # Only save the pages that have the post
+            yield call_step(function=save_cached_response, url=link, text=response.text)
+
+        return soap # Return the data
+
+    except:
+        return None # Couldn't get the data
+
+def call_post_page_api(post_code, use_cache=True):
+    '''
+    Calls the API for the post page
+
+    Parameters:
+        post_code (str): The post's code
+        use_cache (bool): Can a recently saved response be used instead of sending the request
+    
+    Returns:
+        soap (BeautifulSoup): The post data
+    '''
+
+    return run_steps(steps=call_post_page_api_steps(post_code=post_code, use_cache=use_cache))
+
+def get_single_post_data_steps(post_code):
+    '''
+    Gets the data of a single post (the shared body of get_single_post_data and async_get_single_post_data)
+
+    Parameters:
+        post_code (str): The post's code
+    
+    Yields:
+        step (tuple): The steps of the providers
+    
+    Returns:
+        data (tuple): The post data
+    '''
+
+    try:
+        soap = yield call_provider_steps(interface='post_page', post_code=post_code) # Get the data
+
+        if soap is None:
+            return None # Couldn't get the post data
+
+        return (yield cpu_step(function=parse_single_post_data, soap=soap)) # Return the post data
+
+    except:
+        return None # Couldn't get the post data
+
+def get_single_post_data(post_code):
+    '''
+    Gets the data of a single post
+
+    Parameters:
+        post_code (str): The post's code
+    
+    Returns:
+        data (tuple): The post data
+    '''
+
+    return run_steps(steps=get_single_post_data_steps(post_code=post_code))
+
+def parse_single_post_data(soap):
+    '''
+    Gets the data of a single post from the post page
+
+    Parameters:
+        soap (BeautifulSoup): The post page
+    
+    Returns:
+        data (tuple): The post data
+    '''
+
+    try:
+        data = soap.find(attrs={'class': 'page-post'}) # Find the post data
+
+        try:
+            caption = data.find(attrs={'class': 'desc'}).text.strip() # Get the caption of the post
+        
+        except:
+            caption = None # Post doesn't have a caption
+
+        timestamp = int(data.get_attribute_list('data-created')[0]) # Get the timestamp of the post
+
+        links = [] # List of media links
+
+        single_media = False # Flag for if the post has single media
+
+        try:
+            swiper = data.find(attrs={'class': 'swiper-wrapper'}) # Get the swiper of the post
+
+            if swiper is not None: # If the post has multiple media
+                try:
+                    slide = swiper.find_all(attrs={'class': 'swiper-slide'}) # Get the slides of the post
+
+                    for item in slide:
+                        item_type = 'img' # The type of the media
+
+                        if item.find('video') is not None: # If the media is video
+                            item_type = 'video' # Set the type to video
+                        
+                        link = item.get_attribute_list('data-src')[0] # Get the media link
+
+                        if 'null.jpg' in link: # If the media link is null
+                            link = item.find(item_type).attrs['poster'] # Get the poster link instead
+                            item_type = 'img' # Set the type to image
+                        
+                        links.append((link, item_type)) # Add the media link to the list
+                
+                except:
+                    return None # Couldn't get the post data
+            
+            else: # If the post has single media
+                single_media = True # The post has single media
+        
+        except: # If the post has single media
+            single_media = True # The post has single media
+
+        if single_media: # If the post has single media
+            download = data.find(attrs={'class': 'downloads'}) # Get the download section of the post
+
+            if download is not None: # If the post has download section
+                media = data.find(attrs={'class': 'media-wrap'}) # Get the media of the post
+
+                item_type = 'img' # The type of the media
+
+                if len(media.get_attribute_list('class')) == 2: # If the media is video
+                    item_type = 'video' # Set the type to video
 
-            new_data = get_profile_data(username=username) # Get new information of user
-            if new_data is None:
-                print("Couldn't update profile")
-                return False
-        
-        else:
-            new_data = profile_data # Use the profile's data passed as argument
-        
-        # Check if profile picture has changed and the last profile isn't default icon
-        profile_changed = (user_data[1] != new_data['profile_id']) and (user_data[0] != user_data[1])
+                link = download.find('a').attrs['href'] # Get the media link
 
-        if not os.path.exists(os.path.join(path, f"{new_data['username']}@{new_data['pk']}")): # Make the profile folder
-            os.mkdir(os.path.join(path, f"{new_data['username']}@{new_data['pk']}"))
-        
-        if not os.path.exists(os.path.join(path, f"{new_data['username']}@{new_data['pk']}", "Profiles")): # Make the Profiles folder
-            os.mkdir(os.path.join(path, f"{new_data['username']}@{new_data['pk']}", "Profiles"))
-        
-        elif profile_changed: # Profile picture has changed
-            if not move_profile_history(pk=user_data[0], profile_id=user_data[1]): # Move the past profile to history
-                print("Couldn't update profile")
-                return False
-        
-        # Try downloading the profile picture
-        isDownloaded = try_downloading(link=new_data['original_profile_pic_link'], address=new_data['original_profile_pic'])
+                if 'u=' in link: # If the media link is from google translation
+                    link = link[link.index('u=') + 2:] # Get rid of google translation part of the link
 
-        if not isDownloaded: # Couldn't download the profile picture
-            print("Couldn't update profile")
-            return False
+                    link = unquote(link) # Decode the link
+
+                if 'null.jpg' in link: # If the media link is null
+                    link = media.find(item_type).attrs['poster'] # Get the poster link instead
+                    item_type = 'img' # Set the type to image
+
+                if '&dl' in link: # If the media link is direct download link
+                    link = link[:link.index('&dl')] # Get the media link
+                
+                links.append((link, item_type)) # Add the media link to the list
+        
+        return (caption, timestamp, links) # Return the post data
     
     except:
-        print("Couldn't update profile")
-        return False
-    
-    try:
-        # Try Making a thumbnail for the profile picture
-        if not make_thumbnail(address=new_data['original_profile_pic'], size=128, circle=True):
-            print("Couldn't update profile")
-            return False
-        
-        query = f"""UPDATE Profile SET full_name = \"{new_data['full_name']}\", page_name = """
+        return None # Couldn't get the post data
 
-        if new_data['page_name'] is None:
-            query += "NULL"
-        else:
-            query += f"""\"{new_data['page_name']}\""""
-        
-        query += ", biography = "
-        
-        if new_data['biography'] == '':
-            query += f"NULL"
-            new_data['biography'] = None
-        else:
-            query += f"""\"{new_data['biography']}\""""
+def fetch_single_post_steps(post_code, address):
+    '''
+    Downloads the media of a single post without updating the database (the shared body of fetch_single_post and async_fetch_single_post)
 
-        query += f""", is_private = {new_data['is_private']}, public_email = """
+    Parameters:
+        post_code (str): The post's code
+        address (str): The address for the post
+    
+    Yields:
+        step (tuple): The steps of the download
+    
+    Returns:
+        post (tuple): The caption, timestamp and number of items of the post
+    '''
 
-        if new_data['public_email'] is None:
-            query += "NULL"
-        else:
-            query += f"""\"{new_data['public_email']}\""""
+    try:
+        data = yield get_single_post_data_steps(post_code=post_code) # Get the data
 
-        query += f""", media_count = {new_data['media_count']}, follower_count = {new_data['follower_count']},
-                        following_count = {new_data['following_count']}, profile_id = {new_data['profile_id']}
-                        WHERE pk = {new_data['pk']}"""
-        
-        queries = [query] # Update the profile's information in database
+        if data is None: # Couldn't get the data
+            return None # Couldn't download the post
 
-        if profile_changed: # Profile picture has changed
-            queries.append(f"""INSERT INTO ProfileHistory VALUES({new_data['pk']},
-                           {user_data[1]})""") # Add the past profile to history
-        
-        result = execute_query(queries=queries, commit=True, fetch=None) # Update the profile's information in database
+        caption = data[0] # Get the caption of the post
+        timestamp = data[1] # Get the timestamp of the post
+        links = data[2] # Get the media links of the post
 
-        if result == False: # Couldn't update the profile
-            if profile_changed: # Profile picture has changed
-                try:
-                    files = glob.glob(os.path.join(path, f"{new_data['username']@new_data['pk']}", "Profiles", "Profile*")) # Get the profile files
+        addresses = [os.path.join(f"{address}", f"{post_code}_{i}") for i in range(len(links))] # The address of each media
+        saved = yield call_step(function=get_saved_media, addresses=addresses) # Saved by an interrupted run
 
-                    for file in files:
-                        os.remove(file) # Remove the profile files
-                
-                except:
-                    pass # Couldn't remove the profile files
+        pending = [i for i in range(len(links)) if addresses[i] not in saved]
 
-            print("Couldn't update profile")
-            return False
+        # Try downloading all of the media at the same time and making their thumbnails as soon as each one is downloaded
+        downloads = yield call_step(function=download_many, async_function=async_download_many, jobs=[(links[i][0], addresses[i]) for i in pending],
+                                    thumbnails=[{'size': 320, 'is_video': (links[i][1] == 'video')} for i in pending])
 
-        if with_highlights and (not new_data['is_private']):
-            update_highlights(pk=new_data['pk']) # If the account isn't private then update it's highlights
+        if not all(downloads):
+            return None # Couldn't download the post
 
-        list_profiles() # Update the screen
+        return (caption, timestamp, len(links)) # Return the post information
 
-        return True # Profile updated successfully
-        
     except:
-        if profile_changed: # Profile picture has changed
-            try:
-                files = glob.glob(os.path.join(path, f"{new_data['username']@new_data['pk']}", "Profiles", "Profile*")) # Get the profile files
+        return None # Couldn't download the post
 
-                for file in files:
-                    os.remove(file) # Remove the profile files
-            
-            except:
-                pass # Couldn't remove the profile files
+def fetch_single_post(post_code, address):
+    '''
+    Downloads the media of a single post (without updating the database)
 
-        print("Couldn't update profile")
-        return False # Threre was an error somewhere
+    Parameters:
+        post_code (str): The post's code
+        address (str): The address for the post
+    
+    Returns:
+        post (tuple): The caption, timestamp and number of items of the post
+    '''
 
-def check_duplicate_stories(pk, story_pk, highlight_id, highlight_title, stories):
+    return run_steps(steps=fetch_single_post_steps(post_code=post_code, address=address))
+
+def save_single_post(pk, post_code, is_tag, post):
     '''
-    Checks if the story is already downloaded
+    Saves the information of a downloaded post in the database
 
     Parameters:
         pk (int): The profile's pk
-        story_pk (int): The story's pk
-        highlight_id (int): The highlight's id
-        highlight_title (str): The highlight's title
-        stories (list): The list of stories
+        post_code (str): The post's code
+        is_tag (bool): If the post is a tagged post
+        post (tuple): The caption, timestamp and number of items of the post
     
     Returns:
-        result (bool): If the story already exists and downloaded or not
+        status (bool): If the post is saved
     '''
 
     try:
-        query = [f"""SELECT * FROM Story WHERE pk = {pk} AND
-                 story_pk = {story_pk} AND highlight_id = {highlight_id}"""]
-        
-        same_story = execute_query(queries=query, commit=False, fetch=False) # Check if the story is already downloaded
-        
-        if same_story == False:
-            return None # Couldn't check the story
+        caption, timestamp, number_of_items = post
 
-        if same_story is not None: # An story with same story_pk and highlight_id is already downloaded
-            return True # Story already downloaded
-        
-        isHighlight = pk != highlight_id # highlight_id = pk is for stories
+        if caption == "":
+            caption = None # If the caption is empty
 
-        folder_name = find_folder_name(pk=pk) # Get the folder name for the profile
+        queries = [("""UPDATE Post SET number_of_items = ?, caption = ?, timestamp = ?
+                   WHERE pk = ? AND post_code = ? AND is_tag = ?""", (number_of_items, caption, timestamp, pk, post_code, is_tag)), # The query for updating the post
+                   ("""DELETE FROM Job WHERE kind = 'post' AND job_key = ?""", (get_post_job_key(pk=pk, post_code=post_code, is_tag=is_tag),))] # The post is done
 
-        for i in range(len(stories)):
-            if stories[i][1] == story_pk: # Story already downloaded
-                
-                if stories[i][2] == pk: # It was a story before and now it's a highlight
-                    try:
-                        files = glob.glob(os.path.join(path, f"{folder_name}", "Stories", f"{story_pk}*"))
-                        if len(files) == 2: # Check if the files exist, if yes then copy them to the highlight folder
-                            for file in files:
-                                if '/' in file:
-                                    index = file.rindex("/")
-                                
-                                else:
-                                    index = file.rindex("\\")
-                                
-                                shutil.copy(file, os.path.join(path, f"{folder_name}", "Highlights", f"{highlight_title}_{highlight_id}", f"{file[index + 1:]}"))
-
-                            query = [f"""INSERT INTO Story VALUES({stories[i][0]},
-                                     {stories[i][1]}, {highlight_id}, {stories[i][3]})"""]
-                            
-                            result = execute_query(queries=query, commit=True, fetch=None) # Add the story to the database
+        result = execute_query(queries=queries, commit=True, fetch=None) # Update the post in the database
 
-                            if result == False:
-                                return False # Something went wrong but we know it's not from the same highlight
-                            
-                            return True
-                    
-                    except:
-                        return False # Something went wrong but we know it's not from the same highlight
-
-                else: # It's from another highlight
-                    try:
-                        folders = glob.glob(os.path.join(path, f"{folder_name}", "Highlights", f"*_{stories[i][2]}"))
-                        if len(folders) == 1:
-                            files = glob.glob(os.path.join(folders[0], f"{story_pk}*"))
-                            if len(files) == 2: # Check if the files exist, if yes then copy them to the highlight folder
-                                for file in files:
-                                    if '/' in file:
-                                            index = file.rindex("/")
-                                    
-                                    else:
-                                        index = file.rindex("\\")
-                                    
-                                    if isHighlight:
-                                        shutil.copy(file, os.path.join(path, f"{folder_name}", "Highlights", f"{highlight_title}_{highlight_id}", f"{file[index + 1:]}"))
-                                    
-                                    else:
-                                        shutil.copy(file, os.path.join(path, f"{folder_name}", "Stories", f"{file[index + 1:]}"))
-                                
-                                query = [f"""INSERT INTO Story VALUES({stories[i][0]},
-                                         {stories[i][1]}, {highlight_id}, {stories[i][3]})"""]
-                                
-                                result = execute_query(queries=query, commit=True, fetch=None) # Add the story to the database
-
-                                if result == False:
-                                    return False # Something went wrong but we know it's not from the same highlight
-                                
-                                return True
-                            
-                    except:
-                        return False # Something went wrong but we know it's not from the same highlight
-
-                break # One story with same story_pk is enough
+        if result == False:
+            return False # Couldn't update the post in the database 
         
-        return False # Couldn't find the story
+        return True # The post is saved
     
     except:
-        return None # Something went wrong
+        return False # Couldn't save the post
 
-def update_stealthgram_tokens(headers):
+def download_single_post(pk, post_code, is_tag, address):
     '''
-    Updates the stealthgram tokens
+    Downloads a single post
 
     Parameters:
-        headers (Headers): The headers of the request
+        pk (int): The profile's pk
+        post_code (str): The post's code
+        is_tag (bool): If the post is a tagged post
+        address (str): The address for the post
     
     Returns:
-        result (bool): If the tokens are updated successfully or not
+        status (bool): If the post is downloaded
     '''
 
     try:
-        set_cookies = headers.get('set-cookie').split(' ') # Get the set-cookie's from the headers
+        post = fetch_single_post(post_code=post_code, address=address) # Download the media of the post
 
-        found = 0 # Number of tokens found
+        if post is None:
+            return False # Couldn't download the post
         
-        global stealthgram_tokens
-        for cookie in set_cookies:
-            if 'access-token' in cookie:
-                stealthgram_tokens['access-token'] = cookie[cookie.index('=') + 1:cookie.index(';')]
-                found += 1
-            
-            elif 'refresh-token' in cookie:
-                stealthgram_tokens['refresh-token'] = cookie[cookie.index('=') + 1:cookie.index(';')]
-                found += 1
-            
-            if found == 2:
-                break # Found both tokens
-    
-        return True # Tokens updated successfully
+        return save_single_post(pk=pk, post_code=post_code, is_tag=is_tag, post=post) # Update the post in the database
     
     except:
-        return False # Couldn't update the tokens
+        return False # Couldn't download the post
 
-def get_stealthgram_tokens():
+def download_posts_steps(username, is_tag, direct_call=True):
     '''
-    Gets the stealthgram tokens
+    Downloads the (tagged/normal) posts of the profile (the shared body of download_posts and async_download_posts)
 
+    Parameters:
+        username (str): The username of the profile
+        is_tag (bool): If the posts are tagged posts
+        direct_call (bool): If the function is called directly or not
+    
+    Yields:
+        step (tuple): The steps of the downloads
+    
     Returns:
-        result (bool): If the tokens are updated successfully or not
+        status (bool): If the posts are downloaded
     '''
 
     try:
-        url = 'https://stealthgram.com/'
+        if direct_call: # If the function is called directly
+            updated = yield update_profile_steps(username=username, with_highlights=False) # Update the profile
 
-        response = send_request(url=url, method='GET', headers=HEADERS) # Get the data
+            if not updated:
+                print("Couldn't update the profile!")
 
-        if response is None:
-            return False # Couldn't get the tokens
-        
-        global stealthgram_tokens
-        stealthgram_tokens = {} # Empty the tokens
+        query = [("""SELECT pk, is_private FROM Profile WHERE username = ?""", (username,))]
 
-        if update_stealthgram_tokens(headers=response.headers):
-            return True # Tokens updated successfully
+        result = yield call_step(function=execute_query, queries=query, commit=False, fetch=False)
 
-        stealthgram_tokens = None # Tokens are not available
+        if result == False:
+            return False # There was an error
+
+        pk, is_private = result # Get the pk and is_private of the profile
+
+        if is_private == 1: # If the account is private
+            print("This account is private!")
+            return False # It's not possible to download the posts of a private account
+
+        yield add_posts_codes_steps(pk=pk, username=username, is_tag=is_tag) # Add the (tagged/normal) posts codes of the profile
+
+        query = [("""SELECT post_code FROM Post WHERE pk = ? AND
+                 is_tag = ? AND number_of_items IS NULL""", (pk, is_tag))]
+
+        result = yield call_step(function=execute_query, queries=query, commit=False, fetch=True)
+
+        if result == False:
+            return False # There was an error
+
+        posts = result # Get the list of posts that are not downloaded yet
+
+        address = yield call_step(function=get_posts_address, pk=pk, is_tag=is_tag) # The address for the (tagged/normal) posts
+
+        if address is None:
+            return False # Couldn't find the folder name
+
+        if not os.path.exists(os.path.join(path, address)):
+            os.makedirs(os.path.join(path, address), exist_ok=True) # Make the folder for the posts
+
+        # So they are resumed if the run is stopped
+        yield db_step(function=add_jobs, kind='post', jobs=[get_post_job(pk=pk, post_code=post[0], is_tag=is_tag) for post in posts])
+
+        yield download_pending_posts_steps(posts=[(pk, post[0], is_tag, address) for post in posts])
+
+        return True # Posts are downloaded
 
-        return False # Couldn't get the tokens
-    
     except:
-        stealthgram_tokens = None # Tokens are not available
-        return False # Couldn't get the tokens
+        return False # Couldn't download any post
 
-def call_stealthgram_api(pk, highlight_id, is_highlight=False):
+def download_posts(username, is_tag, direct_call=True):
     '''
-    Calls the stealthgram API to get the data
+    Downloads the (tagged/normal) posts of the profile
 
     Parameters:
-        pk (int): The profile's pk
-        highlight_id (int): The highlight's id
-        is_highlight (bool): Is the data for highlight or not
+        username (str): The username of the profile
+        is_tag (bool): If the posts are tagged posts
+        direct_call (bool): If the function is called directly or not
     
     Returns:
-        response (requests.Response): The response of the request
+        status (bool): If the posts are downloaded
     '''
-    
-    try:
-        # Base API link
-        link = "https://stealthgram.com/api/apiData"
-
-        # Set the payload for the request
-        if is_highlight: # If the data is for highlight
-            payload = json.dumps({
-                "body": {
-                    "id": str(pk),
-                },
-                "url": "user/get_highlights"
-            })
-        
-        else:
-            if pk != highlight_id: # pk == highlight_id is for stories
-                payload = json.dumps({
-                    "body": {
-                        "ids": [
-                            str(highlight_id)
-                        ],
-                    },
-                    "url": "highlight/get_stories"
-                })
-
-            else:
-                payload = json.dumps({
-                    "body": {
-                        "ids": [
-                            pk
-                        ],
-                    },
-                    "url": "user/get_stories"
-                })
-        
-        # Check if stealthgram tokens are available
-        global stealthgram_tokens
-        if stealthgram_tokens is None:
-            if not get_stealthgram_tokens():
-                return None # Couldn't update the tokens
-        
-        # Set the headers for the request
-        headers = {
-            'Cookie': f"access-token={stealthgram_tokens['access-token']}; refresh-token={stealthgram_tokens['refresh-token']};",
-        }
-        headers.update(HEADERS) # Add the default headers to the request
-
-        response = send_request(url=link, payload=payload, headers=headers) # Get the data
 
-        update_stealthgram_tokens(headers=response.headers) # Update the stealthgram tokens
-
-        return response # Return the response
-    
-    except:
-        return None # There was an error
+    return run_steps(steps=download_posts_steps(username=username, is_tag=is_tag, direct_call=direct_call))
 
-def get_stories_data(pk, highlight_id):
+def get_posts_address(pk, is_tag):
     '''
-    Gets the stories (or highlights) data of the profile
+    Gets the address of the (tagged/normal) posts of the profile
 
     Parameters:
         pk (int): The profile's pk
-        highlight_id (int): The highlight's id
+        is_tag (bool): If the posts are tagged posts
     
     Returns:
-        data (list): The stories data
+        address (str): The address of the posts' folder (None if the profile's folder isn't found)
     '''
 
-    try:
-        response = call_stealthgram_api(pk=pk, highlight_id=highlight_id) # Get the stories data
-
-        if response is None:
-            return None # Couldn't get the data
+    folder_name = find_folder_name(pk=pk) # Get the folder name for the profile
 
-        data = json.loads(response.text) # Parse the data to json
+    if folder_name is None:
+        return None # Couldn't find the folder name
 
-        # Set the label for getting the stories from the response
-        label = ('highlight:' if pk != highlight_id else '') + str(highlight_id)
+    if is_tag: # If the posts are tagged posts
+        return os.path.join(f"{folder_name}", "Tagged") # The address for the tagged posts
+    
+    return os.path.join(f"{folder_name}", "Posts") # The address for the normal posts
 
-        # If there is currently no story or highlight
-        if label not in data['response']['body']['reels'].keys():
-            return [] # Return an empty list
-        
-        else: # If there is a story or highlight
-            data = data['response']['body']['reels'][label]['items']
+def get_post_job_key(pk, post_code, is_tag):
+    '''
+    Gets the key of the post's job (a tagged post can be in the posts of several profiles)
 
-        return data # Return the stories data
+    Parameters:
+        pk (int): The profile's pk
+        post_code (str): The post's code
+        is_tag (bool): If the post is a tagged post
     
-    except:
-        return None # Couldn't get the stories data
+    Returns:
+        key (str): The key of the job
+    '''
+
+    return f"{pk}_{post_code}_{int(is_tag)}"
 
-def get_single_story(pk, new_story, highlight_id, highlight_title, stories):
+def get_post_job(pk, post_code, is_tag):
     '''
-    Gets a single story for download
+    Gets the job of downloading a post (the address of the post isn't saved, since the profile's folder changes with the username)
 
     Parameters:
         pk (int): The profile's pk
-        new_story (dict): The new story data
-        highlight_id (int): The highlight's id
-        highlight_title (str): The highlight's title
-        stories (list): The list of stories
+        post_code (str): The post's code
+        is_tag (bool): If the post is a tagged post
     
     Returns:
-        story (tuple): The story information
+        job (tuple): The key and payload of the job
     '''
 
-    try:
-        folder_name = find_folder_name(pk=pk) # Get the folder name for the profile
-
-        if folder_name is None:
-            return None # Couldn't find the folder name
+    return (get_post_job_key(pk=pk, post_code=post_code, is_tag=is_tag), {'pk': pk, 'post_code': post_code, 'is_tag': is_tag})
 
-        story_pk = int(new_story['id'][:new_story['id'].find('_')]) # The story's pk
+def download_pending_posts_steps(posts):
+    '''
+    Downloads the posts that their codes are already added, several at the same time, and saves each one in the database as soon as it's done
+    (the shared body of download_pending_posts and the async functions)
 
-        # Check if the story is already downloaded
-        downloaded = check_duplicate_stories(pk=pk, story_pk=story_pk, highlight_id=highlight_id, highlight_title=highlight_title, stories=stories)
+    Parameters:
+        posts (list): The profile's pk, the post's code, if it's a tagged post and the address for the post of each post
+    
+    Yields:
+        step (tuple): The steps of the downloads
+    '''
 
-        if downloaded or (downloaded is None):
-            return None # It was (found and copied) or (couldn't check and it may be duplicate) so skip this one
+    def download_post(pk, post_code, is_tag, address):
+        try:
+            post = yield fetch_single_post_steps(post_code=post_code, address=address) # Download the media of the post
 
-        timestamp = new_story['taken_at'] # The timestamp of the story
+            if (post is None) or (not (yield db_step(function=save_single_post, pk=pk, post_code=post_code, is_tag=is_tag, post=post))): # Update the post in the database
+                yield db_step(function=fail_jobs, kind='post', keys=[get_post_job_key(pk=pk, post_code=post_code, is_tag=is_tag)], error="Couldn't download the post")
 
-        media_link = None # The media link of the story
-        is_video = False # Is the story is video
+        except:
+            pass # Couldn't download the post, the others are still downloaded
 
-        if 'video_versions' in new_story.keys(): # If the story is video
-            media_link = new_story['video_versions'][0]['url'].replace("se=7&", "") # Get the video link (better quality)
-            is_video = True
+    # The posts of all the profiles share the limit in the async functions
+    yield together(steps=[download_post(pk=pk, post_code=post_code, is_tag=is_tag, address=address) for pk, post_code, is_tag, address in posts],
+                   limit=('post', POST_WORKERS))
 
-        if media_link is None: # If story isn't video then get the best picture
-            media_link = new_story['image_versions2']['candidates'][0]['url'].replace("se=7&", "") # Get the picture link (better quality)
+def download_pending_posts(posts):
+    '''
+    Downloads the posts that their codes are already added, several at the same time, and saves each one in the database as soon as it's done
 
-        # Set the saving address according to being a story or highlight
-        if pk != highlight_id: # highlight_id == pk is for stories
-            media_address = os.path.join(f"{folder_name}", "Highlights", f"{make_filename_friendly(text=highlight_title)}_{highlight_id}", f"{story_pk}")
+    Parameters:
+        posts (list): The profile's pk, the post's code, if it's a tagged post and the address for the post of each post
+    '''
 
-        else:
-            media_address = os.path.join(f"{folder_name}", "Stories", f"{story_pk}")
-        
-        return (pk, story_pk, highlight_id, timestamp, media_link, media_address, is_video) # Return the story information
-    
-    except:
-        return None # Something went wrong
+    run_steps(steps=download_pending_posts_steps(posts=posts))
 
-def get_stories(pk, highlight_id, highlight_title):
+def get_async_state():
     '''
-    Gets the stories or highlights of the profile for download
+    Gets the async session and limits of the running event loop
 
-    Parameters:
-        pk (int): The profile's pk
-        highlight_id (int): The highlight's id
-        highlight_title (str): The highlight's title
-    
     Returns:
-        newStories (list): The list of new stories
-        number_of_items (int): The number of items
+        state (dict): The session and semaphores of the event loop
     '''
 
-    try:
-        data = get_stories_data(pk=pk, highlight_id=highlight_id) # Get the stories data
+    import asyncio
 
-        if data is None:
-            return None, 0 # Couldn't get the stories data
+    loop = asyncio.get_running_loop()
 
-        number_of_items = len(data) # Number of items in the stories or highlights
+    with async_lock:
+        if loop not in async_states: # First use in this event loop
+            async_states[loop] = {
+                'session': None, # Made on the first request
+                'semaphores': {}, # The limits of the downloads, hosts and posts
+            }
 
-        if number_of_items == 0:
-            return [], 0 # Return an empty list if there is no story
-        
-        query = [f"""SELECT * FROM Story WHERE pk = {pk}"""]
+        return async_states[loop]
 
-        stories = execute_query(queries=query, commit=False, fetch=True) # Get the list of already downloaded stories from database
-        
-        if stories == False:
-            return None, number_of_items # Something went wrong
+def get_async_session():
+    '''
+    Gets the async session of the running event loop (it keeps the connections alive for all of the hosts)
 
-        newStories = [] # List of new stories that need downloading
-        
-        for new_story in data:
-            # Get the story information
-            new_story_data = get_single_story(pk=pk, new_story=new_story, highlight_id=highlight_id, highlight_title=highlight_title, stories=stories)
+    Returns:
+        session (AsyncSession): The session for sending the requests
+    '''
 
-            if new_story_data is None:
-                continue # Couldn't get the story information so skip this one
+    from curl_cffi.requests import AsyncSession
 
-            newStories.append(new_story_data) # Add the story information to the list of new stories
-        
-        return newStories, number_of_items # Return the list of new stories and the number of items
-            
-    except:
-        return None, number_of_items # Something went wrong
+    state = get_async_state()
+
+    if state['session'] is None: # Make the session on the first request
+        state['session'] = AsyncSession(max_clients=ASYNC_CONNECTIONS)
+
+    return state['session']
 
-def download_stories(pk, highlight_id, highlight_title):
+def get_async_semaphore(name, value):
     '''
-    Downloads the stories or highlights of the profile
-    
+    Gets a semaphore of the running event loop
+
     Parameters:
-        pk (int): The profile's pk
-        highlight_id (int): The highlight's id
-        highlight_title (str): The highlight's title
+        name (str): The name of the semaphore
+        value (int): The number of the tasks that can hold it at the same time (used when it's made)
     
     Returns:
-        number_of_items (int): The number of items
+        semaphore (asyncio.BoundedSemaphore): The semaphore
     '''
 
-    # TODO: Needs change for GUI implementation and multithreading
-    # Get the list of new stories and the number of items
-    newstories, number_of_items = get_stories(pk=pk, highlight_id=highlight_id, highlight_title=highlight_title)
+    import asyncio
 
-    if newstories is None:
-        print("There was an error!")
-        return number_of_items # At least return the number of items
-    
-    elif len(newstories) == 0:
-        print("There was no story!")
-        return number_of_items # If there is no story then just return the number of items
+    semaphores = get_async_state()['semaphores']
 
-    for story in newstories:
-        try:
-            isDownloaded = try_downloading(link=story[4], address=story[5]) # Try downloading the media
+    if name not in semaphores: # First use of this semaphore
+        semaphores[name] = asyncio.BoundedSemaphore(value)
 
-            if not isDownloaded: # Couldn't download the media
-                print("Couldn't download story!")
-                continue
+    return semaphores[name]
 
-            if not make_thumbnail(address=story[5], size=320, is_video=story[6]): # Try making a thumbnail for the media
-                print("Couldn't download story!")
-                continue
+async def close_async_session():
+    '''
+    Closes the async session of the running event loop and forgets it's limits
+    '''
 
-            query = [f"""INSERT INTO Story VALUES({story[0]}, {story[1]},
-                     {story[2]}, {story[3]})"""]
-            
-            result = execute_query(queries=query, commit=True, fetch=None) # Add the story to the database
+    import asyncio
 
-            if result == False:
-                print("There was an error!")
-                continue # Couldn't download, skip and try the next one
+    loop = asyncio.get_running_loop()
+
+    with async_lock:
+        state = async_states.pop(loop, None)
+
+    if (state is not None) and (state['session'] is not None):
+        try:
+            await state['session'].close() # Close the connections
 
         except:
-            print("There was an error!")
-            continue # Couldn't download, skip and try the next one
-    
-    return number_of_items # Return the number of items
+            pass
 
-def add_cover_history(pk, highlight_id, new_cover_link):
+def get_cpu_executor():
     '''
-    Checks the highlight cover and if it has changed then add it to the database
+    Gets the workers pool for the CPU work of the async functions
 
-    Parameters:
-        pk (int): The profile's pk
-        highlight_id (int): The highlight's id
-        new_cover_link (str): The new cover link
-    
     Returns:
-        status (str): The status of the cover
+        executor (ThreadPoolExecutor): The workers pool
     '''
 
-    try:
-        folder_name = find_folder_name(pk=pk) # Get the folder name for the profile
+    global cpu_executor
+    with db_lock:
+        if cpu_executor is None: # Make the workers pool on the first use
+            cpu_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="cpu")
 
-        if folder_name is None:
-            return None # Couldn't find the folder name
-        
-        # Check if the highlight folder already exists
-        folder = glob.glob(os.path.join(path, f"{folder_name}", "Highlights", f"*_{highlight_id}"))
+        return cpu_executor
 
-        if len(folder) == 0: # If the folder doesn't exist
-            return "No File" # There is no folder so there is nothing to do
-        
-        cover_file = glob.glob(os.path.join(folder[0], "Cover.*")) # Check if the cover exists
+async def run_cpu(function, *args, **kwargs):
+    '''
+    Runs the CPU work (like parsing pages) on the workers without blocking the event loop (it shouldn't wait for the other workers)
 
-        if len(cover_file) == 0: # If the cover doesn't exist
-            return "No File" # There is no cover so there is nothing to do
-        
-        old_cover = open(cover_file[0], 'rb').read() # Get the old cover
+    Parameters:
+        function (function): The function to run
+        args (list): The arguments for the function
+        kwargs (dict): The keyword arguments for the function
+    
+    Returns:
+        result (any): The result of the function
+    '''
 
-        new_cover = requests.get(new_cover_link, allow_redirects=True, timeout=60) # Get the new cover
+    import asyncio
 
-        if old_cover == new_cover.content: # If the cover hasn't changed
-            return "Same" # The cover is the same
-        
-        if not os.path.exists(os.path.join(folder[0], "History")): # Make the History folder
-            os.mkdir(os.path.join(folder[0], "History"))
-        
-        new_name = int(time()) # Get the new name for the cover
+    return await asyncio.get_running_loop().run_in_executor(get_cpu_executor(), partial(function, *args, **kwargs))
 
-        shutil.move(cover_file[0], os.path.join(folder[0], "History",
-                                    f"{new_name}" + cover_file[0][cover_file[0].rindex('.'):])) # Move the old cover to History folder
-        
-        if os.path.exists(os.path.join(folder[0], "Cover_thumbnail.png")): # If the thumbnail exists
-            shutil.move(os.path.join(folder[0], "Cover_thumbnail.png"),
-                        os.path.join(folder[0], "History", f"{new_name}_thumbnail.png")) # Move the old thumbnail to History folder
-        
-        query = [f"""INSERT INTO CoverHistory VALUES({highlight_id}, {new_name})"""]
+async def run_db(function, **kwargs):
+    '''
+    Runs the function on the database writer, so the changes of all the tasks are done in order with a single connection
+    (only for the functions that just run queries, the reads and the file work are run with asyncio.to_thread on the read-only connections)
 
-        execute_query(queries=query, commit=True, fetch=None) # Add the cover to the database
-        
-        return "Changed" # The cover has changed
+    Parameters:
+        function (function): The function to run (it's queries use the connection of the writer)
+        kwargs (dict): The arguments for the function
+    
+    Returns:
+        result (any): The result of the function (after it's changes are committed)
+    '''
 
-    except:
-        return None # Something went wrong
+    import asyncio
 
-def get_highlights_data(pk):
+    return await asyncio.wrap_future(submit_db(function, **kwargs))
+
+async def async_run_step(step):
     '''
-    Gets the highlights data of the profile
+    Runs a step of a shared body without blocking the event loop (async version of run_step)
 
     Parameters:
-        pk (int): The profile's pk
+        step (tuple/generator): The step (or a shared body)
     
     Returns:
-        data (list): The highlights data
+        result (any): The result of the step
     '''
 
-    try:
-        response = call_stealthgram_api(pk=pk, highlight_id=None, is_highlight=True) # Get the highlights data
+    import asyncio
 
-        if response is None: # Couldn't get the highlights data
-            return None
-        
-        data = json.loads(response.text)
-        data = data['response']['body']['data']['user']['edge_highlight_reels']['edges']
+    if isinstance(step, GeneratorType):
+        return await async_run_steps(steps=step) # Another shared body
 
-        return data # Return the highlights data
-    
-    except:
-        return None # Couldn't get the highlights data
+    kind, function, extra, kwargs = step
+
+    if kind == 'together':
+        if extra is None:
+            return list(await asyncio.gather(*[async_run_step(step=item) for item in function])) # All at the same time
+
+        semaphore = get_async_semaphore(name=extra[0], value=extra[1]) # Shared by all of the tasks of the event loop
 
-def update_single_highlight(pk, new_highlight, highlights):
+        async def run_limited(step):
+            async with semaphore:
+                return await async_run_step(step=step)
+
+        return list(await asyncio.gather(*[run_limited(step=item) for item in function]))
+
+    if kind == 'db':
+        return await run_db(function, **kwargs)
+
+    if kind == 'cpu':
+        return await run_cpu(function, **kwargs)
+
+    if extra is not None:
+        return await extra(**kwargs) # The async version of the function
+
+    return await asyncio.to_thread(function, **kwargs) # The blocking work (like the files and the reads of the database) runs in a thread
+
+async def async_run_steps(steps):
     '''
-    Updates a single highlight
+    Runs a shared body of a sync and async function without blocking the event loop (async version of run_steps)
 
     Parameters:
-        pk (int): The profile's pk
-        new_highlight (dict): The new highlight data
-        highlights (list): The list of highlights
+        steps (generator): The shared body
     
     Returns:
-        result (bool): If the highlight is updated successfully or not
+        result (any): The result of the shared body
     '''
 
-    try:
-        highlight_id = int(new_highlight['id'])
-
-        title = new_highlight['title']
-        folder_name = make_filename_friendly(text=title) # Make the title filename friendly
-        cover_link = new_highlight['cover_media_cropped_thumbnail']['url']
-
-        profile_folder_name = find_folder_name(pk=pk) # Get the folder name for the profile
+    result = None
+    error = None # The error of the last step is raised in the shared body
 
-        if profile_folder_name is None:
-            return False # Couldn't find the folder name
+    while True:
+        try:
+            step = steps.throw(error) if error is not None else steps.send(result)
 
-        # Check if the highlight folder already exists
-        folder = glob.glob(os.path.join(path, f"{profile_folder_name}", "Highlights", f"*_{highlight_id}"))
+        except StopIteration as stop:
+            return stop.value
 
-        for i in range(len(highlights)):
-            if highlights[i][0] == highlight_id: # If highlight already exists
+        try:
+            result, error = await async_run_step(step=step), None
 
-                if (highlights[i][2] == title): # If title hasn't changed
-                    if (len(folder) == 0): # And folder doesn't exist
-                        os.mkdir(os.path.join(path, f"{profile_folder_name}", "Highlights", f"{folder_name}_{highlight_id}"))
+        except Exception as exception:
+            result, error = None, exception
 
-                else:
+async def async_wait_for_rate_limit(url):
+    '''
+    Waits until a request can be sent to the url's host without blocking the event loop
 
-                    if len(folder) > 0: # If folder exists then rename it
-                        for i in folder[1:]:
-                            # Copy the files from the other folders to the first one
-                            shutil.copytree(i, folder[0], dirs_exist_ok=True)
-                            shutil.rmtree(i) # Remove the other folders
-                        
-                        os.rename(folder[0], os.path.join(path, f"{profile_folder_name}", "Highlights", f"{folder_name}_{highlight_id}")) # Rename the folder
-                        
-                    else:
-                        os.mkdir(os.path.join(path, f"{profile_folder_name}", "Highlights", f"{folder_name}_{highlight_id}"))
-                    
-                    query = [f"""UPDATE Highlight SET title = \"{title}\"
-                                 WHERE highlight_id = {highlight_id}"""]
-                    
-                    result = execute_query(queries=query, commit=True, fetch=None) # Update the title
+    Parameters:
+        url (str): The url of the request
+    '''
 
-                    if result == False:
-                        return True # Couldn't Update the database but the folder is updated at least
-                
-                # Check the highlight cover and if it has changed then add it to the database
-                cover_status = add_cover_history(pk=pk, highlight_id=highlight_id, new_cover_link=cover_link)
-                if cover_status is None:
-                    return True # Couldn't check the cover but the highlight is updated at least
+    import asyncio
 
-                if cover_status != "Same": # If the cover file doesn't exist or it has changed
-                    # Try downloading highlight's cover
-                    isDownloaded = try_downloading(link=cover_link, address=os.path.join(f"{profile_folder_name}", "Highlights", f"{folder_name}_{highlight_id}", "Cover"))
+    while True:
+        wait = take_rate_limit_token(url=url)
 
-                    if isDownloaded: # If the cover is downloaded
-                        # Make thumbnail for cover
-                        make_thumbnail(address=os.path.join(f"{profile_folder_name}", "Highlights", f"{folder_name}_{highlight_id}", "Cover"), size=64, circle=True)
+        if wait == 0:
+            return # The request can be sent
 
-                del(highlights[i])
-                return True # Highlight was found and updated
-        
-        # If this highlight is new
-        if len(folder) == 0:
-            os.mkdir(os.path.join(path, f"{profile_folder_name}", "Highlights", f"{folder_name}_{highlight_id}"))
+        await asyncio.sleep(wait)
 
-        else:
-            for i in folder[1:]:
-                shutil.copytree(i, folder[0], dirs_exist_ok=True) # Copy the files from the other folders to the first one
-                shutil.rmtree(i) # Remove the other folders
-            
-            os.rename(folder[0], os.path.join(path, f"{profile_folder_name}", "Highlights", f"{folder_name}_{highlight_id}"))
-        
-        query = [f"""INSERT INTO Highlight VALUES({highlight_id}, {pk}, \"{title}\", 0)"""]
+async def async_send_single_request(url, method, payload, headers, timeout):
+    '''
+    Sends the request with the async session of the event loop (async version of send_single_request)
 
-        result = execute_query(queries=query, commit=True, fetch=None) # Add it to database
+    Parameters:
+        url (str): The url to send the request
+        method (str): The method for the request
+        payload (str): The payload for the request
+        headers (dict): The headers for the request
+        timeout (int): The timeout for the request
+    
+    Returns:
+        response (requests.Response): The response of the request
+    '''
 
-        if result == False:
-            return False # Couldn't add the highlight to the database
-        
-        # Check the highlight cover and if it has changed then add it to the database
-        cover_status = add_cover_history(pk=pk, highlight_id=highlight_id, new_cover_link=cover_link)
-        if cover_status is None:
-            return True # Couldn't check the cover but the highlight is added at least
+    await async_wait_for_rate_limit(url=url) # Wait until the host allows another request
 
-        if cover_status != "Same": # If the cover file doesn't exist or it has changed
-            # Try downloading highlight's cover
-            isDownloaded = try_downloading(link=cover_link, address=os.path.join(f"{profile_folder_name}", "Highlights", f"{folder_name}_{highlight_id}", "Cover"))
+    # Cookies are set by hand for each request, so they aren't kept in the session
+    return await get_async_session().request(method=method, url=url, data=payload, headers=headers, timeout=timeout, discard_cookies=True)
 
-            if isDownloaded: # If the cover is downloaded
-                # Make thumbnail for the cover
-                make_thumbnail(address=os.path.join(f"{profile_folder_name}", "Highlights", f"{folder_name}_{highlight_id}", "Cover"), size=64, circle=True)
-        
-        return True # Highlight was added
+async def async_send_request(url, method='POST', payload=None, headers=None, retries=3, timeout=60, valid_status_codes=(200,)):
+    '''
+    Sends a request to the url and returns the response (async version of send_request)
 
-    except:
-        return False # There was an error somewhere
+    Parameters:
+        url (str): The url to send the request
+        method (str): The method for the request
+        payload (str): The payload for the request
+        headers (dict): The headers for the request
+        retries (int): The number of retries for the request
+        timeout (int): The timeout for the request
+        valid_status_codes (tuple): The status codes that are returned as a valid response
+    
+    Returns:
+        response (requests.Response): The response of the request
+    '''
 
-def update_highlights(pk):
+    return await async_run_steps(steps=send_request_steps(url=url, method=method, payload=payload, headers=headers, retries=retries, timeout=timeout,
+                                                          valid_status_codes=valid_status_codes))
+
+async def async_receive_download(link, headers, part_address, offset):
     '''
-    Updates the highlights of the profile
+    Sends the request of the download and writes the body of the response to the temporary file (async version of receive_download),
+    the file is written in a thread, so the other tasks aren't stopped meanwhile
 
     Parameters:
-        pk (int): The profile's pk
+        link (str): The link to download
+        headers (dict): The headers for the request
+        part_address (str): The full address of the temporary file
+        offset (int): The number of the bytes already downloaded
     
     Returns:
-        data (list): The highlights data
-        update_states (list): The list of update states
+        media (requests.Response): The response of the download (None if it stopped before the temporary file is opened)
+        is_complete (bool): If the whole body is received (False if the download stopped in the middle)
     '''
 
+    import asyncio
+
+    file = None # Opened when the status of the response is known
+    media = None
+    received = bytearray() # The chunks are written together, so there is a thread for each DOWNLOAD_CHUNK_SIZE bytes, not each chunk
+
     try:
-        data = get_highlights_data(pk=pk) # Get the highlights data
-        update_states = [] # Stores the update states of highlights
+        await async_wait_for_rate_limit(url=link) # Wait until the host allows another request
 
-        if data is None: # Couldn't get the highlights data
-            print("Couldn't get the highlights!")
-            return data, update_states # Return None and empty list
-        
-        if len(data) == 0: # If there is no highlight
-            print("There is no highlight!")
-            return data, update_states # Return the highlights data and empty list
-        
-        folder_name = find_folder_name(pk=pk) # Get the folder name for the profile
+        media = await get_async_session().request(method='GET', url=link, headers=headers, timeout=60, allow_redirects=True,
+                                                  accept_encoding=None, stream=True, discard_cookies=True) # Get the headers of the media
 
-        if folder_name is None:
-            return data, update_states # Couldn't find the folder name
+        file = await asyncio.to_thread(open_part, part_address=part_address, media=media, offset=offset)
 
-        if not os.path.exists(os.path.join(path, f"{folder_name}", "Highlights")):
-            os.mkdir(os.path.join(path, f"{folder_name}", "Highlights")) # Make Highlights folder
-        
-        query = [f"""SELECT * FROM Highlight WHERE pk = {pk}"""]
+        if file is None:
+            await media.aclose() # Skip the body of the errors
 
-        highlights = execute_query(queries=query, commit=False, fetch=True) # Get the list of highlights from database
+        else:
+            async for chunk in media.aiter_content():
+                received += chunk
 
-        if highlights == False:
-            print("Couldn't get the highlights!")
-            return data, update_states # There was an error somewhere but return the highlights data and update states anyway
+                if len(received) >= DOWNLOAD_CHUNK_SIZE:
+                    await asyncio.to_thread(file.write, received)
+                    received.clear()
 
-        for new_highlight in data:
-            # Update this highlight
-            update_states.append(update_single_highlight(pk=pk, new_highlight=new_highlight['node'], highlights=highlights))
+    except Exception: # The download stopped in the middle (like a timeout)
+        return (media if file is not None else None), False
 
-        return data, update_states # Return the highlights data and update states
+    finally:
+        if file is not None:
+            try:
+                if len(received) > 0: # The received chunks are kept for resuming the download
+                    await asyncio.to_thread(file.write, received)
 
-    except:
-        print("Couldn't get the highlights!")
-        return data, update_states # There was an error somewhere but return the highlights data and update states anyway
+            finally:
+                await asyncio.to_thread(file.close)
 
-def download_single_highlight_stories(username, highlight_id, highlight_title, direct_call=True):
+    return media, True
+
+async def async_download_link(link, address):
     '''
-    Downloads the stories of a single highlight
+    Downloads the link and saves it to the address (async version of download_link)
 
     Parameters:
-        username (str): The username of the profile
-        highlight_id (int): The highlight's id
-        highlight_title (str): The highlight's title
-        direct_call (bool): If the function is called directly or not
+        link (str): The link to download
+        address (str): The address to save the file
+    
+    Returns:
+        result (str): The extension of the saved file (False if couldn't download the link)
     '''
 
-    try:
-        if direct_call: # If the function is called directly
-            updated = update_profile(username=username, with_highlights=False) # Update the profile
+    return await async_run_steps(steps=download_link_steps(link=link, address=address))
 
-            if not updated:
-                print("Couldn't update the profile!")
-        
-        query = [f"""SELECT pk, is_private FROM Profile WHERE username = \"{username}\""""]
+async def async_try_downloading(link, address, retries=3):
+    '''
+    Tries to download the link for retries times (async version of try_downloading)
 
-        result = execute_query(queries=query, commit=False, fetch=False)
+    Parameters:
+        link (str): The link to download
+        address (str): The address to save the file
+        retries (int): The number of retries for the download
+    
+    Returns:
+        result (str): The extension of the saved file (False if couldn't download the link)
+    '''
 
-        if result == False:
-            print("Couldn't download the highlight!")
-            return # There was an error somewhere
-        
-        pk, is_private = result # Get the pk and is_private of the profile
+    return await async_run_steps(steps=try_downloading_steps(link=link, address=address, retries=retries))
 
-        if is_private == 1: # If the account is private
-            print("This account is private!")
-            return
-        
-        folder_name = find_folder_name(pk=pk) # Get the folder name for the profile
+async def async_download_job(link, address):
+    '''
+    Downloads a single job while respecting the downloads limits (async version of download_job)
 
-        if folder_name is None:
-            return
+    Parameters:
+        link (str): The link to download
+        address (str): The address to save the file
+    
+    Returns:
+        result (str): The extension of the saved file (False if couldn't download the link)
+    '''
 
-        if pk == highlight_id: # If the highlight is the stories
-            if not os.path.exists(os.path.join(path, f"{folder_name}", "Stories")):
-                os.mkdir(os.path.join(path, f"{folder_name}", "Stories")) # Make Stories folder
-        
-        elif direct_call: # If the highlight is a highlight and it's a direct call
-            if not os.path.exists(os.path.join(path, f"{folder_name}", "Highlights")):
-                os.mkdir(os.path.join(path, f"{folder_name}", "Highlights")) # Make Highlights folder
-        
-        if direct_call and pk != highlight_id: # If the highlight is a highlight
-            data = get_highlights_data(pk=pk) # Get the highlights data
+    try:
+        # Wait for a free slot on the host and then for a free download slot
+        async with get_async_semaphore(name=f"host:{urlparse(link).netloc}", value=HOST_CONCURRENCY):
+            async with get_async_semaphore(name='downloads', value=DOWNLOAD_WORKERS):
+                return await async_try_downloading(link=link, address=address)
 
-            if data is None: # Couldn't get the highlights data
-                print("Couldn't update the highlight!")
-                return
-            
-            for highlight in data:
-                highlight = highlight['node']
+    except:
+        return False # Couldn't download the link
 
-                if highlight['id'] == highlight_id: # If the highlight_id is found in the data
-                    new_data = highlight
-                    highlight_title = new_data['title']
-                    break
-            else: # Couldn't find the highlight_id in the data
-                print("Couldn't update the highlight!")
-                return
-            
-            query = [f"""SELECT * FROM Highlight WHERE pk = {pk}"""]
+async def async_download_many(jobs, thumbnails=None):
+    '''
+    Downloads the jobs at the same time and waits for all of them (async version of download_many)
 
-            highlights = execute_query(queries=query, commit=False, fetch=True) # Get the list of highlights from database
+    Parameters:
+        jobs (list): The list of (link, address) jobs to download
+        thumbnails (list): The size, is_video and circle of the thumbnail of each job (None for no thumbnails),
+                           each thumbnail is made on the thumbnail processes as soon as it's file is downloaded
+    
+    Returns:
+        results (list): If each job is downloaded (and it's thumbnail is made) successfully or not (in the same order as jobs)
+    '''
 
-            if highlights == False:
-                print("Couldn't update the highlight!")
-                return # There was an error somewhere
+    import asyncio
 
-            # Update this highlight
-            state = update_single_highlight(pk=pk, new_highlight=new_data, highlights=highlights)
+    async def download(i, link, address):
+        extension = await async_download_job(link=link, address=address)
 
-            if not state: # Couldn't update the highlight
-                print("Couldn't update the highlight!")
-                return
-        
-        # Download the stories of the highlight
-        number_of_items = download_stories(pk=pk, highlight_id=highlight_id, highlight_title=highlight_title)
+        if (not extension) or (thumbnails is None):
+            return extension, bool(extension)
 
-        try:
-            if number_of_items > 0: # If there was any story
-                query = [f"""SELECT number_of_items FROM Highlight WHERE highlight_id = {highlight_id}"""]
+        # Waiting for a free place of the thumbnail processes is done on a thread, so the event loop isn't blocked
+        future = await asyncio.to_thread(submit_thumbnail, address=address, file=os.path.join(path, address) + extension, **thumbnails[i])
 
-                old_number_of_items = execute_query(queries=query, commit=False, fetch=False) # Get the old number of items
+        return extension, await asyncio.wrap_future(future) # The future has the result of the thumbnail (it doesn't raise)
 
-                if old_number_of_items == False: # Couldn't get the number of items
-                    return # There was an error somewhere
-                
-                query = [f"""SELECT COUNT(*) FROM Story WHERE pk = {pk} AND highlight_id = {highlight_id}"""]
+    results = await asyncio.gather(*[download(i=i, link=link, address=address) for i, (link, address) in enumerate(jobs)])
 
-                number_of_downloaded = execute_query(queries=query, commit=False, fetch=False) # Get the number of downloaded stories
+    files = [(address, extension) for (_, address), (extension, _) in zip(jobs, results) if extension] # The saved files
 
-                if number_of_downloaded == False: # Couldn't get the number of downloaded stories
-                    return # There was an error somewhere
+    if len(files) > 0:
+        await asyncio.to_thread(index_media, files=files) # Add the saved files (and their thumbnails) to the media index
 
-                new_max = max(number_of_items, number_of_downloaded[0]) # Get the new maximum number of items
+    return [result for _, result in results]
 
-                if new_max > old_number_of_items[0]: # If the new maximum is greater than the old maximum
-                    query = [f"""UPDATE Highlight SET number_of_items = {new_max}
-                             WHERE highlight_id = {highlight_id}"""]
-                    
-                    execute_query(queries=query, commit=True, fetch=None) # Update the number of items in the database
+async def async_run_provider(function, async_function, **kwargs):
+    '''
+    Calls the provider and checks if it failed because of the connection (async version of run_provider)
 
-        except: # Couldn't update the number of items
-            pass
+    Parameters:
+        function (function): The provider
+        async_function (function): The async version of the provider (None if it doesn't have one)
+        kwargs (dict): The arguments for the provider
+    
+    Returns:
+        data (any): The data of the provider (None if there is no data)
+        failed (bool): If the provider or one of it's requests failed
+    '''
 
-    except:
-        print("Couldn't download the highlight!")
-        return # There was an error somewhere
+    return await async_run_steps(steps=run_provider_steps(function=function, async_function=async_function, **kwargs))
 
-def download_highlights_stories(username, direct_call=True):
+async def async_call_provider(interface, with_provider=False, **kwargs):
     '''
-    Downloads the stories of all highlights
+    Calls the providers of the interface in order until one of them returns the data (async version of call_provider)
 
     Parameters:
-        username (str): The username of the profile
-        direct_call (bool): If the function is called directly or not
+        interface (str): The interface (profile_info, highlights, stories, post_list or post_page)
+        with_provider (bool): Should the name of the provider be returned too
+        kwargs (dict): The arguments for the provider
+    
+    Returns:
+        data (any): The data of the first working provider (None if all of them failed)
+        name (str): The name of the provider that got the data (only if with_provider, None if all of them failed)
     '''
 
-    try:
-        if direct_call: # If the function is called directly
-            updated = update_profile(username=username, with_highlights=False) # Update the profile
+    return await async_run_steps(steps=call_provider_steps(interface=interface, with_provider=with_provider, **kwargs))
 
-            if not updated:
-                print("Couldn't update the profile!")
-        
-        query = [f"""SELECT pk, is_private FROM Profile WHERE username = \"{username}\""""]
+async def async_run_in_browser(coroutine):
+    '''
+    Runs the coroutine on the browser thread without blocking the event loop (async version of run_in_browser)
 
-        result = execute_query(queries=query, commit=False, fetch=False)
+    Parameters:
+        coroutine (coroutine): The coroutine to run
+    
+    Returns:
+        result (any): The result of the coroutine
+    '''
 
-        if result == False:
-            print('There was an error!')
-            return
-        
-        pk, is_private = result # Get the pk and is_private of the profile
+    import asyncio
 
-        if is_private == 1: # If the account is private
-            print("This account is private!")
-            return
-        
-        data, update_states = update_highlights(pk=pk) # Update the highlights
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, get_browser_loop()))
 
-        if len(update_states) == 0: # Couldn't update any highlight
-            print("Couldn't update the highlights!")
-            return
-        
-        for i in range(len(update_states)):
-            if update_states[i]: # If the highlight was updated
-                highlight_id = int(data[i]['node']['id']) # Get the highlight_id
-                
-                print(f"Downloading {data[i]['node']['title']}...") # Show the title of the highlight
+async def async_get_anonyig_profile_info(username):
+    '''
+    Gets the profile's information from anonyig (async version of get_anonyig_profile_info)
 
-                # Download the stories of the highlight
-                download_single_highlight_stories(username=username, highlight_id=highlight_id, highlight_title=data[i]['node']['title'], direct_call=False)
+    Parameters:
+        username (str): The username of the profile
+    
+    Returns:
+        user (dict): The profile's information
+    '''
 
-    except:
-        print("There was an error!")
-        return
+    return await async_run_steps(steps=get_anonyig_profile_info_steps(username=username))
 
-def call_post_code_api(pk, username, is_tag, is_cursor=True, cursor=None):
+async def async_get_profile_data(username):
     '''
-    Calls the API for the (tagged/normal) posts codes of the profile
+    Gets the profile's data (async version of get_profile_data)
 
     Parameters:
-        pk (int): The profile's pk
         username (str): The username of the profile
-        is_tag (bool): If the posts are tagged posts
-        is_cursor (bool): If there is a cursor
-        cursor (str): The cursor for the next set of posts
     
     Returns:
-        data (dict/BeautifulSoup): The posts data
+        profile (dict): The profile's data
     '''
 
-    try:
-        # Get the proper link according to being a post or tagged post and having a cursor or not
-        if is_tag: # If the posts are tagged posts
-            if is_cursor: # If there is a cursor
-                link = f"https://imginn.com/api/tagged?id={pk}&cursor={cursor}" # Call the tagged posts data API with the cursor
-            
-            else: # If there is no cursor
-                link = f"https://imginn.com/tagged/{username}" # Call the tagged posts page link
-        
-        else:
-            if is_cursor: # If there is a cursor
-                link = f"https://imginn.com/api/posts/?id={pk}&cursor={cursor}" # Call the posts data API with the cursor
-            
-            else: # If there is no cursor
-                link = f"https://imginn.com/{username}" # Call the posts page link
-        
-        response = send_request(url=link, method='GET') # Get the data
-
-        if response is None:
-            return None # Couldn't get the data
-        
-        if is_cursor: # If there is a cursor
-            data = json.loads(response.text) # Parse the data to json
+    return await async_run_steps(steps=get_profile_data_steps(username=username))
 
-            if ((not is_tag) and (data['code'] != 200)) or ((is_tag) and (len(data.keys()) == 0)): # There is an error
-                return None # Couldn't get the data
-            
-            return data # Return the data
-        
-        else: # If there is no cursor
-            soap = BeautifulSoup(response.text, 'html.parser') # Parse the response using BeautifulSoup to get the data
+async def async_get_pk_profile_info(pk):
+    '''
+    Gets the profile's information of the given pk from the HTTP API (async version of get_pk_profile_info)
 
-            return soap # Return the data
+    Parameters:
+        pk (int): The pk of the profile
     
-    except:
-        return None # Couldn't get the posts data
+    Returns:
+        user (dict): The profile's information
+    '''
+
+    return await async_run_steps(steps=get_pk_profile_info_steps(pk=pk))
 
-def add_single_post(pk, post_code, is_tag):
+async def async_call_stealthgram_api(pk, highlight_id, is_highlight=False, highlight_ids=None):
     '''
-    Adds a single post to the database
+    Calls the stealthgram API to get the data (async version of call_stealthgram_api)
 
     Parameters:
         pk (int): The profile's pk
-        post_code (str): The post's code
-        is_tag (bool): If the post is a tagged post
+        highlight_id (int): The highlight's id
+        is_highlight (bool): Is the data for highlight or not
+        highlight_ids (list): The ids of the highlights to get the stories of all of them at once (highlight_id is ignored)
     
     Returns:
-        result (bool): If the post is added to the database
+        response (requests.Response): The response of the request
     '''
 
-    try:
-        query = [f"""SELECT * FROM Post WHERE pk = {pk} AND post_code = \"{post_code}\" AND is_tag = {is_tag}"""]
-
-        # Try to get the post from the database to check if it's already recorded
-        does_exist = execute_query(queries=query, commit=False, fetch=True)
-
-        if does_exist == False: # There was an error
-            return False # Couldn't add the post to the database
-        
-        if len(does_exist) == 0: # If the post isn't recorded
-            query = [f"""INSERT INTO Post VALUES({pk}, \"{post_code}\", {is_tag}, NULL, NULL, NULL)"""]
-
-            result = execute_query(queries=query, commit=True, fetch=None) # Add the post to the database
-
-            if result == False:
-                return False # Couldn't add the post to the database
-        
-        return True # The post is added to the database or it's already recorded
-    
-    except:
-        return False # Couldn't add the post to the database
+    return await async_run_steps(steps=call_stealthgram_api_steps(pk=pk, highlight_id=highlight_id, is_highlight=is_highlight, highlight_ids=highlight_ids))
 
-def add_posts_codes(pk, username, is_tag):
+async def async_get_stories_data(pk, highlight_id):
     '''
-    Adds the (tagged/normal) posts codes of the profile to the database
+    Gets the stories (or highlights) data of the profile (async version of get_stories_data)
 
     Parameters:
         pk (int): The profile's pk
-        username (str): The username of the profile
-        is_tag (bool): If the posts are tagged posts
+        highlight_id (int): The highlight's id
     
     Returns:
-        result (bool): If the posts are added to the database
+        data (list): The stories data
     '''
 
-    try:
-        if is_tag: # If the posts are tagged posts
-            instruction = "last_tagged_post_code" # The instruction for the last post
-        
-        else:
-            instruction = "last_post_code" # The instruction for the last post
-        
-        soap = call_post_code_api(pk=pk, username=username, is_tag=is_tag, is_cursor=False) # Get the data
-
-        if soap is None: # If there is an error
-            return False # Couldn't get the data
-    
-    except:
-        return False # Couldn't get the data
-    
-    try:
-        query = [f"""SELECT {instruction} FROM Profile
-                 WHERE username = \"{username}\""""]
-        
-        last_post = execute_query(queries=query, commit=False, fetch=False) # Get the last post that is checked
-        
-        if last_post == False: # There was an error
-            return False # Couldn't get the last post that is checked
-        
-        last_post = last_post[0]
-
-        new_last_post = last_post # The new last post that is checked
+    return await async_run_steps(steps=get_stories_data_steps(pk=pk, highlight_id=highlight_id))
 
-        items = soap.find_all(attrs={'class': 'item'}) # Get the items of the posts
-
-        for i in range (len(items)):
-            post_code = items[i].find(attrs={'class': 'img'}).find('a').attrs['href'] # Get the post link
-            post_code = post_code[post_code.index('p/') + 2:post_code.rindex('/')] # Get the post code
+async def async_get_highlights_data(pk):
+    '''
+    Gets the highlights data of the profile (async version of get_highlights_data)
 
-            if not add_single_post(pk=pk, post_code=post_code, is_tag=is_tag): # Add the post to the database
-                new_last_post = post_code # Couldn't add the post to the database
-            
-            if (is_tag and i == 0) or ((not is_tag) and i == 3): # If it's the first tagged post or the 4th post (the first post that is certainly not pinned)
-                new_last_post = post_code # Set the last post that is checked
-            
-            if (i > 2 or is_tag) and last_post == post_code: # If the post is the last post that is checked
-                if new_last_post != last_post: # If the last post that is checked has changed
-                    query = [f"""UPDATE Profile SET {instruction} = \"{new_last_post}\"
-                             WHERE username = \"{username}\""""]
-                    
-                    execute_query(queries=query, commit=True, fetch=None) # Update the last post that is checked
+    Parameters:
+        pk (int): The profile's pk
+    
+    Returns:
+        data (list): The highlights data
+    '''
 
-                return True # All the posts are checked
-        
-        try:
-            cursor = soap.find(attrs={'class': 'load-more'})
-            cursor = cursor.attrs['data-cursor'] # Get the cursor for the next set of posts
-        
-        except:
-            if new_last_post != last_post: # If the last post that is checked has changed
-                query = [f"""UPDATE Profile SET {instruction} = \"{new_last_post}\"
-                         WHERE username = \"{username}\""""]
-                
-                execute_query(queries=query, commit=True, fetch=None) # Update the last post that is checked
+    return await async_run_steps(steps=get_highlights_data_steps(pk=pk))
 
-            return True # All the posts are checked
-        
-        couldnt_get_all = False # Flag for if couldn't get all the posts data
+async def async_get_highlights_stories_data(pk, highlight_ids, batch_size=None):
+    '''
+    Gets the stories data of several highlights with a request for each batch of them, all at the same time (async version of get_highlights_stories_data)
 
-        while True: # Get the next set of posts until there is no more post
-            data = call_post_code_api(pk=pk, username=username, is_tag=is_tag, is_cursor=True, cursor=cursor) # Get the data
+    Parameters:
+        pk (int): The profile's pk
+        highlight_ids (list): The highlights' ids
+        batch_size (int): The number of the highlights in each request
+    
+    Returns:
+        data (dict): The stories data of each highlight_id (None for the ones that couldn't get)
+    '''
 
-            if data is None: # Couldn't get the data
-                couldnt_get_all = True # Couldn't get all the posts data
-                break
-            
-            items = data['items'] # Get the items of the posts
-            
-            for item in items:
-                post_code = item['code'] # Get the post code
+    return await async_run_steps(steps=get_highlights_stories_data_steps(pk=pk, highlight_ids=highlight_ids, batch_size=batch_size))
 
-                if not add_single_post(pk=pk, post_code=post_code, is_tag=is_tag): # Add the post to the database
-                    new_last_post = post_code # Couldn't add the post to the database
-                
-                if last_post == post_code: # If the post is the last post that is checked
-                    if new_last_post != last_post: # If the last post that is checked has changed
-                        query = [f"""UPDATE Profile SET {instruction} = \"{new_last_post}\"
-                                 WHERE username = \"{username}\""""]
-                        
-                        execute_query(queries=query, commit=True, fetch=None) # Update the last post that is checked
+async def async_call_post_code_api(pk, username, is_tag, is_cursor=True, cursor=None, use_cache=True):
+    '''
+    Calls the API for the (tagged/normal) posts codes of the profile (async version of call_post_code_api)
 
-                    return True # All the posts are checked
-            
-            if data['hasNext']: # If there is more post
-                cursor = data['cursor'] # Get the cursor for the next set of posts
-            
-            else:
-                break # There is no more post
-        
-        if (not couldnt_get_all) and (new_last_post != last_post): # If the last post that is checked has changed
-            query = [f"""UPDATE Profile SET {instruction} = \"{new_last_post}\"
-                     WHERE username = \"{username}\""""]
-            
-            execute_query(queries=query, commit=True, fetch=None) # Update the last post that is checked
-        
-        return True # All the posts are checked
+    Parameters:
+        pk (int): The profile's pk
+        username (str): The username of the profile
+        is_tag (bool): If the posts are tagged posts
+        is_cursor (bool): If there is a cursor
+        cursor (str): The cursor for the next set of posts
+        use_cache (bool): Can a recently saved response be used instead of sending the request
     
-    except:
-        return False # Couldn't get all the posts data
+    Returns:
+        data (dict/BeautifulSoup): The posts data
+    '''
+
+    return await async_run_steps(steps=call_post_code_api_steps(pk=pk, username=username, is_tag=is_tag, is_cursor=is_cursor, cursor=cursor, use_cache=use_cache))
 
-def call_post_page_api(post_code):
+async def async_call_post_page_api(post_code, use_cache=True):
     '''
-    Calls the API for the post page
+    Calls the API for the post page (async version of call_post_page_api)
 
     Parameters:
         post_code (str): The post's code
+        use_cache (bool): Can a recently saved response be used instead of sending the request
     
     Returns:
         soap (BeautifulSoup): The post data
     '''
 
-    try:
-        link = f"https://imginn.com/p/{post_code}" # The link for the post page
-
-        response = send_request(url=link, method='GET') # Get the data
+    return await async_run_steps(steps=call_post_page_api_steps(post_code=post_code, use_cache=use_cache))
 
-        if response is None:
-            return None # Couldn't get the data
-        
-        soap = BeautifulSoup(response.text, 'html.parser') # Parse the response using BeautifulSoup to get the data
+async def async_update_profile(username, with_highlights=True):
+    '''
+    Updates the profile (async version of update_profile)
 
-        return soap # Return the data
+    Parameters:
+        username (str): The username of the profile
+        with_highlights (bool): Should the highlights be updated or not
     
-    except:
-        return None # Couldn't get the data
+    Returns:
+        result (bool): If the profile is updated successfully or not
+    '''
 
-def get_single_post_data(post_code):
+    return await async_run_steps(steps=update_profile_steps(username=username, with_highlights=with_highlights))
+
+async def async_update_highlight_cover(pk, highlight_id, cover_link, cover_address):
     '''
-    Gets the data of a single post
+    Checks the highlight's cover and downloads it if it has changed or it doesn't exist (async version of update_highlight_cover)
 
     Parameters:
-        post_code (str): The post's code
+        pk (int): The profile's pk
+        highlight_id (int): The highlight's id
+        cover_link (str): The cover link
+        cover_address (str): The address of the cover
     
     Returns:
-        data (tuple): The post data
+        result (bool): If the cover is saved and it's thumbnail is made
     '''
 
-    try:
-        soap = call_post_page_api(post_code=post_code) # Get the data
-
-        if soap is None:
-            return None # Couldn't get the post data
-        
-        data = soap.find(attrs={'class': 'page-post'}) # Find the post data
-
-        try:
-            caption = data.find(attrs={'class': 'desc'}).text.strip() # Get the caption of the post
-        
-        except:
-            caption = None # Post doesn't have a caption
+    return await async_run_steps(steps=update_highlight_cover_steps(pk=pk, highlight_id=highlight_id, cover_link=cover_link, cover_address=cover_address))
 
-        timestamp = int(data.get_attribute_list('data-created')[0]) # Get the timestamp of the post
+async def async_update_highlights(pk):
+    '''
+    Updates the highlights of the profile, the covers are checked at the same time (async version of update_highlights)
 
-        links = [] # List of media links
+    Parameters:
+        pk (int): The profile's pk
+    
+    Returns:
+        data (list): The highlights data
+        update_states (list): The list of update states
+    '''
 
-        single_media = False # Flag for if the post has single media
+    return await async_run_steps(steps=update_highlights_steps(pk=pk))
 
-        try:
-            swiper = data.find(attrs={'class': 'swiper-wrapper'}) # Get the swiper of the post
+async def async_download_stories(pk, highlight_id, highlight_title, stories_data=None):
+    '''
+    Downloads the stories or highlights of the profile (async version of download_stories)
 
-            if swiper is not None: # If the post has multiple media
-                try:
-                    slide = swiper.find_all(attrs={'class': 'swiper-slide'}) # Get the slides of the post
+    Parameters:
+        pk (int): The profile's pk
+        highlight_id (int): The highlight's id
+        highlight_title (str): The highlight's title
+        stories_data (list): The stories data (if already fetched)
+    
+    Returns:
+        number_of_items (int): The number of items
+        is_fetched (bool): If the stories are fetched (False means the highlight should be tried again)
+    '''
 
-                    for item in slide:
-                        item_type = 'img' # The type of the media
+    return await async_run_steps(steps=download_stories_steps(pk=pk, highlight_id=highlight_id, highlight_title=highlight_title, stories_data=stories_data))
 
-                        if item.find('video') is not None: # If the media is video
-                            item_type = 'video' # Set the type to video
-                        
-                        link = item.get_attribute_list('data-src')[0] # Get the media link
+async def async_download_single_highlight_stories(username, highlight_id, highlight_title, direct_call=True, stories_data=None):
+    '''
+    Downloads the stories of a single highlight (async version of download_single_highlight_stories)
 
-                        if 'null.jpg' in link: # If the media link is null
-                            link = item.find(item_type).attrs['poster'] # Get the poster link instead
-                            item_type = 'img' # Set the type to image
-                        
-                        links.append((link, item_type)) # Add the media link to the list
-                
-                except:
-                    return None # Couldn't get the post data
-            
-            else: # If the post has single media
-                single_media = True # The post has single media
-        
-        except: # If the post has single media
-            single_media = True # The post has single media
+    Parameters:
+        username (str): The username of the profile
+        highlight_id (int): The highlight's id
+        highlight_title (str): The highlight's title
+        direct_call (bool): If the function is called directly or not
+        stories_data (list): The stories data of the highlight (if already fetched)
+    '''
 
-        if single_media: # If the post has single media
-            download = data.find(attrs={'class': 'downloads'}) # Get the download section of the post
+    await async_run_steps(steps=download_single_highlight_stories_steps(username=username, highlight_id=highlight_id, highlight_title=highlight_title,
+                                                                        direct_call=direct_call, stories_data=stories_data))
 
-            if download is not None: # If the post has download section
-                media = data.find(attrs={'class': 'media-wrap'}) # Get the media of the post
+async def async_download_highlights_stories(username, direct_call=True):
+    '''
+    Downloads the stories of all highlights, all at the same time (async version of download_highlights_stories)
 
-                item_type = 'img' # The type of the media
+    Parameters:
+        username (str): The username of the profile
+        direct_call (bool): If the function is called directly or not
+    '''
 
-                if len(media.get_attribute_list('class')) == 2: # If the media is video
-                    item_type = 'video' # Set the type to video
+    await async_run_steps(steps=download_highlights_stories_steps(username=username, direct_call=direct_call))
 
-                link = download.find('a').attrs['href'] # Get the media link
+async def async_add_posts_codes(pk, username, is_tag):
+    '''
+    Adds the (tagged/normal) posts codes of the profile to the database (async version of add_posts_codes)
 
-                if 'u=' in link: # If the media link is from google translation
-                    link = link[link.index('u=') + 2:] # Get rid of google translation part of the link
+    Parameters:
+        pk (int): The profile's pk
+        username (str): The username of the profile
+        is_tag (bool): If the posts are tagged posts
+    
+    Returns:
+        result (bool): If the posts are added to the database
+    '''
 
-                    link = unquote(link) # Decode the link
+    return await async_run_steps(steps=add_posts_codes_steps(pk=pk, username=username, is_tag=is_tag))
 
-                if 'null.jpg' in link: # If the media link is null
-                    link = media.find(item_type).attrs['poster'] # Get the poster link instead
-                    item_type = 'img' # Set the type to image
+async def async_get_single_post_data(post_code):
+    '''
+    Gets the data of a single post (async version of get_single_post_data)
 
-                if '&dl' in link: # If the media link is direct download link
-                    link = link[:link.index('&dl')] # Get the media link
-                
-                links.append((link, item_type)) # Add the media link to the list
-        
-        return (caption, timestamp, links) # Return the post data
+    Parameters:
+        post_code (str): The post's code
     
-    except:
-        return None # Couldn't get the post data
+    Returns:
+        data (tuple): The post data
+    '''
 
-def download_single_post(post_code, is_tag, address):
+    return await async_run_steps(steps=get_single_post_data_steps(post_code=post_code))
+
+async def async_fetch_single_post(post_code, address):
     '''
-    Downloads a single post
+    Downloads the media of a single post without updating the database (async version of fetch_single_post)
 
     Parameters:
         post_code (str): The post's code
-        is_tag (bool): If the post is a tagged post
         address (str): The address for the post
     
     Returns:
-        status (bool): If the post is downloaded
+        post (tuple): The caption, timestamp and number of items of the post
     '''
 
-    try:
-        data = get_single_post_data(post_code=post_code) # Get the data
-
-        if data is None: # Couldn't get the data
-            return False # Couldn't download the post
-        
-        caption = data[0] # Get the caption of the post
-        timestamp = data[1] # Get the timestamp of the post
-        links = data[2] # Get the media links of the post
-        
-        for i in range(len(links)):
-            try:
-                # Try downloading the media
-                isDownloaded = try_downloading(link=links[i][0], address=os.path.join(f"{address}", f"{post_code}_{i}"))
-
-                if not isDownloaded: # Couldn't download the media
-                    return False # Couldn't download the post
-                
-                # Try making a thumbnail for the media
-                if not make_thumbnail(address=os.path.join(f"{address}", f"{post_code}_{i}"), size=320, is_video=(links[i][1] == 'video')):
-                    return False # Couldn't download the post
-            
-            except:
-                return False # Couldn't download the post
-        
-        query = f"""UPDATE Post SET number_of_items = {len(links)}, caption =""" # The query for updating the post
-
-        if caption is None or caption == "":
-            query += " NULL," # If the caption is empty
-
-        else:
-            query += f""" \"{caption}\", """
-
-        query += f"""timestamp = {timestamp} WHERE post_code = \"{post_code}\" AND is_tag = {is_tag}"""
-
-        result = execute_query(queries=[query], commit=True, fetch=None) # Update the post in the database
+    return await async_run_steps(steps=fetch_single_post_steps(post_code=post_code, address=address))
 
-        if result == False:
-            return False # Couldn't update the post in the database 
-        
-        return True # The post is downloaded
-    
-    except:
-        return False # Couldn't download the post
-
-def download_posts(username, is_tag, direct_call=True):
+async def async_download_posts(username, is_tag, direct_call=True):
     '''
-    Downloads the (tagged/normal) posts of the profile
+    Downloads the (tagged/normal) posts of the profile, the posts of all the profiles share the limit of POST_WORKERS (async version of download_posts)
 
     Parameters:
         username (str): The username of the profile
@@ -2149,63 +7090,103 @@ def download_posts(username, is_tag, direct_call=True):
         status (bool): If the posts are downloaded
     '''
 
+    return await async_run_steps(steps=download_posts_steps(username=username, is_tag=is_tag, direct_call=direct_call))
+
+async def async_sync_profile(username):
+    '''
+    Updates the profile and downloads it's stories, highlights and (tagged/normal) posts, all at the same time
+
+    Parameters:
+        username (str): The username of the profile
+    
+    Returns:
+        result (bool): If the profile is updated successfully or not
+    '''
+
+    import asyncio
+
     try:
-        if direct_call: # If the function is called directly
-            updated = update_profile(username=username, with_highlights=False) # Update the profile
+        query = [("""SELECT pk FROM Profile WHERE username = ?""", (username,))]
 
-            if not updated:
-                print("Couldn't update the profile!")
+        result = await asyncio.to_thread(execute_query, queries=query, commit=False, fetch=False)
+
+        if not result:
+            print(f"{username} isn't added!")
+            return False # The profile isn't in the database
         
-        query = [f"""SELECT pk, is_private FROM Profile WHERE username = \"{username}\""""]
+        pk = result[0]
 
-        result = execute_query(queries=query, commit=False, fetch=False)
+        if not await async_update_profile(username=username, with_highlights=False): # Update the profile
+            return False
+        
+        query = [("""SELECT username, is_private FROM Profile WHERE pk = ?""", (pk,))]
+
+        result = await asyncio.to_thread(execute_query, queries=query, commit=False, fetch=False) # The username may have changed
 
         if result == False:
             return False # There was an error
         
-        pk, is_private = result # Get the pk and is_private of the profile
+        username, is_private = result
 
         if is_private == 1: # If the account is private
-            print("This account is private!")
-            return False # It's not possible to download the posts of a private account
+            return True # There is nothing more to download
         
-        add_posts_codes(pk, username, is_tag) # Add the (tagged/normal) posts codes of the profile
+        await asyncio.gather(async_download_single_highlight_stories(username=username, highlight_id=pk, highlight_title="Stories", direct_call=False),
+                             async_download_highlights_stories(username=username, direct_call=False),
+                             async_download_posts(username=username, is_tag=False, direct_call=False),
+                             async_download_posts(username=username, is_tag=True, direct_call=False))
 
-        query = [f"""SELECT post_code FROM Post WHERE pk = {pk} AND
-                 is_tag = {is_tag} AND number_of_items IS NULL"""]
-        
-        result = execute_query(queries=query, commit=False, fetch=True)
+        return True # Profile updated successfully
+    
+    except:
+        return False # There was an error somewhere
 
-        if result == False:
-            return False # There was an error
-        
-        posts = result # Get the list of posts that are not downloaded yet
+async def async_sync_profiles(usernames):
+    '''
+    Syncs several profiles at the same time
 
-        folder_name = find_folder_name(pk=pk) # Get the folder name for the profile
+    Parameters:
+        usernames (list): The usernames of the profiles
+    
+    Returns:
+        results (dict): If each profile is updated successfully or not
+    '''
 
-        if is_tag: # If the posts are tagged posts
-            address = os.path.join(f"{folder_name}", "Tagged") # The address for the tagged posts
-        
-        else:
-            address = os.path.join(f"{folder_name}", "Posts") # The address for the normal posts
-        
-        if not os.path.exists(os.path.join(path, address)):
-            os.mkdir(os.path.join(path, address)) # Make the folder for the posts
-        
-        for post in posts:
-            try:
-                download_single_post(post[0], is_tag, address) # Download the post
-            
-            except:
-                continue # Couldn't download the post, skip and try the next one
-        
-        return True # Posts are downloaded
+    import asyncio
+
+    try:
+        results = await asyncio.gather(*[async_sync_profile(username=username) for username in usernames])
+
+        return dict(zip(usernames, results)) # Return the result of each profile
     
-    except:
-        return False # Couldn't download any post
+    finally:
+        await close_async_session() # Close the connections of this event loop
+
+def sync_profiles(usernames):
+    '''
+    Syncs several profiles at the same time with the async functions
+
+    Parameters:
+        usernames (list): The usernames of the profiles
+    
+    Returns:
+        results (dict): If each profile is updated successfully or not
+    '''
+
+    import asyncio
+
+    results = asyncio.run(async_sync_profiles(usernames=usernames))
+
+    list_profiles() # Update the screen
+
+    return results
 
-connection, dbCursor = initialize() # Initialize the program
+# The built-in providers of each interface
+register_provider(interface='profile_info', name='anonyig', function=get_anonyig_profile_info, async_function=async_get_anonyig_profile_info)
+register_provider(interface='highlights', name='stealthgram', function=get_highlights_data, async_function=async_get_highlights_data)
+register_provider(interface='stories', name='stealthgram', function=get_stories_data, async_function=async_get_stories_data)
+register_provider(interface='post_list', name='imginn', function=call_post_code_api, async_function=async_call_post_code_api)
+register_provider(interface='post_page', name='imginn', function=call_post_page_api, async_function=async_call_post_page_api)
 
-if connection is None: # If there was an error in initializing
-    print("Couldn't initialize the program!")
-    exit() # Exit the program
\ No newline at end of file
+# The thumbnail processes are stopped before the modules are cleared at exit (concurrent.futures.process is imported when they start)
+atexit.register(configure_thumbnails)
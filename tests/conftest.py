@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # main.py is in the parent folder
+
+import main
+
+
+@pytest.fixture
+def store(tmp_path):
+    '''
+    Opens a store in a temporary folder and closes it after the test
+
+    Yields:
+        path (pathlib.Path): The path of the storage folder
+    '''
+
+    store_path = tmp_path / "storage"
+
+    assert main.open_store(store_path=str(store_path)) is not None
+
+    yield store_path
+
+    main.close_store()
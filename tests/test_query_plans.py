@@ -0,0 +1,49 @@
+import main
+
+
+def get_user_version():
+    database, _ = main.get_database()
+
+    return database.execute("PRAGMA user_version").fetchone()[0]
+
+
+def get_schema():
+    database, _ = main.get_database()
+
+    return database.execute("SELECT type, name, sql FROM sqlite_master ORDER BY type, name").fetchall()
+
+
+def test_hot_queries_use_indexes(store):
+    assert main.check_query_plans() == {}
+
+
+def test_all_migrations_are_applied(store):
+    assert get_user_version() == len(main.MIGRATIONS)
+
+
+def test_reopening_keeps_the_schema(store):
+    schema = get_schema()
+
+    main.close_store()
+    assert main.open_store(store_path=str(store)) is not None
+
+    assert get_user_version() == len(main.MIGRATIONS)
+    assert get_schema() == schema
+    assert main.check_query_plans() == {}
+
+
+def test_migrations_are_idempotent(store):
+    schema = get_schema()
+
+    main.close_store()
+
+    # Apply every migration again on top of the migrated database
+    main.open_store(store_path=str(store))
+    main.write_db(main.execute_query, queries=["PRAGMA user_version = 0"], commit=True, fetch=None)
+    assert get_user_version() == 0
+    main.close_store()
+
+    assert main.open_store(store_path=str(store)) is not None
+
+    assert get_user_version() == len(main.MIGRATIONS)
+    assert get_schema() == schema